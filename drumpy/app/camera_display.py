@@ -1,8 +1,8 @@
-import numpy as np
-import numpy.typing as npt
 import pygame.time
-from pygame import Surface
+from pygame import Surface, surfarray
 
+from drumpy.app.frame_buffer import Frame
+from drumpy.app.landmark_overlay import LandmarkOverlay
 from drumpy.app.video_source import VideoSource, Source
 from drumpy.pose.mediapipe_pose import MediaPipePose
 
@@ -26,10 +26,17 @@ class VideoDisplay:
         self.window = window
         self.media_pipe_pose = media_pipe_pose
         self.video_source = video_source
-        self.prev_surface = None
+        self.prev_surface: Surface | None = None
+
+        # Preallocated surfaces, the frame is uploaded into the first and scaled into the second
+        self.frame_surface = Surface(video_source.get_size())
+        self.scaled_surface = Surface(rect.size)
+
+        # Camera frames are indexed (x, y), so are the landmarks detected in them
+        self.overlay = LandmarkOverlay(rect, transposed=source == Source.CAMERA)
 
     def update(self) -> None:
-        result: npt.NDArray[np.float32] | None = self.video_source.get_frame()
+        result: Frame | None = self.video_source.get_frame()
         assert (
             result is None or result.shape[0] == result.shape[1]
         ), "Frame is not square"
@@ -37,6 +44,7 @@ class VideoDisplay:
         # There is no new frame to display
         if result is None and self.prev_surface is not None:
             self.window.blit(self.prev_surface, self.rect.topleft)
+            self.draw_landmarks()
             return
 
         # There is no new frame to display and no previous frame to display
@@ -44,28 +52,33 @@ class VideoDisplay:
             return
 
         if result is not None:
-            frame: npt.NDArray[np.float32] = result
+            frame: Frame = result
             timestamp_ms = self.video_source.get_timestamp_ms()
 
             self.media_pipe_pose.process_image(frame, timestamp_ms)
+            # MediaPipe copies the frame into its own image
+            self.video_source.copy_counter.add(self.media_pipe_pose.image_nbytes)
 
-            # Draw the landmarks on the image
-            if self.media_pipe_pose.visualisation is not None:
-                frame = self.media_pipe_pose.visualisation
-
-            if self.source == Source.CAMERA:
+            # Surfaces are indexed (x, y), camera frames already are, file frames are (y, x)
+            # Swapping the axes is a view, the frame is only copied once into the surface
+            if self.source == Source.FILE:
                 frame = frame.swapaxes(0, 1)
 
-            image_surface = pygame.image.frombuffer(
-                frame.tobytes(), (frame.shape[0], frame.shape[0]), "RGB"
-            )
-
-            # # Rotate the image 90 degrees
-            # if self.source == Source.CAMERA:
-            #     image_surface = pygame.transform.rotate(image_surface, -90)
+            surfarray.blit_array(self.frame_surface, frame)
+            self.video_source.copy_counter.add(frame.nbytes)
 
             # Scale the image to fit the window
-            image_surface = pygame.transform.scale(image_surface, self.rect.size)
+            pygame.transform.scale(
+                self.frame_surface, self.rect.size, self.scaled_surface
+            )
+
+            self.prev_surface = self.scaled_surface
+            self.window.blit(self.scaled_surface, self.rect.topleft)
+            self.draw_landmarks()
 
-            self.prev_surface = image_surface
-            self.window.blit(image_surface, self.rect.topleft)
+    def draw_landmarks(self) -> None:
+        """
+        Draw the latest landmarks on top of the displayed frame
+        """
+        for landmarks in self.media_pipe_pose.visible_landmarks:
+            self.overlay.draw(self.window, landmarks)
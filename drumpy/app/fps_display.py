@@ -29,10 +29,9 @@ class FPSDisplay(UILabel):
             case _:  # type: ignore
                 pass
 
-        self.model = media_pipe_pose.model
         super().__init__(
             Rect((0, 0), (900, 50)),
-            f"UI FPS: -:--  Camera FPS: -:--   {mode}  Model: {self.model}",
+            f"UI FPS: -:--  Camera FPS: -:--   {mode}  Model: {media_pipe_pose.model}",
             manager=ui_manager,
             anchors={"top": "top", "left": "left"},
         )
@@ -79,6 +78,9 @@ class FPSDisplay(UILabel):
             case _:  # type: ignore
                 pass
 
+        # The model can change at runtime when it is selected adaptively
         self.set_text(
-            f"UI FPS: {ui_fps:.2f}  Camera FPS: {camera_fps:.2f}   {mode}  Model: {self.model}"
+            f"UI FPS: {ui_fps:.2f}  Camera FPS: {camera_fps:.2f}   {mode}  "
+            f"Model: {self.media_pipe_pose.model}  "
+            f"Latency: {self.media_pipe_pose.inference_latency_ms:.0f} ms"
         )
@@ -0,0 +1,97 @@
+import threading
+from typing import Self, TypeAlias
+
+import numpy as np
+import numpy.typing as npt
+
+# Type for an RGB frame, a C-contiguous array of shape (size, size, 3)
+Frame: TypeAlias = npt.NDArray[np.uint8]
+
+
+class FramePool:
+    """
+    A set of preallocated, C-contiguous frame buffers.
+    A buffer is acquired to capture a frame into and released once the frame is no longer used,
+    a buffer is never handed out while it is in use. When all buffers are in use a new one is allocated,
+    so the pool should be reserved as large as the number of frames that are in use at the same time.
+    """
+
+    def __init__(self, shape: tuple[int, int, int], size: int = 1) -> None:
+        """
+        :param shape: The shape of every frame
+        :param size: The number of buffers to preallocate
+        """
+        self.shape = shape
+        self.buffers: list[Frame] = []
+        # The buffers that are not in use, the capture and the consumer can run on different threads
+        self.free: list[Frame] = []
+        self.lock = threading.Lock()
+        self.reserve(size)
+
+    def __len__(self: Self) -> int:
+        return len(self.buffers)
+
+    def reserve(self: Self, size: int) -> None:
+        """
+        Make sure the pool contains at least the given number of buffers
+        """
+        with self.lock:
+            while len(self.buffers) < size:
+                buffer = np.empty(self.shape, dtype=np.uint8)
+                self.buffers.append(buffer)
+                self.free.append(buffer)
+
+    def acquire(self: Self) -> Frame:
+        """
+        Get a buffer that is not in use to write a frame into, allocating one if all buffers are in use
+        """
+        with self.lock:
+            if len(self.free) > 0:
+                return self.free.pop()
+
+            buffer = np.empty(self.shape, dtype=np.uint8)
+            self.buffers.append(buffer)
+            return buffer
+
+    def release(self: Self, buffer: Frame) -> None:
+        """
+        Hand a buffer back to the pool, its frame is no longer used
+        """
+        with self.lock:
+            assert all(free is not buffer for free in self.free), (
+                "The buffer is released twice"
+            )
+            self.free.append(buffer)
+
+
+class CopyCounter:
+    """
+    Counts the bytes of frame data that are copied on the way from the capture to the display and the pose estimation
+    """
+
+    def __init__(self) -> None:
+        self.bytes_copied = 0
+        self.frames = 0
+        self.lock = threading.Lock()
+
+    def add(self: Self, nbytes: int) -> None:
+        """
+        Register a copy of the given number of bytes
+        """
+        with self.lock:
+            self.bytes_copied += nbytes
+
+    def count_frame(self: Self) -> None:
+        """
+        Register a newly captured frame
+        """
+        with self.lock:
+            self.frames += 1
+
+    @property
+    def bytes_per_frame(self: Self) -> float:
+        """
+        The average number of bytes copied per captured frame
+        """
+        with self.lock:
+            return self.bytes_copied / self.frames if self.frames > 0 else 0.0
@@ -0,0 +1,71 @@
+from typing import Self
+
+import numpy as np
+import numpy.typing as npt
+import pygame
+from mediapipe.python.solutions.pose_connections import POSE_CONNECTIONS  # type: ignore
+from pygame import Surface
+
+from drumpy.util import LandmarkArray
+
+# The pairs of landmark indices that are connected by a line, shape (35, 2)
+CONNECTIONS: npt.NDArray[np.intp] = np.array(sorted(POSE_CONNECTIONS), dtype=np.intp)  # type: ignore
+
+# Landmarks below this visibility are not drawn, like the mediapipe drawing utils
+MIN_VISIBILITY = 0.5
+
+LANDMARK_COLOR = pygame.Color(255, 0, 0)
+CONNECTION_COLOR = pygame.Color(224, 224, 224)
+
+
+class LandmarkOverlay:
+    """
+    Draws pose landmarks and their connections directly onto a surface, on top of the displayed frame.
+    The screen positions of all landmarks are computed at once from the landmark array,
+    the frame itself is never copied.
+    """
+
+    def __init__(
+        self,
+        rect: pygame.Rect,
+        transposed: bool,  # noqa: FBT001
+        landmark_color: pygame.Color = LANDMARK_COLOR,
+        connection_color: pygame.Color = CONNECTION_COLOR,
+        radius: int = 4,
+        width: int = 2,
+    ) -> None:
+        """
+        :param rect: The area of the surface the frame is displayed in
+        :param transposed: Whether the frame passed to the landmarker was indexed (x, y) instead of (y, x),
+        as is the case for camera frames
+        :param radius: The radius of the landmark dots, in pixels
+        :param width: The width of the connection lines, in pixels
+        """
+        self.rect = rect
+        self.transposed = transposed
+        self.landmark_color = landmark_color
+        self.connection_color = connection_color
+        self.radius = radius
+        self.width = width
+
+        self.origin = np.array(rect.topleft, dtype=np.float32)
+        self.scale = np.array(rect.size, dtype=np.float32)
+
+    def draw(self: Self, surface: Surface, landmarks: LandmarkArray) -> None:
+        """
+        Draw the landmarks of a single pose
+        :param landmarks: The landmarks as an array of shape (33, 5), normalized to the frame
+        """
+        normalized = landmarks[:, 1::-1] if self.transposed else landmarks[:, :2]
+        points = np.rint(self.origin + normalized * self.scale).astype(np.int32)
+
+        # Missing visibility values are NaN, those landmarks are drawn
+        visible = ~(landmarks[:, 3] < MIN_VISIBILITY)
+        connected = visible[CONNECTIONS[:, 0]] & visible[CONNECTIONS[:, 1]]
+        lines = points[CONNECTIONS[connected]].tolist()
+
+        for start, end in lines:
+            pygame.draw.line(surface, self.connection_color, start, end, self.width)
+
+        for point in points[visible].tolist():
+            pygame.draw.circle(surface, self.landmark_color, point, self.radius)
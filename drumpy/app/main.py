@@ -1,3 +1,4 @@
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Self
 
 import pygame
@@ -8,10 +9,24 @@ from pygame_gui import UIManager  # type: ignore
 
 from drumpy.app.camera_display import VideoDisplay
 from drumpy.app.fps_display import FPSDisplay
-from drumpy.app.video_source import CameraSource, VideoFileSource, Source
+from drumpy.app.threaded_source import BufferPolicy, ThreadedVideoSource
+from drumpy.app.video_source import (
+    CameraSource,
+    VideoFileSource,
+    Source,
+    VideoSource,
+)
+from drumpy.drum.sound import preload_samples
+from drumpy.landmark_publisher import LandmarkPublisher
+from drumpy.pose.adaptive_model import AdaptiveModelSelector
+from drumpy.pose.frame_scaler import FrameScaler
+from drumpy.pose.landmark_filter import LandmarkFilter
 from drumpy.pose.landmark_type import LandmarkType
 from drumpy.pose.landmarker_model import LandmarkerModel
+from drumpy.pose.latency_compensator import LatencyCompensator
 from drumpy.pose.mediapipe_pose import MediaPipePose
+from drumpy.pose.region_of_interest import RegionOfInterest
+from drumpy.startup_timer import StartupTimer
 from drumpy.tracking.drum_trackers import DrumTrackers
 
 
@@ -20,7 +35,7 @@ class App:
     Main application class
     """
 
-    def __init__(
+    def __init__(  # noqa: PLR0913, PLR0917
         self,
         source: Source = Source.CAMERA,
         file_path: Optional[str] = None,
@@ -31,34 +46,125 @@ class App:
         landmark_type: LandmarkType = LandmarkType.LANDMARKS,
         camera_index: int = 0,
         disable_drum: bool = False,  # noqa: FBT001, FBT002
+        threaded_capture: bool = False,  # noqa: FBT001, FBT002
+        buffer_policy: Optional[BufferPolicy] = None,
+        buffer_capacity: Optional[int] = None,
+        region_of_interest: bool = False,  # noqa: FBT001, FBT002
+        latency_target_ms: Optional[float] = None,
+        inference_stride: int = 1,
+        inference_size: Optional[int] = None,
+        startup_timer: Optional[StartupTimer] = None,
+        publisher: Optional[LandmarkPublisher] = None,
+        process_result: bool = False,  # noqa: FBT001, FBT002
+        landmark_filter: Optional[LandmarkFilter] = None,
+        latency_compensator: Optional[LatencyCompensator] = None,
+        num_poses: int = 1,
     ) -> None:
         """
         Initialize the application
         :param model: The model to use for the pose estimation
         :param log_file: The file to log the landmarks to, if None no logging will be done
         :delegate: The delegate to use for the pose estimation, Either CPU or GPU
+        :param threaded_capture: Capture the frames on a separate thread, buffering them in a ring buffer
+        :param buffer_policy: What to do when the ring buffer is full,
+        if None the oldest frame of the camera is dropped and the capture of a file blocks
+        :param buffer_capacity: The number of frames in the ring buffer,
+        if None 2 for the camera and 8 for a file
+        :param region_of_interest: Only pass the region around the previous pose to the landmarker
+        :param latency_target_ms: Switch between models at runtime to stay within this latency,
+        if None the given model is always used
+        :param inference_stride: Only pass every n-th frame to the landmarker, extrapolating the others,
+        only supported with the VIDEO running mode
+        :param inference_size: Downscale the frames to this size before the pose estimation,
+        the display keeps the full resolution
+        :param startup_timer: Measures the startup phases, if None the timer starts when the app is created
+        :param publisher: Publish the landmarks and the hits to live consumers, if None nothing is published
+        :param process_result: Correct implausible landmarks with the result processor before they are tracked
+        :param landmark_filter: Smooth the landmarks before they are tracked, if None they are not smoothed
+        :param latency_compensator: Extrapolate the tracked landmarks over the inference latency,
+        if None the landmarks are tracked as detected
+        :param num_poses: The maximum number of persons to track, every person plays their own drum kit
         """
         self.model = model
+        startup_timer = startup_timer if startup_timer is not None else StartupTimer()
 
-        pygame.init()
-        # pygame.mixer.init(channels=8)
-
-        pygame.display.set_caption("DrumPy")
-        initial_window_size = (900, 900)
-        self.window_surface = pygame.display.set_mode(initial_window_size)
-        self.manager = UIManager(initial_window_size)
-
-        self.drum_trackers: Optional[DrumTrackers] = None
-        if not disable_drum:
-            self.drum_trackers = DrumTrackers()
-
-        self.media_pipe_pose = MediaPipePose(
-            running_mode=running_mode,  # type: ignore
-            model=model,
-            log_file=log_file,
-            delegate=delegate,  # type: ignore
-            landmark_type=landmark_type,
-            drum_trackers=self.drum_trackers,
+        with startup_timer.phase("window"):
+            pygame.init()
+            # pygame.mixer.init(channels=8)
+
+            pygame.display.set_caption("DrumPy")
+            initial_window_size = (900, 900)
+            self.window_surface = pygame.display.set_mode(initial_window_size)
+            self.manager = UIManager(initial_window_size)
+
+        # The sample files are read on a worker thread while the model is loaded, the camera
+        # and the sounds are created on the main thread, camera backends and SDL audio
+        # are not safe to initialize on other threads on every platform
+        with ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="startup"
+        ) as executor:
+            samples_future = (
+                executor.submit(self.read_samples, startup_timer)
+                if not disable_drum
+                else None
+            )
+
+            with startup_timer.phase("model"):
+                self.media_pipe_pose = MediaPipePose(
+                    running_mode=running_mode,  # type: ignore
+                    model=model,
+                    log_file=log_file,
+                    delegate=delegate,  # type: ignore
+                    landmark_type=landmark_type,
+                    region_of_interest=RegionOfInterest()
+                    if region_of_interest
+                    else None,
+                    adaptive_model=AdaptiveModelSelector(latency_target_ms, model)
+                    if latency_target_ms is not None
+                    else None,
+                    inference_stride=inference_stride,
+                    frame_scaler=FrameScaler(inference_size)
+                    if inference_size is not None
+                    else None,
+                    publisher=publisher,
+                    process_result=process_result,
+                    landmark_filter=landmark_filter,
+                    latency_compensator=latency_compensator,
+                    num_poses=num_poses,
+                )
+
+            with startup_timer.phase("warm-up"):
+                self.media_pipe_pose.warm_up()
+
+            if samples_future is not None:
+                samples_future.result()
+
+        # The drum trackers of every person, the first person plays drum_trackers
+        self.performers: list[DrumTrackers] = (
+            self.load_drum_trackers(startup_timer, num_poses)
+            if not disable_drum
+            else []
+        )
+        self.drum_trackers: Optional[DrumTrackers] = (
+            self.performers[0] if len(self.performers) > 0 else None
+        )
+        if num_poses > 1:
+            self.media_pipe_pose.performers = self.performers
+        else:
+            self.media_pipe_pose.drum_trackers = self.drum_trackers
+        if publisher is not None:
+            for performer, drum_trackers in enumerate(self.performers):
+                drum_trackers.drum.hit_listeners.append(
+                    publisher.hit_listener(performer)
+                )
+        self.video_source: VideoSource = self.open_video_source(
+            startup_timer,
+            source,
+            file_path,
+            camera_index,
+            threaded_capture,
+            buffer_policy,
+            buffer_capacity,
         )
 
         FPSDisplay(
@@ -66,13 +172,6 @@ class App:
             media_pipe_pose=self.media_pipe_pose,
         )
 
-        match source:
-            case Source.CAMERA:
-                self.video_source = CameraSource(camera_index=camera_index)
-            case Source.FILE:
-                assert file_path is not None, "File path must be provided"
-                self.video_source = VideoFileSource(file_path)
-
         self.fps = self.video_source.get_fps()
         self.video_display = VideoDisplay(
             video_source=self.video_source,
@@ -82,6 +181,66 @@ class App:
             source=source,
         )
 
+        print(startup_timer)
+
+    @staticmethod
+    def read_samples(startup_timer: StartupTimer) -> None:
+        """
+        Read the drum sample files into memory, runs on a startup thread
+        """
+        with startup_timer.phase("samples"):
+            preload_samples()
+
+    @staticmethod
+    def load_drum_trackers(
+        startup_timer: StartupTimer, num_poses: int
+    ) -> list[DrumTrackers]:
+        """
+        Create the sounds from the read samples and the trackers of every person, runs on the main thread
+        """
+        with startup_timer.phase("sounds"):
+            return [DrumTrackers() for _ in range(num_poses)]
+
+    @staticmethod
+    def open_video_source(
+        startup_timer: StartupTimer,
+        source: Source,
+        file_path: Optional[str],
+        camera_index: int,
+        threaded_capture: bool,  # noqa: FBT001
+        buffer_policy: Optional[BufferPolicy],
+        buffer_capacity: Optional[int],
+    ) -> VideoSource:
+        """
+        Open the camera or the video file, runs on the main thread
+        """
+        with startup_timer.phase("video source"):
+            video_source: VideoSource
+            match source:
+                case Source.CAMERA:
+                    video_source = CameraSource(camera_index=camera_index)
+                case Source.FILE:
+                    assert file_path is not None, "File path must be provided"
+                    video_source = VideoFileSource(file_path)
+
+            if not threaded_capture:
+                return video_source
+
+            match source:
+                case Source.CAMERA:
+                    # Keep the buffer short so the pose estimation gets the freshest frame
+                    default_policy, default_capacity = BufferPolicy.DROP_OLDEST, 2
+                case Source.FILE:
+                    default_policy, default_capacity = BufferPolicy.BLOCK, 8
+
+            return ThreadedVideoSource(
+                video_source,
+                buffer_policy if buffer_policy is not None else default_policy,
+                capacity=buffer_capacity
+                if buffer_capacity is not None
+                else default_capacity,
+            )
+
     def start(self: Self) -> None:
         clock = pygame.time.Clock()
         running = True
@@ -101,6 +260,12 @@ class App:
             pygame.display.update()
 
         self.video_source.release()
+        if isinstance(self.video_source, ThreadedVideoSource):
+            print(self.video_source)
+        if self.media_pipe_pose.csv_writer is not None:
+            self.media_pipe_pose.csv_writer.close()
+        if self.media_pipe_pose.publisher is not None:
+            self.media_pipe_pose.publisher.close()
         pygame.quit()
 
 
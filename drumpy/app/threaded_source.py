@@ -0,0 +1,253 @@
+import threading
+import time
+from enum import Enum
+from typing import Optional, Self
+
+from drumpy.app.frame_buffer import Frame
+from drumpy.app.video_source import VideoSource
+
+# A captured frame together with its timestamp in ms
+TimedFrame = tuple[Frame, int]
+
+
+class BufferPolicy(Enum):
+    """
+    What to do when the capture thread produces frames faster than they are consumed
+    DROP_OLDEST: Overwrite the oldest frame in the buffer and consume the newest frame, used for live sources
+    BLOCK: Wait until there is room in the buffer, used for files where every frame matters
+    """
+
+    DROP_OLDEST = 0
+    BLOCK = 1
+
+    @staticmethod
+    def from_str(policy: str) -> "BufferPolicy":
+        match policy.lower():
+            case "drop_oldest":
+                return BufferPolicy.DROP_OLDEST
+            case "block":
+                return BufferPolicy.BLOCK
+            case _:
+                raise ValueError(f"Invalid buffer policy: {policy}")
+
+
+class FrameRingBuffer:
+    """
+    Fixed-size, thread-safe ring buffer of frames between a producer and a consumer thread
+    """
+
+    def __init__(self, capacity: int, policy: BufferPolicy) -> None:
+        assert capacity > 0, "The capacity of the buffer should be positive"
+        self.capacity = capacity
+        self.policy = policy
+
+        self.slots: list[Optional[TimedFrame]] = [None] * capacity
+        self.head = 0  # The index of the oldest frame
+        self.size = 0
+
+        # The number of frames that were overwritten before they were consumed
+        self.dropped_frames = 0
+        # The largest number of frames that were waiting to be consumed at once
+        self.max_size = 0
+        self.closed = False
+        self.condition = threading.Condition()
+
+    def __len__(self: Self) -> int:
+        return self.size
+
+    def put(self: Self, frame: TimedFrame) -> Optional[TimedFrame]:
+        """
+        Add a frame to the buffer, depending on the policy the oldest frame is dropped
+        or the call blocks until a frame is consumed when the buffer is full
+        :return: The frame that is not kept, the dropped oldest frame or the given frame
+        if the buffer was closed while waiting, None if no frame was dropped
+        """
+        dropped: Optional[TimedFrame] = None
+        with self.condition:
+            if self.size == self.capacity:
+                match self.policy:
+                    case BufferPolicy.DROP_OLDEST:
+                        dropped = self.slots[self.head]
+                        self.slots[self.head] = None
+                        self.head = (self.head + 1) % self.capacity
+                        self.size -= 1
+                        self.dropped_frames += 1
+                    case BufferPolicy.BLOCK:
+                        self.condition.wait_for(
+                            lambda: self.size < self.capacity or self.closed
+                        )
+                        if self.closed:
+                            return frame
+
+            self.slots[(self.head + self.size) % self.capacity] = frame
+            self.size += 1
+            self.max_size = max(self.max_size, self.size)
+            self.condition.notify_all()
+        return dropped
+
+    def get(self: Self, *, block: bool) -> Optional[TimedFrame]:
+        """
+        Take the oldest frame from the buffer
+        :param block: Wait for a frame if the buffer is empty, until the buffer is closed
+        :return: The frame or None if there is no frame available
+        """
+        with self.condition:
+            if block:
+                self.condition.wait_for(lambda: self.size > 0 or self.closed)
+
+            if self.size == 0:
+                return None
+
+            frame = self.slots[self.head]
+            self.slots[self.head] = None
+            self.head = (self.head + 1) % self.capacity
+            self.size -= 1
+            self.condition.notify_all()
+            return frame
+
+    def get_newest(self: Self) -> tuple[Optional[TimedFrame], list[TimedFrame]]:
+        """
+        Take the newest frame from the buffer without waiting, the older frames are skipped and counted as dropped
+        :return: The newest frame or None if there is no frame available, and the skipped frames
+        """
+        with self.condition:
+            frames: list[TimedFrame] = []
+            while self.size > 0:
+                frame = self.slots[self.head]
+                assert frame is not None
+                frames.append(frame)
+                self.slots[self.head] = None
+                self.head = (self.head + 1) % self.capacity
+                self.size -= 1
+            self.dropped_frames += max(len(frames) - 1, 0)
+            self.condition.notify_all()
+        if len(frames) == 0:
+            return None, []
+        return frames[-1], frames[:-1]
+
+    def close(self: Self) -> None:
+        """
+        Wake up all waiting threads, no frames will be added anymore
+        """
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+class ThreadedVideoSource(VideoSource):
+    """
+    Wraps a video source and captures its frames on a separate producer thread.
+    The frames are kept in a bounded ring buffer, hiding capture and decode jitter from the
+    rendering and pose estimation loop.
+    Every frame holds a buffer of the frame pool until it is dropped or until the consumer is done with it,
+    so the capture never writes into a frame that is still buffered or being consumed.
+    """
+
+    def __init__(
+        self, source: VideoSource, policy: BufferPolicy, capacity: int = 4
+    ) -> None:
+        """
+        :param source: The video source to capture from
+        :param policy: What to do when the buffer is full, drop the oldest frame or block
+        :param capacity: The maximum number of frames in the buffer
+        """
+        super().__init__()
+        self.source = source
+        self.buffer = FrameRingBuffer(capacity, policy)
+
+        # Preallocate a buffer for every buffered frame, the frame being captured
+        # and the frame that is being consumed, so no buffer is allocated while capturing
+        self.source.frame_pool.reserve(capacity + 2)
+        self.frame_pool = self.source.frame_pool
+        self.copy_counter = self.source.copy_counter
+        self.timestamp_ms = 0
+
+        self.running = True
+        self.thread = threading.Thread(
+            target=self.capture, name="video-capture", daemon=True
+        )
+        self.thread.start()
+
+    @property
+    def queue_depth(self: Self) -> int:
+        """
+        The number of captured frames waiting to be consumed
+        """
+        return len(self.buffer)
+
+    @property
+    def max_queue_depth(self: Self) -> int:
+        """
+        The largest number of captured frames that were waiting to be consumed at once
+        """
+        return self.buffer.max_size
+
+    @property
+    def dropped_frames(self: Self) -> int:
+        """
+        The number of captured frames that were dropped before being consumed
+        """
+        return self.buffer.dropped_frames
+
+    def __str__(self: Self) -> str:
+        return (
+            f"Capture buffer: {self.buffer.policy.name.lower()}, "
+            f"max queue depth {self.max_queue_depth}/{self.buffer.capacity}, "
+            f"dropped frames {self.dropped_frames}"
+        )
+
+    def capture(self: Self) -> None:
+        """
+        Producer loop, runs on the capture thread
+        """
+        while self.running and not self.source.stopped:
+            frame = self.source.capture_frame()
+            if frame is None:
+                # No new frame from the camera yet, or the end of the file is reached
+                time.sleep(0.001)
+                continue
+
+            dropped = self.buffer.put((frame, self.source.get_timestamp_ms()))
+            if dropped is not None:
+                self.frame_pool.release(dropped[0])
+
+        self.buffer.close()
+
+    def get_fps(self: Self) -> float:
+        return self.source.get_fps()
+
+    def capture_frame(self: Self) -> Frame | None:
+        """
+        Take the next captured frame from the buffer
+        With the blocking policy this is the oldest frame and waits for the capture thread,
+        otherwise it is the newest frame, the older frames are handed back to the frame pool,
+        and None is returned if no frame is available
+        """
+        frame: Optional[TimedFrame]
+        if self.buffer.policy == BufferPolicy.BLOCK:
+            frame = self.buffer.get(block=True)
+        else:
+            frame, skipped = self.buffer.get_newest()
+            for image, _ in skipped:
+                self.frame_pool.release(image)
+        if frame is None:
+            self.stopped = self.buffer.closed and len(self.buffer) == 0
+            return None
+
+        image, self.timestamp_ms = frame
+        return image
+
+    def release(self: Self) -> None:
+        self.running = False
+        self.buffer.close()
+        self.thread.join()
+        self.source.release()
+
+    def get_size(self: Self) -> tuple[int, int]:
+        return self.source.get_size()
+
+    def get_timestamp_ms(self: Self) -> int:
+        """
+        Get the timestamp of the frame that was last returned by get_frame
+        """
+        return self.timestamp_ms
@@ -9,6 +9,8 @@ import pygame.transform
 import numpy.typing as npt
 from pygame import camera, surfarray, Surface
 
+from drumpy.app.frame_buffer import CopyCounter, Frame, FramePool
+
 
 class Source(IntEnum):
     """
@@ -36,6 +38,11 @@ class VideoSource(ABC):
 
     def __init__(self) -> None:
         self.stopped = False
+        # The frames are written into preallocated buffers, see get_frame
+        self.frame_pool: FramePool
+        # The frame returned by the last call to get_frame
+        self.current_frame: Frame | None = None
+        self.copy_counter = CopyCounter()
 
     @abstractmethod
     def get_fps(self: Self) -> float:
@@ -44,11 +51,24 @@ class VideoSource(ABC):
         :return: The frames per second
         """
 
-    @abstractmethod
-    def get_frame(self: Self) -> npt.NDArray[np.float32] | None:
+    def get_frame(self: Self) -> Frame | None:
         """
         Get the next frame from the video
-        :return: The frame and the timestamp
+        The frame is a buffer of the frame pool, it is released to the pool by the next call,
+        copy it if it needs to outlive the next call
+        :return: The frame or None if there is no new frame
+        """
+        if self.current_frame is not None:
+            self.frame_pool.release(self.current_frame)
+        self.current_frame = self.capture_frame()
+        return self.current_frame
+
+    @abstractmethod
+    def capture_frame(self: Self) -> Frame | None:
+        """
+        Capture the next frame into a buffer acquired from the frame pool,
+        the caller is responsible for releasing the buffer
+        :return: The frame or None if there is no new frame
         """
 
     @abstractmethod
@@ -94,6 +114,10 @@ class VideoFileSource(VideoSource):
         self.top_offset = (source_height - smallest) // 2
         self.stopped = False
 
+        # The decoded BGR frame, reused by every read
+        self.capture_buffer: npt.NDArray[np.uint8] | None = None
+        self.frame_pool = FramePool((smallest, smallest, 3))
+
     def get_fps(self: Self) -> float:
         """
         Get the frames per second of the video
@@ -101,22 +125,30 @@ class VideoFileSource(VideoSource):
         """
         return self.source_fps
 
-    def get_frame(self: Self) -> npt.NDArray[np.float32] | None:
+    def capture_frame(self: Self) -> Frame | None:
         """
-        Get the next frame from the video
-        :return: The frame and the timestamp
+        Decode the next frame from the video
+        :return: The frame or None at the end of the video
         """
-        ret, frame = self.cap.read()
-        if not ret:
+        ret, self.capture_buffer = self.cap.read(self.capture_buffer)  # type: ignore
+        if not ret or self.capture_buffer is None:
             self.stopped = True
             return None
 
-        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        # Crop the image to a square aspect ratio
-        return frame[  # type: ignore
-            self.top_offset : self.top_offset + self.size[1],
-            self.left_offset : self.left_offset + self.size[0],
-        ].copy()
+        # Crop the image to a square aspect ratio, the color conversion
+        # writes the cropped view straight into a preallocated frame
+        frame = self.frame_pool.acquire()
+        cv2.cvtColor(
+            self.capture_buffer[
+                self.top_offset : self.top_offset + self.size[1],
+                self.left_offset : self.left_offset + self.size[0],
+            ],
+            cv2.COLOR_BGR2RGB,
+            dst=frame,
+        )
+        self.copy_counter.add(frame.nbytes)
+        self.copy_counter.count_frame()
+        return frame
 
     def release(self: Self) -> None:
         """
@@ -139,6 +171,32 @@ class VideoFileSource(VideoSource):
         """
         return int(self.cap.get(cv2.CAP_PROP_POS_MSEC))
 
+    def get_frame_count(self: Self) -> int:
+        """
+        Get the total number of frames in the video, as reported by the container
+        This is an estimate for many containers, the video can have more or fewer frames
+        :return: The number of frames
+        """
+        return int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+    def get_frame_index(self: Self) -> int:
+        """
+        Get the index of the current frame, read back from the capture
+        :return: The zero based index of the frame returned by the last call to get_frame
+        """
+        return int(self.cap.get(cv2.CAP_PROP_POS_FRAMES)) - 1
+
+    def seek(self: Self, frame_index: int) -> int:
+        """
+        Move to the given frame, seeking is inexact for many codecs,
+        the capture can end up before or after the requested frame
+        :param frame_index: The zero based index of the frame
+        :return: The index of the frame the next call to get_frame returns, read back from the capture
+        """
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+        self.stopped = False
+        return int(self.cap.get(cv2.CAP_PROP_POS_FRAMES))
+
 
 class CameraSource(VideoSource):
     """
@@ -163,22 +221,37 @@ class CameraSource(VideoSource):
         self.left_offset = (original_size[0] - min_size) // 2
         self.top_offset = (original_size[1] - min_size) // 2
 
+        # The captured image, reused by every capture
+        self.capture_surface = Surface(original_size)
+        self.frame_pool = FramePool((min_size, min_size, 3))
+
     def get_fps(self: Self) -> float:
         """
         Return a default value of 60 fps for the camera
         """
         return 60
 
-    def get_frame(self: Self) -> npt.NDArray[np.float32] | None:
+    def capture_frame(self: Self) -> Frame | None:
         """
-        Get the next frame from the video
-        :return: The frame and the timestamp
+        Capture the next frame from the camera
+        :return: The frame or None if the camera has no new frame
         """
         if self.camera.query_image():
-            frame = Surface(self.size)
-            image = self.camera.get_image()
-            frame.blit(image, (0, 0), ((self.left_offset, self.top_offset), self.size))
-            return surfarray.array3d(frame)  # type: ignore
+            self.camera.get_image(self.capture_surface)
+            frame = self.frame_pool.acquire()
+            # The pixels are referenced, not copied, the surface is locked while the view exists
+            pixels = surfarray.pixels3d(self.capture_surface)
+            np.copyto(
+                frame,
+                pixels[
+                    self.left_offset : self.left_offset + self.size[0],
+                    self.top_offset : self.top_offset + self.size[1],
+                ],
+            )
+            del pixels
+            self.copy_counter.add(frame.nbytes)
+            self.copy_counter.count_frame()
+            return frame
 
         return None
 
@@ -0,0 +1,396 @@
+import math
+import zlib
+from collections.abc import Iterator
+from typing import BinaryIO, Self, TypeAlias
+
+import numpy as np
+import numpy.typing as npt
+
+from drumpy.pose.landmark_type import LandmarkType
+from drumpy.trajectory_file import TrajectoryFile
+from drumpy.util import LANDMARK_FIELDS, NUM_LANDMARKS, LandmarkArray
+
+MAGIC = b"DRUMPYTR"
+VERSION = 1
+
+# The header at the start of a binary trajectory file, 16 bytes
+HEADER_DTYPE = np.dtype(
+    [
+        ("magic", "S8"),
+        ("version", "<u2"),
+        ("landmark_type", "u1"),
+        ("reserved", "V5"),
+    ]
+)
+
+# A record for every frame, fixed width so frame n starts at HEADER_DTYPE.itemsize + n * RECORD_DTYPE.itemsize
+# The landmarks are stored like a LandmarkArray, missing visibility or presence values are NaN
+RECORD_DTYPE = np.dtype(
+    [
+        ("frame", "<i8"),
+        ("time", "<i8"),
+        ("landmarks", "<f4", (NUM_LANDMARKS, LANDMARK_FIELDS)),
+    ]
+)
+
+# The record of a file with both landmark types, the normalized and the world landmarks of a frame are stored
+# next to each other, so a frame is still written at once
+BOTH_RECORD_DTYPE = np.dtype(
+    [
+        ("frame", "<i8"),
+        ("time", "<i8"),
+        ("landmarks", "<f4", (2, NUM_LANDMARKS, LANDMARK_FIELDS)),
+    ]
+)
+
+TrajectoryRecords: TypeAlias = npt.NDArray[np.void]
+
+COMPRESSED_MAGIC = b"DRUMPYTZ"
+
+# The fixed point step of the landmark values in a compressed file
+QUANTIZATION_STEP = 2**-16
+# Missing visibility or presence values are stored as the smallest 32-bit integer
+QUANTIZED_NAN = np.iinfo(np.int32).min
+# The range of the quantized values, values outside of it are clipped
+QUANTIZED_MIN = QUANTIZED_NAN + 1
+QUANTIZED_MAX = np.iinfo(np.int32).max
+
+# Precedes every chunk of a compressed file: the number of frames and the size of the compressed data
+CHUNK_HEADER_DTYPE = np.dtype([("frames", "<u4"), ("size", "<u4")])
+
+
+def record_dtype(landmark_type: LandmarkType) -> np.dtype[np.void]:
+    """
+    The record of a frame in a file with landmarks of the given type
+    """
+    return BOTH_RECORD_DTYPE if landmark_type == LandmarkType.BOTH else RECORD_DTYPE
+
+
+class BinaryTrajectoryFile:
+    """
+    Class to write the captured data to a binary file, one fixed width record per frame.
+    Every frame is written with a single write of the record, without any formatting,
+    the file is about a fifth of the size of the CSV file.
+    """
+
+    def __init__(self, path: str, landmark_type: LandmarkType) -> None:
+        """
+        :param path: The path of the file to write
+        :param landmark_type: The type of the landmarks in the file, every frame should be of this type
+        """
+        self.landmark_type = landmark_type
+        self.file = open(path, "wb")  # noqa: SIM115
+
+        write_header(self.file, MAGIC, landmark_type)
+
+        # The record of the current frame, reused for every frame
+        self.record = np.zeros(1, dtype=record_dtype(landmark_type))
+
+    def write_frame(
+        self: Self,
+        frame: int,
+        time: int,
+        landmarks: LandmarkArray,
+        landmark_type: LandmarkType,
+    ) -> None:
+        """
+        Write all landmarks of a frame as a single record
+        :param landmarks: The landmarks as an array of shape (33, 5), or (2, 33, 5) for both landmark types
+        """
+        assert landmark_type == self.landmark_type, "Unexpected landmark type"
+        record = self.record[0]
+        record["frame"] = frame
+        record["time"] = time
+        record["landmarks"] = landmarks
+        self.file.write(self.record.data)
+
+    def write_frames(
+        self: Self,
+        frames: list[tuple[int, int, LandmarkArray]],
+        landmark_type: LandmarkType,
+    ) -> None:
+        """
+        Write the landmarks of multiple frames with a single write
+        :param frames: The frame number, the timestamp and the landmarks of every frame
+        """
+        assert landmark_type == self.landmark_type, "Unexpected landmark type"
+        records = np.empty(len(frames), dtype=self.record.dtype)
+        for i, (frame, time, landmarks) in enumerate(frames):
+            records["frame"][i] = frame
+            records["time"][i] = time
+            records["landmarks"][i] = landmarks
+        self.file.write(records.data)
+
+    def flush(self: Self) -> None:
+        self.file.flush()
+
+    def close(self: Self) -> None:
+        self.file.flush()
+        self.file.close()
+
+
+def write_header(file: BinaryIO, magic: bytes, landmark_type: LandmarkType) -> None:
+    header = np.zeros((), dtype=HEADER_DTYPE)
+    header["magic"] = magic
+    header["version"] = VERSION
+    header["landmark_type"] = landmark_type.value
+    file.write(header.tobytes())
+
+
+def read_header(file: BinaryIO, magic: bytes = MAGIC) -> LandmarkType:
+    """
+    Read and validate the header of a binary trajectory file, the file is left positioned at the first record
+    :param magic: The magic bytes of the expected format, raw or compressed
+    :return: The type of the landmarks in the file
+    """
+    data = file.read(HEADER_DTYPE.itemsize)
+    if len(data) < HEADER_DTYPE.itemsize:
+        raise ValueError("The file is too short to be a binary trajectory file")
+
+    header = np.frombuffer(data, dtype=HEADER_DTYPE)[0]
+    if header["magic"] != magic:
+        raise ValueError(
+            "The file is not a binary trajectory file of the expected format"
+        )
+    if header["version"] != VERSION:
+        raise ValueError(f"Unsupported binary trajectory version: {header['version']}")
+    return LandmarkType(int(header["landmark_type"]))
+
+
+def read_records(
+    path: str, chunk_size: int = 4096
+) -> Iterator[tuple[LandmarkType, TrajectoryRecords]]:
+    """
+    Read the records of a binary trajectory file in chunks, without loading the whole file
+    Compressed files are decoded chunk by chunk, in the chunks they were written in
+    :param chunk_size: The maximum number of records in a chunk of a raw binary file
+    :return: The landmark type of the file and an array of records with its record_dtype, for every chunk
+    """
+    with open(path, "rb") as file:
+        if file.read(len(COMPRESSED_MAGIC)) == COMPRESSED_MAGIC:
+            file.seek(0)
+            yield from read_compressed_records(file)
+            return
+
+        file.seek(0)
+        landmark_type = read_header(file)
+        dtype = record_dtype(landmark_type)
+        while True:
+            records = np.fromfile(file, dtype=dtype, count=chunk_size)
+            if len(records) == 0:
+                return
+            yield landmark_type, records
+
+
+class CompressedTrajectoryFile:
+    """
+    Class to write the captured data to a compressed binary file, for archiving long recordings.
+    The frames are collected in chunks, every chunk is encoded and compressed independently:
+    - The landmark values are quantized to fixed point with QUANTIZATION_STEP,
+      the decoded values differ at most QUANTIZATION_STEP / 2 (about 7.6e-6) from the written float32 values,
+      for values in the range of +-256. Values outside of +-32768, like a glitch of the world landmarks,
+      are clipped to that range and counted in clipped_values.
+    - Every value is stored as the difference with the same value in the previous frame of the chunk,
+      consecutive frames barely differ so most differences are small numbers.
+    - The bytes of the differences are shuffled, so all first bytes come first, then all second bytes and so on,
+      grouping the bytes that are mostly zero.
+    - The chunk is compressed with zlib.
+    The file can be decoded chunk by chunk with read_records, without decompressing the whole file.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        landmark_type: LandmarkType,
+        chunk_frames: int = 1024,
+        level: int = 1,
+    ) -> None:
+        """
+        :param path: The path of the file to write
+        :param landmark_type: The type of the landmarks in the file, every frame should be of this type
+        :param chunk_frames: The number of frames in a chunk, larger chunks compress better
+        :param level: The zlib compression level, from 1 (fastest) to 9 (smallest)
+        """
+        self.landmark_type = landmark_type
+        self.chunk_frames = chunk_frames
+        self.level = level
+        self.file = open(path, "wb")  # noqa: SIM115
+        write_header(self.file, COMPRESSED_MAGIC, landmark_type)
+
+        # The frames of the chunk that is being collected
+        self.records = np.empty(chunk_frames, dtype=record_dtype(landmark_type))
+        self.size = 0
+        # The number of landmark values that were out of range and stored clipped
+        self.clipped_values = 0
+
+    def write_frame(
+        self: Self,
+        frame: int,
+        time: int,
+        landmarks: LandmarkArray,
+        landmark_type: LandmarkType,
+    ) -> None:
+        """
+        Add the landmarks of a frame to the current chunk, the chunk is written once it is full
+        :param landmarks: The landmarks as an array of shape (33, 5), or (2, 33, 5) for both landmark types
+        """
+        assert landmark_type == self.landmark_type, "Unexpected landmark type"
+        record = self.records[self.size]
+        record["frame"] = frame
+        record["time"] = time
+        record["landmarks"] = landmarks
+        self.size += 1
+        if self.size == self.chunk_frames:
+            self.write_chunk()
+
+    def write_frames(
+        self: Self,
+        frames: list[tuple[int, int, LandmarkArray]],
+        landmark_type: LandmarkType,
+    ) -> None:
+        for frame, time, landmarks in frames:
+            self.write_frame(frame, time, landmarks, landmark_type)
+
+    def write_chunk(self: Self) -> None:
+        if self.size == 0:
+            return
+
+        chunk, clipped_values = encode_chunk(self.records[: self.size], self.level)
+        self.file.write(chunk)
+        self.clipped_values += clipped_values
+        self.size = 0
+
+    def flush(self: Self) -> None:
+        """
+        Flush the written chunks, the frames of the current chunk stay buffered so the chunks stay large
+        """
+        self.file.flush()
+
+    def close(self: Self) -> None:
+        self.write_chunk()
+        self.file.flush()
+        self.file.close()
+        if self.clipped_values > 0:
+            print(
+                f"Clipped {self.clipped_values} landmark values outside of the range of the compressed format"
+            )
+
+
+def shuffle_bytes(values: npt.NDArray[np.integer]) -> bytes:
+    """
+    Reorder the bytes of the values, all first bytes first, then all second bytes and so on
+    """
+    return values.view(np.uint8).reshape(-1, values.itemsize).T.tobytes()
+
+
+def unshuffle_bytes(
+    data: bytes, dtype: np.dtype[np.integer], count: int
+) -> npt.NDArray[np.integer]:
+    """
+    Undo shuffle_bytes for count values of the given type
+    """
+    shuffled = np.frombuffer(data, dtype=np.uint8).reshape(dtype.itemsize, count)
+    return shuffled.T.copy().view(dtype).reshape(count)
+
+
+def encode_chunk(records: TrajectoryRecords, level: int) -> tuple[bytes, int]:
+    """
+    Quantize, delta code, shuffle and compress a chunk of records
+    Values outside of the range of the quantized values are clipped, they would wrap around otherwise
+    :return: The chunk header followed by the compressed chunk, and the number of clipped values
+    """
+    values = np.rint(records["landmarks"].astype(np.float64) / QUANTIZATION_STEP)
+    missing = np.isnan(values)
+    values[missing] = 0
+    out_of_range = (values < QUANTIZED_MIN) | (values > QUANTIZED_MAX)
+    quantized = np.clip(values, QUANTIZED_MIN, QUANTIZED_MAX).astype(np.int32)
+    quantized[missing] = QUANTIZED_NAN
+
+    # The first frame of a chunk is stored as is, so every chunk can be decoded on its own
+    # The differences wrap around on overflow, the cumulative sum when decoding wraps back
+    landmark_deltas = np.diff(quantized, axis=0, prepend=np.int32(0))
+    frame_deltas = np.diff(records["frame"], prepend=np.int64(0))
+    time_deltas = np.diff(records["time"], prepend=np.int64(0))
+
+    payload = zlib.compress(
+        shuffle_bytes(frame_deltas)
+        + shuffle_bytes(time_deltas)
+        + shuffle_bytes(landmark_deltas.reshape(-1)),
+        level,
+    )
+    chunk_header = np.array([(len(records), len(payload))], dtype=CHUNK_HEADER_DTYPE)
+    return chunk_header.tobytes() + payload, int(np.count_nonzero(out_of_range))
+
+
+def decode_chunk(
+    data: bytes, count: int, dtype: np.dtype[np.void] = RECORD_DTYPE
+) -> TrajectoryRecords:
+    """
+    Decompress and decode a chunk of count records, written by encode_chunk
+    :param dtype: The record of the file, see record_dtype
+    """
+    payload = zlib.decompress(data)
+    shape = dtype["landmarks"].shape
+    frames_end = count * 8
+    times_end = frames_end + count * 8
+
+    records = np.empty(count, dtype=dtype)
+    records["frame"] = np.cumsum(
+        unshuffle_bytes(payload[:frames_end], np.dtype("<i8"), count)
+    )
+    records["time"] = np.cumsum(
+        unshuffle_bytes(payload[frames_end:times_end], np.dtype("<i8"), count)
+    )
+
+    landmark_deltas = unshuffle_bytes(
+        payload[times_end:], np.dtype("<i4"), count * math.prod(shape)
+    ).reshape(count, *shape)
+    quantized = np.cumsum(landmark_deltas, axis=0, dtype=np.int32)
+    landmarks = quantized.astype(np.float32) * np.float32(QUANTIZATION_STEP)
+    landmarks[quantized == QUANTIZED_NAN] = np.nan
+    records["landmarks"] = landmarks
+    return records
+
+
+def read_compressed_records(
+    file: BinaryIO,
+) -> Iterator[tuple[LandmarkType, TrajectoryRecords]]:
+    """
+    Decode the chunks of a compressed trajectory file one at a time
+    :return: The landmark type of the file and an array of records with its record_dtype, for every chunk
+    """
+    landmark_type = read_header(file, COMPRESSED_MAGIC)
+    dtype = record_dtype(landmark_type)
+    while len(data := file.read(CHUNK_HEADER_DTYPE.itemsize)) > 0:
+        if len(data) < CHUNK_HEADER_DTYPE.itemsize:
+            raise ValueError("The compressed trajectory file ends in a partial chunk")
+
+        chunk_header = np.frombuffer(data, dtype=CHUNK_HEADER_DTYPE)[0]
+        payload = file.read(int(chunk_header["size"]))
+        if len(payload) < chunk_header["size"]:
+            raise ValueError("The compressed trajectory file ends in a partial chunk")
+
+        yield (
+            landmark_type,
+            decode_chunk(payload, int(chunk_header["frames"]), dtype),
+        )
+
+
+def convert_to_csv(binary_path: str, csv_path: str) -> int:
+    """
+    Convert a binary trajectory file, raw or compressed, to a CSV file with the schema of TrajectoryFile
+    :return: The number of frames converted
+    """
+    csv_file = TrajectoryFile(csv_path)
+    frames = 0
+    for landmark_type, records in read_records(binary_path):
+        for record in records:
+            csv_file.write_frame(
+                int(record["frame"]),
+                int(record["time"]),
+                record["landmarks"],
+                landmark_type,
+            )
+        frames += len(records)
+    csv_file.close()
+    return frames
@@ -1,13 +1,25 @@
+from pathlib import Path
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Optional
+
 import click
-from mediapipe.tasks.python import BaseOptions
-from mediapipe.tasks.python.vision import RunningMode
+from click.core import ParameterSource
 
-from drumpy.app.main import App
-from drumpy.app.video_source import Source
+from drumpy.pose.landmark_type import LandmarkType
 from drumpy.pose.landmarker_model import LandmarkerModel
+from drumpy.startup_timer import StartupTimer
+
+# mediapipe, pygame and cv2 are slow to import, they are only imported by the command that needs them
+if TYPE_CHECKING:
+    from mediapipe.tasks.python import BaseOptions
+    from mediapipe.tasks.python.vision import RunningMode
+
+    from drumpy.pose.landmark_filter import LandmarkFilter
 
 
-def parse_running_mode(mode: str) -> RunningMode:
+def parse_running_mode(mode: str) -> "RunningMode":
+    from mediapipe.tasks.python.vision import RunningMode  # noqa: PLC0415
+
     match mode.lower():
         case "live_stream":
             return RunningMode.LIVE_STREAM
@@ -29,7 +41,41 @@ def parse_model(model: str) -> LandmarkerModel:
             raise ValueError(f"Invalid model: {model}")
 
 
-def parse_delegate(delegate: str) -> BaseOptions.Delegate:
+def parse_landmark_type(landmark_type: str) -> LandmarkType:
+    match landmark_type.lower():
+        case "landmarks":
+            return LandmarkType.LANDMARKS
+        case "world_landmarks":
+            return LandmarkType.WORLD_LANDMARKS
+        case "both":
+            return LandmarkType.BOTH
+        case _:
+            raise ValueError(f"Invalid landmark type: {landmark_type}")
+
+
+def parse_filter(
+    filter_type: str,
+    min_cutoff: float,
+    beta: float,
+    d_cutoff: float,
+    process_noise: float,
+    measurement_noise: float,
+) -> "Optional[LandmarkFilter]":
+    from drumpy.pose.landmark_filter import FilterType, create_filter  # noqa: PLC0415
+
+    return create_filter(
+        FilterType.from_str(filter_type),
+        min_cutoff=min_cutoff,
+        beta=beta,
+        d_cutoff=d_cutoff,
+        process_noise=process_noise,
+        measurement_noise=measurement_noise,
+    )
+
+
+def parse_delegate(delegate: str) -> "BaseOptions.Delegate":
+    from mediapipe.tasks.python import BaseOptions  # noqa: PLC0415
+
     match delegate.lower():
         case "cpu":
             return BaseOptions.Delegate.CPU
@@ -39,7 +85,57 @@ def parse_delegate(delegate: str) -> BaseOptions.Delegate:
             raise ValueError(f"Invalid delegate: {delegate}")
 
 
-@click.command()
+def filter_parameter_options(command: Callable) -> Callable:
+    """
+    Add the options that configure the One Euro and Kalman filters to a command
+    """
+    command = click.option(
+        "--measurement-noise",
+        type=float,
+        default=2.5e-5,
+        help="Kalman filter: variance of a detected coordinate",
+    )(command)
+    command = click.option(
+        "--process-noise",
+        type=float,
+        default=1.0,
+        help="Kalman filter: spectral density of the acceleration",
+    )(command)
+    command = click.option(
+        "--d-cutoff",
+        type=float,
+        default=1.0,
+        help="One Euro filter: cutoff frequency of the speed estimate, in Hz",
+    )(command)
+    command = click.option(
+        "--beta",
+        type=float,
+        default=50.0,
+        help="One Euro filter: increase of the cutoff frequency with the speed",
+    )(command)
+    return click.option(
+        "--min-cutoff",
+        type=float,
+        default=1.0,
+        help="One Euro filter: cutoff frequency of a landmark at rest, in Hz",
+    )(command)
+
+
+def filter_options(command: Callable) -> Callable:
+    """
+    Add the option to choose a landmark filter and the options that configure it to a command
+    """
+    command = filter_parameter_options(command)
+    return click.option(
+        "--filter",
+        "filter_type",
+        type=click.Choice(["none", "one-euro", "kalman"], case_sensitive=False),
+        default="none",
+        help="Filter to smooth the landmarks with before tracking",
+    )(command)
+
+
+@click.group(invoke_without_command=True)
 @click.option(
     "--source",
     type=click.Choice(["camera", "file"], case_sensitive=False),
@@ -68,15 +164,151 @@ def parse_delegate(delegate: str) -> BaseOptions.Delegate:
     help="Delegate to use for pose estimation",
 )
 @click.option("--camera-index", type=int, default=0, help="Index of the camera to use")
-def cli(
+@click.option(
+    "--threaded-capture",
+    is_flag=True,
+    help="Capture frames on a separate thread, buffering them in a ring buffer",
+)
+@click.option(
+    "--buffer-policy",
+    type=click.Choice(["drop_oldest", "block"], case_sensitive=False),
+    help="What to do when the capture buffer is full, defaults to drop_oldest for the camera and block for a file",
+)
+@click.option(
+    "--buffer-capacity",
+    type=int,
+    help="Number of frames in the capture buffer, defaults to 2 for the camera and 8 for a file",
+)
+@click.option(
+    "--roi",
+    is_flag=True,
+    help="Only pass the region around the previous pose to the pose estimation",
+)
+@click.option(
+    "--latency-target",
+    type=float,
+    help="Switch between models at runtime to stay within this latency, in ms",
+)
+@click.option(
+    "--inference-stride",
+    type=int,
+    default=1,
+    help="Only estimate the pose of every n-th frame, extrapolating the others, requires the blocking running mode",
+)
+@click.option(
+    "--inference-size",
+    type=int,
+    help="Downscale frames to this size in pixels before the pose estimation",
+)
+@click.option(
+    "--process-result",
+    is_flag=True,
+    help="Correct implausible landmarks with the result processor before tracking",
+)
+@filter_options
+@click.option(
+    "--num-poses",
+    type=int,
+    default=1,
+    help="Maximum number of persons to track, every person plays their own drum kit",
+)
+@click.option(
+    "--compensate-latency",
+    is_flag=True,
+    help="Extrapolate the tracked landmarks over the measured inference latency",
+)
+@click.option(
+    "--max-compensation",
+    type=float,
+    default=50.0,
+    help="Longest time the landmarks are extrapolated over, in ms",
+)
+@click.option(
+    "--max-extrapolation",
+    type=float,
+    default=0.05,
+    help="Longest distance a landmark is moved by the latency compensation",
+)
+@click.option(
+    "--publish-udp",
+    type=int,
+    help="Publish the landmarks and hits as UDP datagrams to this port",
+)
+@click.option(
+    "--publish-host",
+    type=str,
+    default="127.0.0.1",
+    help="Host to publish the UDP datagrams to",
+)
+@click.option(
+    "--publish-shm",
+    type=str,
+    help="Publish the landmarks and hits to a shared memory ring with this name",
+)
+@click.option(
+    "--landmark-type",
+    type=click.Choice(["landmarks", "world_landmarks", "both"], case_sensitive=False),
+    default="landmarks",
+    help="Type of landmarks to publish, normalized, world coordinates or both",
+)
+@click.pass_context
+def cli(  # noqa: PLR0913, PLR0917
+    ctx: click.Context,
     source: str,
     file: str | None,
     running_mode: str,
     model: str,
     delegate: str,
     camera_index: int,
+    threaded_capture: bool,  # noqa: FBT001
+    buffer_policy: str | None,
+    buffer_capacity: int | None,
+    roi: bool,  # noqa: FBT001
+    latency_target: float | None,
+    inference_stride: int,
+    inference_size: int | None,
+    process_result: bool,  # noqa: FBT001
+    filter_type: str,
+    min_cutoff: float,
+    beta: float,
+    d_cutoff: float,
+    process_noise: float,
+    measurement_noise: float,
+    num_poses: int,
+    compensate_latency: bool,  # noqa: FBT001
+    max_compensation: float,
+    max_extrapolation: float,
+    publish_udp: int | None,
+    publish_host: str,
+    publish_shm: str | None,
+    landmark_type: str,
 ):
+    if ctx.invoked_subcommand is not None:
+        # The options of the live app are not passed to the commands, reject them instead of ignoring them
+        given = [
+            param.opts[0]
+            for param in ctx.command.params
+            if param.name is not None
+            and ctx.get_parameter_source(param.name)
+            not in {ParameterSource.DEFAULT, ParameterSource.DEFAULT_MAP}
+        ]
+        if len(given) > 0:
+            raise click.UsageError(
+                f"{', '.join(given)} cannot be used with the {ctx.invoked_subcommand} command, "
+                "pass the options of the command after its name"
+            )
+        return
+    if inference_stride > 1 and running_mode.lower() != "blocking":
+        raise click.UsageError("--inference-stride requires --running-mode blocking")
+
     print("Starting Drumpy...")
+    startup_timer = StartupTimer()
+    with startup_timer.phase("imports"):
+        from drumpy.app.main import App  # noqa: PLC0415
+        from drumpy.app.threaded_source import BufferPolicy  # noqa: PLC0415
+        from drumpy.app.video_source import Source  # noqa: PLC0415
+        from drumpy.landmark_publisher import create_publisher  # noqa: PLC0415
+        from drumpy.pose.latency_compensator import LatencyCompensator  # noqa: PLC0415
 
     print(f"Using source: {source}")
     source = Source.from_str(source)
@@ -103,9 +335,395 @@ def cli(
         model=model,
         delegate=delegate,
         camera_index=camera_index,
+        threaded_capture=threaded_capture,
+        buffer_policy=BufferPolicy.from_str(buffer_policy)
+        if buffer_policy is not None
+        else None,
+        buffer_capacity=buffer_capacity,
+        region_of_interest=roi,
+        latency_target_ms=latency_target,
+        inference_stride=inference_stride,
+        inference_size=inference_size,
+        startup_timer=startup_timer,
+        publisher=create_publisher(
+            publish_udp, publish_host, publish_shm, parse_landmark_type(landmark_type)
+        ),
+        process_result=process_result,
+        landmark_filter=parse_filter(
+            filter_type, min_cutoff, beta, d_cutoff, process_noise, measurement_noise
+        ),
+        latency_compensator=LatencyCompensator(max_compensation, max_extrapolation)
+        if compensate_latency
+        else None,
+        num_poses=num_poses,
     )
     app.start()
 
 
+@cli.command()
+@click.argument("file", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--model",
+    type=click.Choice(["lite", "full", "heavy"], case_sensitive=False),
+    default="full",
+    help="Model to use for pose estimation",
+)
+@click.option(
+    "--delegate",
+    type=click.Choice(["cpu", "gpu"], case_sensitive=False),
+    default="cpu",
+    help="Delegate to use for pose estimation",
+)
+@click.option(
+    "--log-file",
+    type=str,
+    help="Path to the file to log the landmarks to, binary if it ends with .trajectory",
+)
+@click.option(
+    "--landmark-type",
+    type=click.Choice(["landmarks", "world_landmarks", "both"], case_sensitive=False),
+    default="landmarks",
+    help="Type of landmarks to log and publish, normalized, world coordinates or both",
+)
+@click.option(
+    "--disable-drum", is_flag=True, help="Only run the pose estimation, no drum"
+)
+@click.option(
+    "--threaded-capture",
+    is_flag=True,
+    help="Decode frames on a separate thread, overlapping decoding and inference",
+)
+@click.option(
+    "--buffer-policy",
+    type=click.Choice(["drop_oldest", "block"], case_sensitive=False),
+    default="block",
+    help="What to do when the capture buffer is full",
+)
+@click.option(
+    "--buffer-capacity",
+    type=int,
+    default=8,
+    help="Number of frames in the capture buffer",
+)
+@click.option(
+    "--roi",
+    is_flag=True,
+    help="Only pass the region around the previous pose to the pose estimation",
+)
+@click.option(
+    "--latency-target",
+    type=float,
+    help="Switch between models at runtime to stay within this latency, in ms",
+)
+@click.option(
+    "--inference-stride",
+    type=int,
+    default=1,
+    help="Only estimate the pose of every n-th frame, extrapolating the others",
+)
+@click.option(
+    "--inference-size",
+    type=int,
+    help="Downscale frames to this size in pixels before the pose estimation",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Always run the pose estimation, without the landmark cache",
+)
+@click.option(
+    "--cache-dir",
+    type=click.Path(file_okay=False),
+    help="Directory of the landmark cache, defaults to ~/.cache/drumpy/landmarks",
+)
+@click.option(
+    "--cache-size",
+    type=int,
+    default=1024,
+    help="Maximum size of the landmark cache, in MB",
+)
+@click.option(
+    "--process-result",
+    is_flag=True,
+    help="Correct implausible landmarks with the result processor before tracking",
+)
+@filter_options
+@click.option(
+    "--num-poses",
+    type=int,
+    default=1,
+    help="Maximum number of persons to track, every person plays their own drum kit",
+)
+@click.option(
+    "--publish-udp",
+    type=int,
+    help="Publish the landmarks and hits as UDP datagrams to this port",
+)
+@click.option(
+    "--publish-host",
+    type=str,
+    default="127.0.0.1",
+    help="Host to publish the UDP datagrams to",
+)
+@click.option(
+    "--publish-shm",
+    type=str,
+    help="Publish the landmarks and hits to a shared memory ring with this name",
+)
+def process(  # noqa: PLR0913, PLR0917
+    file: str,
+    model: str,
+    delegate: str,
+    log_file: str | None,
+    landmark_type: str,
+    disable_drum: bool,  # noqa: FBT001
+    threaded_capture: bool,  # noqa: FBT001
+    buffer_policy: str,
+    buffer_capacity: int,
+    roi: bool,  # noqa: FBT001
+    latency_target: float | None,
+    inference_stride: int,
+    inference_size: int | None,
+    no_cache: bool,  # noqa: FBT001
+    cache_dir: str | None,
+    cache_size: int,
+    process_result: bool,  # noqa: FBT001
+    filter_type: str,
+    min_cutoff: float,
+    beta: float,
+    d_cutoff: float,
+    process_noise: float,
+    measurement_noise: float,
+    num_poses: int,
+    publish_udp: int | None,
+    publish_host: str,
+    publish_shm: str | None,
+):
+    """
+    Process a video file without a window, as fast as possible
+    """
+    from drumpy.offline.landmark_cache import (  # noqa: PLC0415
+        DEFAULT_CACHE_DIRECTORY,
+        LandmarkCache,
+    )
+    from drumpy.app.threaded_source import BufferPolicy  # noqa: PLC0415
+    from drumpy.landmark_publisher import create_publisher  # noqa: PLC0415
+    from drumpy.offline.pipeline import HeadlessPipeline  # noqa: PLC0415
+
+    print(f"Processing file: {file}")
+
+    print(f"Using model: {model}")
+    model = parse_model(model)
+
+    print(f"Using delegate: {delegate}")
+    delegate = parse_delegate(delegate)
+
+    landmark_type = parse_landmark_type(landmark_type)
+    pipeline = HeadlessPipeline(
+        file_path=file,
+        model=model,
+        delegate=delegate,
+        log_file=log_file,
+        landmark_type=landmark_type,
+        disable_drum=disable_drum,
+        threaded_capture=threaded_capture,
+        buffer_policy=BufferPolicy.from_str(buffer_policy),
+        buffer_capacity=buffer_capacity,
+        region_of_interest=roi,
+        latency_target_ms=latency_target,
+        inference_stride=inference_stride,
+        inference_size=inference_size,
+        cache=LandmarkCache(
+            Path(cache_dir) if cache_dir is not None else DEFAULT_CACHE_DIRECTORY,
+            cache_size * 1024**2,
+        )
+        if not no_cache
+        else None,
+        process_result=process_result,
+        landmark_filter=parse_filter(
+            filter_type, min_cutoff, beta, d_cutoff, process_noise, measurement_noise
+        ),
+        num_poses=num_poses,
+        publisher=create_publisher(
+            publish_udp, publish_host, publish_shm, landmark_type
+        ),
+    )
+    report = pipeline.run()
+    print(report)
+
+
+@cli.command()
+@click.argument("file", type=click.Path(exists=True, dir_okay=False))
+@click.argument("log_file", type=click.Path(dir_okay=False))
+@click.option(
+    "--model",
+    type=click.Choice(["lite", "full", "heavy"], case_sensitive=False),
+    default="full",
+    help="Model to use for pose estimation",
+)
+@click.option(
+    "--delegate",
+    type=click.Choice(["cpu", "gpu"], case_sensitive=False),
+    default="cpu",
+    help="Delegate to use for pose estimation",
+)
+@click.option(
+    "--landmark-type",
+    type=click.Choice(["landmarks", "world_landmarks", "both"], case_sensitive=False),
+    default="landmarks",
+    help="Type of landmarks to log, normalized, world coordinates or both",
+)
+@click.option(
+    "--workers", type=int, help="Number of worker processes, defaults to the cores"
+)
+@click.option(
+    "--overlap",
+    type=int,
+    default=30,
+    help="Number of warm-up frames processed before every segment",
+)
+def process_parallel(
+    file: str,
+    log_file: str,
+    model: str,
+    delegate: str,
+    landmark_type: str,
+    workers: int | None,
+    overlap: int,
+):
+    """
+    Split a video file in segments and log the landmarks using a pool of processes
+    """
+    from drumpy.offline.parallel import ParallelProcessor  # noqa: PLC0415
+
+    print(f"Processing file: {file}")
+
+    print(f"Using model: {model}")
+    model = parse_model(model)
+
+    print(f"Using delegate: {delegate}")
+    delegate = parse_delegate(delegate)
+
+    processor = ParallelProcessor(
+        file_path=file,
+        log_file=log_file,
+        model=model,
+        delegate=delegate,
+        landmark_type=parse_landmark_type(landmark_type),
+        workers=workers,
+        overlap=overlap,
+    )
+    processor.run()
+
+
+@cli.command()
+@click.argument("file", type=click.Path(exists=True, dir_okay=False))
+@click.argument("csv_file", type=click.Path(dir_okay=False))
+def convert(file: str, csv_file: str):
+    """
+    Convert a binary trajectory file to CSV
+    """
+    from drumpy.binary_trajectory_file import convert_to_csv  # noqa: PLC0415
+
+    frames = convert_to_csv(file, csv_file)
+    print(f"Converted {frames} frames to {csv_file}")
+
+
+@cli.command()
+@click.argument("file", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--real-time",
+    is_flag=True,
+    help="Replay at the speed of the recording and play the sounds",
+)
+@click.option(
+    "--process-result",
+    is_flag=True,
+    help="Pass the landmarks through the result processor before the trackers",
+)
+@filter_options
+def replay(
+    file: str,
+    real_time: bool,  # noqa: FBT001
+    process_result: bool,  # noqa: FBT001
+    filter_type: str,
+    min_cutoff: float,
+    beta: float,
+    d_cutoff: float,
+    process_noise: float,
+    measurement_noise: float,
+):
+    """
+    Replay a recorded trajectory file into the drum trackers, without pose estimation
+    """
+    from drumpy.offline.replay import TrajectoryReplay  # noqa: PLC0415
+
+    print(f"Replaying file: {file}")
+    replay = TrajectoryReplay(
+        file_path=file,
+        real_time=real_time,
+        process_result=process_result,
+        landmark_filter=parse_filter(
+            filter_type, min_cutoff, beta, d_cutoff, process_noise, measurement_noise
+        ),
+    )
+    report = replay.run()
+    print(report)
+
+
+@cli.command()
+@click.argument("file", type=click.Path(exists=True, dir_okay=False))
+@filter_parameter_options
+def benchmark_filters(
+    file: str,
+    min_cutoff: float,
+    beta: float,
+    d_cutoff: float,
+    process_noise: float,
+    measurement_noise: float,
+):
+    """
+    Measure the cost per frame and the smoothing of every filter over a recorded trajectory file
+    """
+    from drumpy.offline.filter_benchmark import benchmark_filter  # noqa: PLC0415
+    from drumpy.trajectory_reader import TrajectoryReader  # noqa: PLC0415
+
+    reader = TrajectoryReader(file)
+    print(f"Filtering {len(reader)} frames of {file}")
+    for filter_type in ["none", "one-euro", "kalman"]:
+        landmark_filter = parse_filter(
+            filter_type, min_cutoff, beta, d_cutoff, process_noise, measurement_noise
+        )
+        print(benchmark_filter(filter_type, landmark_filter, reader))
+    reader.close()
+
+
+@cli.command()
+@click.argument("file", type=click.Path(exists=True, dir_okay=False))
+def benchmark_trackers(file: str):
+    """
+    Measure the cost per tracker update of the hit detection over a recorded trajectory file
+    """
+    from drumpy.offline.tracker_benchmark import (  # noqa: PLC0415
+        ListMarkerTracker,
+        benchmark_engine,
+        benchmark_tracker,
+        hitting_positions,
+    )
+    from drumpy.tracking.marker_tracker import MarkerTracker  # noqa: PLC0415
+    from drumpy.trajectory_reader import TrajectoryReader  # noqa: PLC0415
+
+    reader = TrajectoryReader(file)
+    positions = hitting_positions(reader)
+    timestamps_ms = reader.times.tolist()
+    reader.close()
+    print(
+        f"Tracking {positions.shape[1]} markers over {len(positions)} frames of {file}"
+    )
+    print(benchmark_tracker("lists", ListMarkerTracker, positions, timestamps_ms))
+    print(benchmark_tracker("ring buffers", MarkerTracker, positions, timestamps_ms))
+    print(benchmark_engine(positions, timestamps_ms))
+
+
 if __name__ == "__main__":
     cli()
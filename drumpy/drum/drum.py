@@ -1,12 +1,17 @@
+from collections.abc import Callable
 from enum import auto, Enum
 from time import sleep
-from typing import Self, Optional
+from typing import Self, Optional, TypeAlias
 
 from drumpy.drum.sound import Sound, SoundState
 from drumpy.util import position_str, Position
 from drumpy.pose.mediapipe_markers import MarkerEnum
 
 
+# A function that is called when a sound is hit
+HitListener: TypeAlias = Callable[[Sound, MarkerEnum, Position, float], None]
+
+
 class DrumPresets:
     """
     A collection of drum presets
@@ -56,6 +61,9 @@ class Drum:
 
         self.sleep_option: SleepOption = sleep_option
 
+        # Called for every hit on a sound, with the sound, the marker, the position and the velocity of the hit
+        self.hit_listeners: list[HitListener] = []
+
     def __str__(self: Self) -> str:
         return "\n".join([str(sound) for sound in self.sounds])
 
@@ -84,6 +92,7 @@ class Drum:
                 # Check if the sound is calibrating
                 if sound.state == SoundState.CALIBRATING:
                     sound.hit(position, velocity)
+                    self.notify_hit(sound, marker, position, velocity)
                     print(
                         f"{marker}: {sound.name} \n"
                         f"Distance: {distance:.3f}\n"
@@ -98,6 +107,7 @@ class Drum:
 
         if closest_sound is not None:
             closest_sound.hit(position, velocity)
+            self.notify_hit(closest_sound, marker, position, velocity)
             print(
                 f"{marker}: {closest_sound.name}\n"
                 f"Distance: {closest_distance:.3f}\n"
@@ -112,6 +122,16 @@ class Drum:
                 f"Position: {position_str(position)}\n"
             )
 
+    def notify_hit(
+        self: Self,
+        sound: Sound,
+        marker: MarkerEnum,
+        position: Position,
+        velocity: float,
+    ) -> None:
+        for listener in self.hit_listeners:
+            listener(sound, marker, position, velocity)
+
     def auto_calibrate(self: Self, sounds: list[Sound] | None = None) -> None:
         """
         Automatically calibrate all sounds
@@ -1,4 +1,7 @@
+import io
+import os
 from enum import IntEnum
+from pathlib import Path
 from typing import Self, Optional
 
 import numpy as np
@@ -9,6 +12,20 @@ from drumpy.util import Position, distance_no_depth
 
 MARGIN = 0.1
 MIN_HIT_COUNT = 10
+SAMPLE_DIRECTORY = "./resources/sounds"
+
+# The contents of the sample files read ahead by preload_samples, by normalized path
+preloaded_samples: dict[str, bytes] = {}
+
+
+def preload_samples(directory: str = SAMPLE_DIRECTORY) -> None:
+    """
+    Read the sample files into memory, so creating the sounds does not wait for the disk
+    Only reads the files, so it can run on any thread, the sounds themselves are created on the main thread
+    as SDL audio is not safe to use from other threads on every platform
+    """
+    for path in Path(directory).glob("*.wav"):
+        preloaded_samples[os.path.normpath(path)] = path.read_bytes()
 
 
 class SoundState(IntEnum):
@@ -44,7 +61,10 @@ class Sound:
         :param position: The initial position of the sound, if None the sound will be uninitialized
         """
         self.name = name
-        self.sound = pygame.mixer.Sound(path)
+        sample = preloaded_samples.get(os.path.normpath(path))
+        self.sound = pygame.mixer.Sound(
+            io.BytesIO(sample) if sample is not None else path
+        )
 
         self.position: Position = (
             position if position is not None else np.array([0, 0, 0])
@@ -0,0 +1,327 @@
+import socket
+import struct
+import threading
+from abc import ABC, abstractmethod
+from enum import IntEnum
+from multiprocessing import shared_memory
+from typing import Optional, Self
+
+import numpy as np
+
+from drumpy.drum.drum import HitListener
+from drumpy.drum.sound import Sound
+from drumpy.pose.landmark_type import LandmarkType
+from drumpy.pose.mediapipe_markers import MarkerEnum
+from drumpy.util import LANDMARK_FIELDS, NUM_LANDMARKS, LandmarkArray, Position
+
+# Every message starts with: the magic, the message kind, the landmark type, the index of the performer,
+# the sequence number and the timestamp of the frame in ms, little endian
+MESSAGE_HEADER = struct.Struct("<2sBBBIq")
+MESSAGE_MAGIC = b"DP"
+
+# A landmarks message is followed by the 33x5 float32 landmarks: x, y, z, visibility, presence
+LANDMARKS_SIZE = NUM_LANDMARKS * LANDMARK_FIELDS * 4
+
+# A hit message is followed by the marker index, the sound name (utf-8, zero padded),
+# the velocity and the x, y, z position of the hit
+HIT = struct.Struct("<B16sf3f")
+
+MAX_MESSAGE_SIZE = MESSAGE_HEADER.size + max(LANDMARKS_SIZE, HIT.size)
+
+
+class MessageKind(IntEnum):
+    LANDMARKS = 0
+    HIT = 1
+
+
+class MessageSink(ABC):
+    """
+    Destination of the published messages
+    """
+
+    @abstractmethod
+    def send(self: Self, message: bytes) -> None:
+        """
+        Send a message without blocking, a message that can not be sent is dropped
+        """
+
+    @abstractmethod
+    def close(self: Self) -> None:
+        pass
+
+
+class UdpSink(MessageSink):
+    """
+    Sends every message as a UDP datagram
+    """
+
+    def __init__(self, port: int, host: str = "127.0.0.1") -> None:
+        self.address = (host, port)
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setblocking(False)  # noqa: FBT003
+        self.dropped_messages = 0
+
+    def send(self: Self, message: bytes) -> None:
+        try:
+            self.socket.sendto(message, self.address)
+        except OSError:
+            # The send buffer is full, or nobody is listening on the port
+            self.dropped_messages += 1
+
+    def close(self: Self) -> None:
+        self.socket.close()
+
+
+# The shared memory ring starts with the sequence number of the latest message, the number of slots and the slot size
+RING_HEADER = struct.Struct("<QII")
+
+# Every slot starts with a seqlock counter, odd while the slot is being written and twice the sequence number
+# of the message in the slot once it is complete
+SLOT_HEADER = struct.Struct("<Q")
+SLOT_SIZE = SLOT_HEADER.size + MAX_MESSAGE_SIZE
+
+
+class SharedMemoryRing(MessageSink):
+    """
+    Writes the messages to a ring of fixed size slots in a named shared memory block.
+    Every slot is guarded by a seqlock: its counter is made odd before the message is written
+    and set to twice the sequence number of the message after it, a reader checks the counter
+    before and after copying the slot and discards a copy that was overwritten while it was read.
+    The sequence number of the latest message is written after the slot is complete,
+    readers poll it and read the slots of the messages they have not seen yet, see SharedMemoryRingReader.
+    """
+
+    def __init__(self, name: str, slots: int = 256) -> None:
+        """
+        :param name: The name of the shared memory block, readers open it by this name.
+        A block with this name left behind by a run that crashed is replaced
+        :param slots: The number of messages kept, a reader that falls further behind loses messages
+        """
+        self.slots = slots
+        size = RING_HEADER.size + slots * SLOT_SIZE
+        try:
+            self.memory = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            print(
+                f"Replacing the shared memory block {name} left behind by a previous run"
+            )
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            self.memory = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.memory.buf[:size] = bytes(size)
+        RING_HEADER.pack_into(self.memory.buf, 0, 0, slots, SLOT_SIZE)
+        self.sequence = 0
+
+    def send(self: Self, message: bytes) -> None:
+        self.sequence += 1
+        offset = RING_HEADER.size + (self.sequence % self.slots) * SLOT_SIZE
+        SLOT_HEADER.pack_into(self.memory.buf, offset, 2 * self.sequence - 1)
+        start = offset + SLOT_HEADER.size
+        self.memory.buf[start : start + len(message)] = message
+        SLOT_HEADER.pack_into(self.memory.buf, offset, 2 * self.sequence)
+        RING_HEADER.pack_into(self.memory.buf, 0, self.sequence, self.slots, SLOT_SIZE)
+
+    def close(self: Self) -> None:
+        self.memory.close()
+        self.memory.unlink()
+
+
+class SharedMemoryRingReader:
+    """
+    Reads the messages of a SharedMemoryRing from another process
+    """
+
+    def __init__(self, name: str) -> None:
+        self.memory = shared_memory.SharedMemory(name=name)
+        self.sequence, self.slots, self.slot_size = RING_HEADER.unpack_from(
+            self.memory.buf, 0
+        )
+        # The number of messages that were overwritten before they were read
+        self.lost_messages = 0
+
+    def read(self: Self) -> list[bytes]:
+        """
+        Read the messages written since the previous read
+        """
+        latest = RING_HEADER.unpack_from(self.memory.buf, 0)[0]
+        first = max(self.sequence + 1, latest - self.slots + 1)
+        self.lost_messages += first - self.sequence - 1
+
+        messages: list[bytes] = []
+        for sequence in range(first, latest + 1):
+            offset = RING_HEADER.size + (sequence % self.slots) * self.slot_size
+            # The writer can overwrite the slot while it is copied, the counter changes if it did
+            before = SLOT_HEADER.unpack_from(self.memory.buf, offset)[0]
+            message = bytes(
+                self.memory.buf[offset + SLOT_HEADER.size : offset + self.slot_size]
+            )
+            after = SLOT_HEADER.unpack_from(self.memory.buf, offset)[0]
+            if before != 2 * sequence or after != before:
+                self.lost_messages += 1
+                continue
+            messages.append(message)
+
+        self.sequence = latest
+        return messages
+
+    def close(self: Self) -> None:
+        self.memory.close()
+
+
+def decode_header(
+    message: bytes,
+) -> tuple[MessageKind, int, int, LandmarkType, int]:
+    """
+    :return: The kind, the sequence number, the timestamp in ms, the landmark type
+    and the index of the performer of a message
+    """
+    magic, kind, landmark_type, performer, sequence, timestamp_ms = (
+        MESSAGE_HEADER.unpack_from(message, 0)
+    )
+    if magic != MESSAGE_MAGIC:
+        raise ValueError("Not a landmark message")
+    return (
+        MessageKind(kind),
+        sequence,
+        timestamp_ms,
+        LandmarkType(landmark_type),
+        performer,
+    )
+
+
+def decode_landmarks(message: bytes) -> LandmarkArray:
+    """
+    :return: The landmarks of a landmarks message as an array of shape (33, 5)
+    """
+    return np.frombuffer(
+        message,
+        dtype="<f4",
+        count=NUM_LANDMARKS * LANDMARK_FIELDS,
+        offset=MESSAGE_HEADER.size,
+    ).reshape(NUM_LANDMARKS, LANDMARK_FIELDS)
+
+
+class LandmarkPublisher:
+    """
+    Publishes the landmarks of every tracked frame and the detected hits as compact binary messages,
+    for live consumers such as lighting and visuals.
+    Every message has a sequence number, incremented by one per message, so consumers can detect lost messages.
+    Every message carries the index of the performer, the person whose landmarks or hit it is.
+    A hit message carries the timestamp of the frame it was detected in, its position is in normalized coordinates.
+    """
+
+    def __init__(
+        self, sink: MessageSink, landmark_type: LandmarkType = LandmarkType.LANDMARKS
+    ) -> None:
+        """
+        :param sink: Where to send the messages to
+        :param landmark_type: The type of the published landmarks, with both types
+        a frame is published as a message per type
+        """
+        self.sink = sink
+        self.landmark_type = landmark_type
+        self.sequence = 0
+        self.timestamp_ms = 0
+        # With an inference stride, the result thread and the main thread both publish,
+        # the lock keeps the sequence numbers in the order the messages are sent
+        self.lock = threading.Lock()
+
+    def publishes(self: Self, landmark_type: LandmarkType) -> bool:
+        """
+        Whether landmarks of the given type are published
+        """
+        return self.landmark_type in {landmark_type, LandmarkType.BOTH}
+
+    def publish_landmarks(
+        self: Self,
+        landmarks: LandmarkArray,
+        timestamp_ms: int,
+        landmark_type: LandmarkType = LandmarkType.LANDMARKS,
+        performer: int = 0,
+    ) -> None:
+        """
+        :param landmarks: The landmarks of the frame as an array of shape (33, 5)
+        :param landmark_type: The type of the landmarks, landmarks of a type that is not published
+        only set the timestamp of the following hits
+        :param performer: The index of the person the landmarks belong to
+        """
+        with self.lock:
+            self.timestamp_ms = timestamp_ms
+            if self.publishes(landmark_type):
+                self.send(
+                    MessageKind.LANDMARKS,
+                    landmark_type,
+                    performer,
+                    landmarks.astype("<f4", copy=False).tobytes(),
+                )
+
+    def publish_hit(
+        self: Self,
+        sound: Sound,
+        marker: MarkerEnum,
+        position: Position,
+        velocity: float,
+        performer: int = 0,
+    ) -> None:
+        """
+        Hit listener of the drum of the first performer, see hit_listener
+        """
+        with self.lock:
+            self.send(
+                MessageKind.HIT,
+                LandmarkType.LANDMARKS,
+                performer,
+                HIT.pack(
+                    marker, sound.name.encode()[:16], velocity, *position.tolist()
+                ),
+            )
+
+    def hit_listener(self: Self, performer: int) -> HitListener:
+        """
+        :return: The hit listener of the drum of the given performer
+        """
+
+        def publish_hit(
+            sound: Sound, marker: MarkerEnum, position: Position, velocity: float
+        ) -> None:
+            self.publish_hit(sound, marker, position, velocity, performer)
+
+        return publish_hit
+
+    def send(
+        self: Self,
+        kind: MessageKind,
+        landmark_type: LandmarkType,
+        performer: int,
+        payload: bytes,
+    ) -> None:
+        self.sequence = (self.sequence + 1) % 2**32
+        header = MESSAGE_HEADER.pack(
+            MESSAGE_MAGIC,
+            kind,
+            landmark_type.value,
+            performer,
+            self.sequence,
+            self.timestamp_ms,
+        )
+        self.sink.send(header + payload)
+
+    def close(self: Self) -> None:
+        self.sink.close()
+
+
+def create_publisher(
+    udp_port: Optional[int],
+    udp_host: str,
+    shared_memory_name: Optional[str],
+    landmark_type: LandmarkType = LandmarkType.LANDMARKS,
+) -> Optional[LandmarkPublisher]:
+    """
+    Create a publisher of the given landmark type for the given destination, None if there is no destination
+    """
+    if udp_port is not None:
+        return LandmarkPublisher(UdpSink(udp_port, udp_host), landmark_type)
+    if shared_memory_name is not None:
+        return LandmarkPublisher(SharedMemoryRing(shared_memory_name), landmark_type)
+    return None
@@ -0,0 +1,78 @@
+import time
+from typing import Self
+
+import numpy as np
+
+from drumpy.pose.landmark_filter import LandmarkFilter
+from drumpy.pose.landmark_type import LandmarkType
+from drumpy.pose.mediapipe_markers import MarkerEnum
+from drumpy.trajectory_reader import TrajectoryReader
+from drumpy.util import LandmarkArray
+
+# The landmarks that hit the drums, their jitter is reported
+HITTING_MARKERS = [
+    MarkerEnum.LEFT_WRIST,
+    MarkerEnum.RIGHT_WRIST,
+    MarkerEnum.LEFT_FOOT_INDEX,
+    MarkerEnum.RIGHT_FOOT_INDEX,
+]
+
+
+class FilterReport:
+    """
+    Cost and smoothness of a filter over a recorded trajectory
+    """
+
+    def __init__(self, name: str, frames: int, elapsed_s: float, jitter: float) -> None:
+        """
+        :param name: The name of the filter
+        :param frames: The number of frames filtered
+        :param elapsed_s: The time spent in the filter, in seconds
+        :param jitter: The mean absolute second difference of the hitting landmarks, lower is smoother
+        """
+        self.name = name
+        self.frames = frames
+        self.elapsed_s = elapsed_s
+        self.us_per_frame = elapsed_s / frames * 1e6 if frames > 0 else 0.0
+        self.jitter = jitter
+
+    def __str__(self: Self) -> str:
+        return (
+            f"{self.name:>10}: {self.us_per_frame:8.1f} us/frame, "
+            f"jitter {self.jitter:.5f}"
+        )
+
+
+def jitter(landmarks: LandmarkArray) -> float:
+    """
+    The mean absolute second difference of the positions of the hitting landmarks
+    :param landmarks: The landmarks of consecutive frames, of shape (frames, 33, 5)
+    """
+    if len(landmarks) < 3:  # noqa: PLR2004
+        return 0.0
+    positions = landmarks[:, HITTING_MARKERS, :3].astype(np.float64)
+    return float(np.mean(np.abs(np.diff(positions, n=2, axis=0))))
+
+
+def benchmark_filter(
+    name: str, landmark_filter: LandmarkFilter | None, reader: TrajectoryReader
+) -> FilterReport:
+    """
+    Filter the landmarks of every frame of a trajectory file, one frame at a time,
+    the normalized landmarks of a file with both types
+    :param landmark_filter: The filter to measure, None to report the unfiltered landmarks
+    """
+    landmark_type = (
+        LandmarkType.LANDMARKS if reader.landmark_type == LandmarkType.BOTH else None
+    )
+    landmarks = np.array(reader.landmarks(slice(0, len(reader)), landmark_type))
+    timestamps = reader.times.tolist()
+    if landmark_filter is None:
+        return FilterReport(name, len(landmarks), 0.0, jitter(landmarks))
+
+    filtered = np.empty_like(landmarks)
+    start = time.perf_counter()
+    for i, timestamp_ms in enumerate(timestamps):
+        filtered[i] = landmark_filter.filter(landmarks[i], timestamp_ms)
+    elapsed_s = time.perf_counter() - start
+    return FilterReport(name, len(landmarks), elapsed_s, jitter(filtered))
@@ -0,0 +1,151 @@
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Optional, Self
+
+from mediapipe.tasks.python import BaseOptions  # type: ignore
+
+from drumpy.binary_trajectory_file import BinaryTrajectoryFile
+from drumpy.pose.landmark_type import LandmarkType
+from drumpy.pose.landmarker_model import LandmarkerModel
+
+DEFAULT_CACHE_DIRECTORY = Path.home() / ".cache" / "drumpy" / "landmarks"
+DEFAULT_CACHE_SIZE_BYTES = 1024**3
+
+ENTRY_SUFFIX = ".trajectory"
+# An entry is written under this suffix and only renamed once it is complete
+PARTIAL_SUFFIX = ".partial"
+# A partial entry that was not written to for this long was left behind by a run that crashed
+STALE_PARTIAL_S = 3600
+# The hashes of the videos by path, size and modification time, so an unchanged video is not read again
+HASHES_FILE = "hashes.json"
+
+
+class LandmarkCache:
+    """
+    A persistent cache of the landmarks the pose landmarker detected in a video file.
+    An entry is keyed by the content of the video file, the model, the delegate and the landmark type,
+    and is stored as a binary trajectory file, so it can also be read with TrajectoryReader.
+    Hashing a long video takes a while, the hash is remembered by the path, size and modification time of the video
+    and the video is only hashed again when one of them changes.
+    The total size of the entries is bounded, the least recently used entries are evicted first.
+    """
+
+    def __init__(
+        self,
+        directory: Path = DEFAULT_CACHE_DIRECTORY,
+        max_size_bytes: int = DEFAULT_CACHE_SIZE_BYTES,
+    ) -> None:
+        """
+        :param directory: The directory to store the entries in, created if it does not exist
+        :param max_size_bytes: The maximum total size of the entries
+        """
+        self.directory = directory
+        self.max_size_bytes = max_size_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def hash_file(path: str, chunk_size: int = 1024**2) -> str:
+        """
+        The SHA-256 hash of the content of a file, so a renamed or copied video still hits the cache
+        """
+        digest = hashlib.sha256()
+        with open(path, "rb") as file:
+            while chunk := file.read(chunk_size):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def video_hash(self: Self, path: str) -> str:
+        """
+        The hash of the content of a video, remembered by the path, size and modification time of the video
+        """
+        stat = os.stat(path)
+        path = str(Path(path).resolve())
+        hashes_path = self.directory / HASHES_FILE
+        try:
+            hashes = json.loads(hashes_path.read_text())
+        except (OSError, ValueError):
+            hashes = {}
+
+        known = hashes.get(path)
+        if known is not None and known[:2] == [stat.st_size, stat.st_mtime_ns]:
+            return known[2]
+
+        video_hash = self.hash_file(path)
+        hashes[path] = [stat.st_size, stat.st_mtime_ns, video_hash]
+        # Written to a temporary file first, a concurrent run never reads a partially written file
+        temporary_path = hashes_path.with_name(f"{HASHES_FILE}.{os.getpid()}")
+        temporary_path.write_text(json.dumps(hashes))
+        temporary_path.replace(hashes_path)
+        return video_hash
+
+    @staticmethod
+    def key(
+        video_hash: str,
+        model: LandmarkerModel,
+        delegate: BaseOptions.Delegate,  # type: ignore
+        landmark_type: LandmarkType,
+    ) -> str:
+        """
+        The key of the entry with the landmarks of a video, detected with the given model and delegate
+        """
+        description = f"{video_hash}:{model.name}:{delegate.name}:{landmark_type.name}"  # type: ignore
+        return hashlib.sha256(description.encode()).hexdigest()
+
+    def entry_path(self: Self, key: str) -> Path:
+        return self.directory / (key + ENTRY_SUFFIX)
+
+    def get(self: Self, key: str) -> Optional[Path]:
+        """
+        Look up an entry and mark it as recently used
+        :return: The path of the trajectory file of the entry, None if it is not cached
+        """
+        path = self.entry_path(key)
+        if not path.exists():
+            return None
+
+        path.touch()
+        return path
+
+    def open_entry(
+        self: Self, key: str, landmark_type: LandmarkType
+    ) -> BinaryTrajectoryFile:
+        """
+        Open a new entry for writing, it is only visible to get after store is called
+        """
+        return BinaryTrajectoryFile(
+            str(self.entry_path(key)) + PARTIAL_SUFFIX, landmark_type
+        )
+
+    def store(self: Self, key: str) -> None:
+        """
+        Make a completely written entry available and evict entries if the cache is too large
+        """
+        path = self.entry_path(key)
+        Path(str(path) + PARTIAL_SUFFIX).replace(path)
+        self.evict()
+
+    def evict(self: Self) -> None:
+        """
+        Remove the partial entries left behind by crashed runs,
+        and the least recently used entries until the total size is within the bound
+        """
+        for path in self.directory.glob("*" + PARTIAL_SUFFIX):
+            if time.time() - path.stat().st_mtime > STALE_PARTIAL_S:
+                path.unlink(missing_ok=True)
+                print(f"Removed the partial entry {path.name} from the landmark cache")
+
+        entries = sorted(
+            self.directory.glob("*" + ENTRY_SUFFIX),
+            key=lambda path: path.stat().st_mtime,
+        )
+        total_size = sum(path.stat().st_size for path in entries)
+        for path in entries:
+            if total_size <= self.max_size_bytes:
+                return
+
+            total_size -= path.stat().st_size
+            path.unlink()
+            print(f"Evicted {path.name} from the landmark cache")
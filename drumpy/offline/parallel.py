@@ -0,0 +1,220 @@
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import pairwise
+from typing import Optional, Self
+
+from mediapipe.tasks.python import BaseOptions  # type: ignore
+from mediapipe.tasks.python.vision import RunningMode  # type: ignore
+
+from drumpy.app.frame_buffer import Frame
+from drumpy.app.video_source import VideoFileSource
+from drumpy.pose.landmark_type import LandmarkType
+from drumpy.pose.landmarker_model import LandmarkerModel
+from drumpy.pose.mediapipe_pose import MediaPipePose
+from drumpy.trajectory_writer import open_trajectory_file
+from drumpy.util import LandmarkArray
+
+# A processed frame: the zero based frame index, the timestamp in ms and the landmarks
+SegmentFrame = tuple[int, int, LandmarkArray]
+# The result of a segment: the number of frames decoded in the segment and the frames with a pose
+SegmentResult = tuple[int, list[SegmentFrame]]
+
+
+class Segment:
+    """
+    A time range of a video file that is processed by a single worker
+    A frame belongs to the segment whose range contains its decoded timestamp,
+    so the segments neither overlap nor leave gaps, however inexact seeking and the frame count are.
+    The worker starts decoding `warm_up_ms` before the segment to warm up the landmark tracking,
+    the results of these frames are discarded as they belong to the previous segment
+    """
+
+    def __init__(self, start_ms: float, stop_ms: float, warm_up_ms: float) -> None:
+        """
+        :param start_ms: The timestamp the segment starts at, inclusive
+        :param stop_ms: The timestamp the segment stops at, exclusive, infinite for the last segment
+        :param warm_up_ms: The duration of the warm-up before the start of the segment
+        """
+        self.start_ms = start_ms
+        self.stop_ms = stop_ms
+        self.warm_up_start_ms = max(0.0, start_ms - warm_up_ms)
+
+    def __str__(self: Self) -> str:
+        return f"Segment [{self.start_ms:.0f} ms, {self.stop_ms:.0f} ms)"
+
+    @staticmethod
+    def split(
+        duration_ms: float, frame_count: int, segments: int, warm_up_ms: float
+    ) -> list["Segment"]:
+        """
+        Split a video in segments of equal duration
+        :param duration_ms: The estimated duration of the video, the last segment runs until the end of the video
+        :param frame_count: The estimated number of frames, there are no more segments than frames
+        :param segments: The number of segments
+        :param warm_up_ms: The duration of the warm-up of every segment
+        """
+        segments = max(1, min(segments, frame_count))
+        bounds = [duration_ms * i / segments for i in range(segments + 1)]
+        bounds[-1] = math.inf
+        return [Segment(start, stop, warm_up_ms) for start, stop in pairwise(bounds)]
+
+
+def seek_before(video_source: VideoFileSource, timestamp_ms: float) -> Frame | None:
+    """
+    Seek to a frame at or before the given timestamp, the seek is retried further back
+    when the capture lands after the timestamp or past the end of the video.
+    A capture that reports a position after the timestamp is retried without decoding a frame.
+    :return: The first decoded frame, None if the video has no frames
+    """
+    fps = video_source.get_fps()
+    seek_index = int(timestamp_ms * fps / 1000)
+    step = max(1, int(fps))
+    while True:
+        position = video_source.seek(seek_index)
+        if seek_index == 0 or position * 1000 / fps <= timestamp_ms:
+            frame = video_source.get_frame()
+            if seek_index == 0 or (
+                frame is not None and video_source.get_timestamp_ms() <= timestamp_ms
+            ):
+                return frame
+        seek_index = max(0, seek_index - step)
+        step *= 2
+
+
+def process_segment(
+    file_path: str,
+    segment: Segment,
+    model: LandmarkerModel,
+    delegate: BaseOptions.Delegate,  # type: ignore
+    landmark_type: LandmarkType,
+) -> SegmentResult:
+    """
+    Run the pose estimation on a single segment, executed in a worker process
+    Every worker has its own video capture and pose landmarker
+    The frame indices and timestamps are read back from the capture
+    :return: The number of frames in the segment and the landmarks of every frame where a pose was detected
+    """
+    video_source = VideoFileSource(file_path)
+    frame = seek_before(video_source, segment.warm_up_start_ms)
+
+    media_pipe_pose = MediaPipePose(
+        running_mode=RunningMode.VIDEO,  # type: ignore
+        model=model,
+        delegate=delegate,  # type: ignore
+        landmark_type=landmark_type,
+        visualize=False,
+    )
+
+    decoded = 0
+    frames: list[SegmentFrame] = []
+    while frame is not None:
+        timestamp_ms = video_source.get_timestamp_ms()
+        if timestamp_ms >= segment.stop_ms:
+            break
+
+        # The seek can land before the warm-up, those frames are only decoded
+        if timestamp_ms >= segment.warm_up_start_ms:
+            media_pipe_pose.process_image(frame, timestamp_ms)
+            result = media_pipe_pose.detection_result
+            if timestamp_ms >= segment.start_ms:
+                decoded += 1
+                if (
+                    result is not None
+                    and result.pose_landmarks is not None  # type: ignore
+                    and len(result.pose_landmarks) > 0  # type: ignore
+                ):
+                    frames.append(
+                        (
+                            video_source.get_frame_index(),
+                            timestamp_ms,
+                            MediaPipePose.landmarks_of_type(result, landmark_type),  # type: ignore
+                        )
+                    )
+
+        frame = video_source.get_frame()
+
+    video_source.release()
+    return decoded, frames
+
+
+class ParallelProcessor:
+    """
+    Processes a single video file with a pool of worker processes.
+    The video is split in time segments that are processed independently, each by its own pose landmarker.
+    The landmarks of the segments are merged in order into a single trajectory file.
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        log_file: str,
+        model: LandmarkerModel = LandmarkerModel.FULL,
+        delegate: BaseOptions.Delegate = BaseOptions.Delegate.CPU,  # type: ignore
+        landmark_type: LandmarkType = LandmarkType.LANDMARKS,
+        workers: Optional[int] = None,
+        overlap: int = 30,
+    ) -> None:
+        """
+        :param file_path: The video file to process
+        :param log_file: The trajectory file to write the landmarks to
+        :param workers: The number of worker processes, defaults to the number of cpu cores
+        :param overlap: The number of warm-up frames processed before every segment
+        """
+        self.file_path = file_path
+        self.log_file = log_file
+        self.model = model
+        self.delegate = delegate
+        self.landmark_type = landmark_type
+        self.workers = workers if workers is not None else os.cpu_count() or 1
+        self.overlap = overlap
+
+    def run(self: Self) -> None:
+        video_source = VideoFileSource(self.file_path)
+        # Both are estimates, the segments are cut by timestamp and the last one runs until the end
+        frame_count = video_source.get_frame_count()
+        fps = video_source.get_fps()
+        video_source.release()
+        assert fps > 0, f"Unknown frame rate of {self.file_path}"
+
+        segments = Segment.split(
+            frame_count * 1000 / fps,
+            frame_count,
+            self.workers,
+            self.overlap * 1000 / fps,
+        )
+        print(f"Processing about {frame_count} frames in {len(segments)} segments")
+
+        start = time.perf_counter()
+        trajectory_file = open_trajectory_file(self.log_file, self.landmark_type)
+        decoded_frames = 0
+        # Spawn fresh workers, the mediapipe runtime does not survive a fork
+        with ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            results = executor.map(
+                process_segment,
+                [self.file_path] * len(segments),
+                segments,
+                [self.model] * len(segments),
+                [self.delegate] * len(segments),  # type: ignore
+                [self.landmark_type] * len(segments),
+            )
+            # The results are yielded in segment order, so the output stays ordered
+            for segment, (decoded, frames) in zip(segments, results, strict=True):
+                decoded_frames += decoded
+                for frame_index, timestamp_ms, landmarks in frames:
+                    # Frame numbers start at 1, like in MediaPipePose
+                    trajectory_file.write_frame(
+                        frame_index + 1, timestamp_ms, landmarks, self.landmark_type
+                    )
+                print(f"{segment} done, {decoded} frames")
+
+        trajectory_file.close()
+        elapsed_s = time.perf_counter() - start
+        print(
+            f"Processed {decoded_frames} frames in {elapsed_s:.2f} s, "
+            f"{decoded_frames / elapsed_s:.2f} frames/s"
+        )
@@ -0,0 +1,356 @@
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Optional, Self
+
+import numpy as np
+import pygame
+from mediapipe.tasks.python import BaseOptions  # type: ignore
+from mediapipe.tasks.python.vision import RunningMode  # type: ignore
+
+from drumpy.app.threaded_source import BufferPolicy, ThreadedVideoSource
+from drumpy.app.video_source import VideoFileSource, VideoSource
+from drumpy.binary_trajectory_file import (
+    CompressedTrajectoryFile,
+    convert_to_csv,
+    read_records,
+)
+from drumpy.drum.drum import SleepOption
+from drumpy.landmark_publisher import LandmarkPublisher
+from drumpy.offline.landmark_cache import LandmarkCache
+from drumpy.pose.adaptive_model import AdaptiveModelSelector
+from drumpy.pose.frame_scaler import FrameScaler
+from drumpy.pose.landmark_filter import LandmarkFilter
+from drumpy.pose.landmark_type import LandmarkType
+from drumpy.pose.landmarker_model import LandmarkerModel
+from drumpy.pose.mediapipe_pose import MediaPipePose
+from drumpy.pose.region_of_interest import RegionOfInterest
+from drumpy.tracking.drum_trackers import DrumTrackers
+from drumpy.trajectory_reader import TrajectoryReader
+from drumpy.trajectory_writer import BINARY_EXTENSION, COMPRESSED_EXTENSION
+from drumpy.util import array_to_landmarks
+
+
+class ThroughputReport:
+    """
+    Throughput and latency statistics of a headless run
+    """
+
+    def __init__(
+        self,
+        latencies_ms: list[float],
+        elapsed_s: float,
+        bytes_per_frame: float,
+        capture_buffer: Optional[str] = None,
+    ) -> None:
+        """
+        :param latencies_ms: The time spent in the pose estimation and tracking of every frame, in ms
+        :param elapsed_s: The total wall clock time of the run, decoding included, in seconds
+        :param bytes_per_frame: The average number of bytes of frame data copied per frame
+        :param capture_buffer: The statistics of the capture buffer, if the frames were decoded on a separate thread
+        """
+        self.frames = len(latencies_ms)
+        self.elapsed_s = elapsed_s
+        self.bytes_per_frame = bytes_per_frame
+        self.capture_buffer = capture_buffer
+        self.fps = self.frames / elapsed_s if elapsed_s > 0 else 0.0
+
+        latencies = np.array(latencies_ms) if self.frames > 0 else np.zeros(1)
+        self.mean_latency_ms = float(np.mean(latencies))
+        self.p50_latency_ms = float(np.percentile(latencies, 50))
+        self.p95_latency_ms = float(np.percentile(latencies, 95))
+        self.max_latency_ms = float(np.max(latencies))
+
+    def __str__(self: Self) -> str:
+        report = (
+            f"Frames: {self.frames}\n"
+            f"Elapsed: {self.elapsed_s:.2f} s\n"
+            f"Throughput: {self.fps:.2f} frames/s\n"
+            f"Latency per frame: mean {self.mean_latency_ms:.2f} ms, "
+            f"p50 {self.p50_latency_ms:.2f} ms, "
+            f"p95 {self.p95_latency_ms:.2f} ms, "
+            f"max {self.max_latency_ms:.2f} ms\n"
+            f"Frame data copied: {self.bytes_per_frame / 1e6:.2f} MB/frame"
+        )
+        if self.capture_buffer is not None:
+            report += f"\n{self.capture_buffer}"
+        return report
+
+
+class HeadlessPipeline:
+    """
+    Processes a video file without opening a window.
+    Frames are pushed through the pose estimation and the drum trackers as fast as the inference allows,
+    there is no display, no landmark visualisation and no throttling to the source fps.
+    """
+
+    def __init__(  # noqa: PLR0913, PLR0917
+        self,
+        file_path: str,
+        model: LandmarkerModel = LandmarkerModel.FULL,
+        delegate: BaseOptions.Delegate = BaseOptions.Delegate.CPU,  # type: ignore
+        log_file: Optional[str] = None,
+        landmark_type: LandmarkType = LandmarkType.LANDMARKS,
+        disable_drum: bool = False,  # noqa: FBT001, FBT002
+        threaded_capture: bool = False,  # noqa: FBT001, FBT002
+        buffer_policy: BufferPolicy = BufferPolicy.BLOCK,
+        buffer_capacity: int = 8,
+        region_of_interest: bool = False,  # noqa: FBT001, FBT002
+        latency_target_ms: Optional[float] = None,
+        inference_stride: int = 1,
+        inference_size: Optional[int] = None,
+        cache: Optional[LandmarkCache] = None,
+        process_result: bool = False,  # noqa: FBT001, FBT002
+        landmark_filter: Optional[LandmarkFilter] = None,
+        num_poses: int = 1,
+        publisher: Optional[LandmarkPublisher] = None,
+    ) -> None:
+        """
+        Initialize the headless pipeline
+        :param file_path: The video file to process
+        :param model: The model to use for the pose estimation
+        :param delegate: The delegate to use for the pose estimation, Either CPU or GPU
+        :param log_file: The file to log the landmarks to, if None no logging will be done
+        :param disable_drum: Only run the pose estimation, without the drum trackers
+        :param threaded_capture: Decode the frames on a separate thread, overlapping decoding and inference
+        :param buffer_policy: What to do when the buffer of decoded frames is full, by default the decoding blocks
+        :param buffer_capacity: The number of decoded frames in the buffer
+        :param region_of_interest: Only pass the region around the previous pose to the landmarker
+        :param latency_target_ms: Switch between models at runtime to stay within this latency,
+        if None the given model is always used
+        :param inference_stride: Only pass every n-th frame to the landmarker, extrapolating the others
+        :param inference_size: Downscale the frames to this size before the pose estimation,
+        the display keeps the full resolution
+        :param cache: Reuse the landmarks of earlier runs over the same video with the same model and delegate,
+        and store the landmarks of this run, if None the pose estimation always runs
+        :param process_result: Correct implausible landmarks with the result processor before they are tracked
+        :param landmark_filter: Smooth the landmarks before they are tracked, if None they are not smoothed
+        :param num_poses: The maximum number of persons to detect, every person plays their own drum kit
+        :param publisher: Publish the landmarks and the hits to live consumers, if None nothing is published
+        """
+        # The drum trackers of every person, the first person plays drum_trackers
+        self.performers: list[DrumTrackers] = []
+        if not disable_drum:
+            # No sound is played when processing offline, the dummy driver
+            # allows the samples to be loaded without an audio device
+            os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+            pygame.mixer.init()
+            self.performers = [
+                DrumTrackers(sleep_option=SleepOption.NO_SLEEP)
+                for _ in range(num_poses)
+            ]
+        self.drum_trackers: Optional[DrumTrackers] = (
+            self.performers[0] if len(self.performers) > 0 else None
+        )
+        self.publisher = publisher
+        if publisher is not None:
+            for performer, drum_trackers in enumerate(self.performers):
+                drum_trackers.drum.hit_listeners.append(
+                    publisher.hit_listener(performer)
+                )
+
+        self.log_file = log_file
+        self.landmark_type = landmark_type
+        self.cache = cache
+        # The cache key and the cached entry, if any, of every landmark type the run needs
+        self.cache_keys: dict[LandmarkType, str] = {}
+        self.cached_entries: dict[LandmarkType, Path] = {}
+        if cache is not None:
+            if (
+                region_of_interest
+                or latency_target_ms is not None
+                or inference_stride > 1
+                or inference_size is not None
+                or process_result
+                or landmark_filter is not None
+                or num_poses > 1
+                or publisher is not None
+            ):
+                print(
+                    "The landmark cache is not used with a region of interest, a latency target, "
+                    "an inference stride, an inference size, the result processor, a filter, "
+                    "more than one pose or a publisher"
+                )
+            else:
+                self.look_up_cache(cache, file_path, model, delegate)
+
+        # Not used when every needed landmark type is cached, the video does not have to be decoded
+        self.video_source: Optional[VideoSource] = None
+        self.media_pipe_pose: Optional[MediaPipePose] = None
+        if self.fully_cached:
+            return
+
+        self.video_source = VideoFileSource(file_path)
+        if threaded_capture:
+            self.video_source = ThreadedVideoSource(
+                self.video_source, buffer_policy, capacity=buffer_capacity
+            )
+
+        # Blocking mode, every frame is processed and none are dropped
+        self.media_pipe_pose = MediaPipePose(
+            running_mode=RunningMode.VIDEO,  # type: ignore
+            model=model,
+            log_file=log_file,
+            delegate=delegate,  # type: ignore
+            landmark_type=landmark_type,
+            drum_trackers=self.drum_trackers if num_poses == 1 else None,
+            region_of_interest=RegionOfInterest() if region_of_interest else None,
+            adaptive_model=AdaptiveModelSelector(latency_target_ms, model)
+            if latency_target_ms is not None
+            else None,
+            inference_stride=inference_stride,
+            frame_scaler=FrameScaler(inference_size)
+            if inference_size is not None
+            else None,
+            visualize=False,
+            process_result=process_result,
+            landmark_filter=landmark_filter,
+            publisher=publisher,
+            num_poses=num_poses,
+        )
+        if num_poses > 1:
+            self.media_pipe_pose.performers = self.performers
+
+        if cache is not None:
+            self.media_pipe_pose.cache_writers = {
+                landmark_type: cache.open_entry(key, landmark_type)
+                for landmark_type, key in self.cache_keys.items()
+            }
+
+    @property
+    def fully_cached(self: Self) -> bool:
+        """
+        Whether every landmark type the run needs is cached
+        """
+        return len(self.cache_keys) > 0 and len(self.cached_entries) == len(
+            self.cache_keys
+        )
+
+    def look_up_cache(
+        self: Self,
+        cache: LandmarkCache,
+        file_path: str,
+        model: LandmarkerModel,
+        delegate: BaseOptions.Delegate,  # type: ignore
+    ) -> None:
+        """
+        Look up the landmarks the run needs in the cache, the drum trackers always use the normalized landmarks,
+        which are also in the logged entry when it has both landmark types
+        """
+        landmark_types: set[LandmarkType] = set()
+        if self.log_file is not None:
+            landmark_types.add(self.landmark_type)
+        if self.drum_trackers is not None and (
+            self.log_file is None
+            or self.landmark_type not in {LandmarkType.LANDMARKS, LandmarkType.BOTH}
+        ):
+            landmark_types.add(LandmarkType.LANDMARKS)
+        if len(landmark_types) == 0:
+            return
+
+        video_hash = cache.video_hash(file_path)
+        for landmark_type in landmark_types:
+            key = LandmarkCache.key(video_hash, model, delegate, landmark_type)
+            self.cache_keys[landmark_type] = key
+            entry = cache.get(key)
+            if entry is not None:
+                self.cached_entries[landmark_type] = entry
+
+    def run(self: Self) -> ThroughputReport:
+        """
+        Process every frame of the video file
+        :return: The throughput and latency statistics of the run
+        """
+        if self.fully_cached:
+            return self.run_cached()
+
+        assert self.video_source is not None and self.media_pipe_pose is not None
+        latencies_ms: list[float] = []
+        start = time.perf_counter()
+        while True:
+            frame = self.video_source.get_frame()
+            if frame is None:
+                break
+
+            timestamp_ms = self.video_source.get_timestamp_ms()
+            frame_start = time.perf_counter()
+            self.media_pipe_pose.process_image(frame, timestamp_ms)
+            latencies_ms.append((time.perf_counter() - frame_start) * 1000)
+            # MediaPipe copies the frame into its own image
+            self.video_source.copy_counter.add(self.media_pipe_pose.image_nbytes)
+
+        elapsed_s = time.perf_counter() - start
+
+        self.video_source.release()
+        if self.media_pipe_pose.csv_writer is not None:
+            self.media_pipe_pose.csv_writer.close()
+        if self.publisher is not None:
+            self.publisher.close()
+        if self.cache is not None:
+            for landmark_type, writer in self.media_pipe_pose.cache_writers.items():
+                writer.close()
+                self.cache.store(self.cache_keys[landmark_type])
+
+        return ThroughputReport(
+            latencies_ms,
+            elapsed_s,
+            self.video_source.copy_counter.bytes_per_frame,
+            str(self.video_source)
+            if isinstance(self.video_source, ThreadedVideoSource)
+            else None,
+        )
+
+    def run_cached(self: Self) -> ThroughputReport:
+        """
+        Produce the log file and drive the drum trackers from the cached landmarks,
+        without decoding the video or running the pose estimation
+        :return: The throughput and latency statistics of the run, frames without a pose are not cached
+        """
+        print("Using the cached landmarks")
+        latencies_ms: list[float] = []
+        start = time.perf_counter()
+
+        if self.log_file is not None:
+            entry = self.cached_entries[self.landmark_type]
+            suffix = Path(self.log_file).suffix
+            if suffix == BINARY_EXTENSION:
+                shutil.copyfile(entry, self.log_file)
+            elif suffix == COMPRESSED_EXTENSION:
+                log_file = CompressedTrajectoryFile(self.log_file, self.landmark_type)
+                for landmark_type, records in read_records(str(entry)):
+                    for record in records:
+                        log_file.write_frame(
+                            int(record["frame"]),
+                            int(record["time"]),
+                            record["landmarks"],
+                            landmark_type,
+                        )
+                log_file.close()
+            else:
+                convert_to_csv(str(entry), self.log_file)
+
+        if self.drum_trackers is not None:
+            # The index is not cached, it would take up room in the cache directory
+            entry = self.cached_entries.get(
+                LandmarkType.LANDMARKS, self.cached_entries.get(LandmarkType.BOTH)
+            )
+            reader = TrajectoryReader(str(entry), cache_index=False)
+            # Only the landmarks read by the trackers are converted
+            used = self.drum_trackers.markers
+            for chunk_start in range(0, len(reader), 1024):
+                records = slice(chunk_start, min(chunk_start + 1024, len(reader)))
+                for landmarks, timestamp_ms in zip(
+                    reader.landmarks(records, LandmarkType.LANDMARKS),
+                    reader.times[records].tolist(),
+                    strict=True,
+                ):
+                    frame_start = time.perf_counter()
+                    self.drum_trackers.drum.check_calibrations()
+                    self.drum_trackers.update(
+                        array_to_landmarks(landmarks[used], used), timestamp_ms
+                    )
+                    latencies_ms.append((time.perf_counter() - frame_start) * 1000)
+            reader.close()
+
+        return ThroughputReport(latencies_ms, time.perf_counter() - start, 0.0)
@@ -0,0 +1,158 @@
+import os
+import time
+from typing import Optional, Self
+
+import pygame
+from mediapipe.tasks.python.vision import PoseLandmarkerResult  # type: ignore
+
+from drumpy.drum.drum import SleepOption
+from drumpy.pose.landmark_filter import LandmarkFilter
+from drumpy.pose.landmark_type import LandmarkType
+from drumpy.pose.process_result import ResultProcessor
+from drumpy.tracking.drum_trackers import DrumTrackers
+from drumpy.trajectory_reader import TrajectoryReader
+from drumpy.util import LandmarkArray, array_to_landmarks, landmarks_to_array
+
+
+class ReplayReport:
+    """
+    Throughput statistics of a replay
+    """
+
+    def __init__(self, frames: int, elapsed_s: float, duration_s: float) -> None:
+        """
+        :param frames: The number of frames replayed
+        :param elapsed_s: The wall clock time of the replay, in seconds
+        :param duration_s: The time between the first and the last frame of the recording, in seconds
+        """
+        self.frames = frames
+        self.elapsed_s = elapsed_s
+        self.duration_s = duration_s
+        self.fps = frames / elapsed_s if elapsed_s > 0 else 0.0
+
+    def __str__(self: Self) -> str:
+        return (
+            f"Frames: {self.frames}\n"
+            f"Recording duration: {self.duration_s:.2f} s\n"
+            f"Elapsed: {self.elapsed_s:.2f} s\n"
+            f"Throughput: {self.fps:.2f} frames/s"
+        )
+
+
+class TrajectoryReplay:
+    """
+    Replays a recorded trajectory file into the drum trackers, without running the pose estimation.
+    The landmarks are passed with their original timestamps, like MediaPipePose does with a detection,
+    either at the speed they were recorded at or as fast as the trackers allow.
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        real_time: bool = False,  # noqa: FBT001, FBT002
+        process_result: bool = False,  # noqa: FBT001, FBT002
+        landmark_filter: Optional[LandmarkFilter] = None,
+        chunk_size: int = 1024,
+    ) -> None:
+        """
+        :param file_path: The trajectory file to replay, binary or CSV
+        :param real_time: Replay at the speed of the recording and play the sounds,
+        otherwise replay as fast as possible without sound
+        :param process_result: Pass the landmarks through the ResultProcessor before the trackers
+        :param landmark_filter: Smooth the landmarks before the trackers, after the ResultProcessor
+        :param chunk_size: The number of frames read from the file at once
+        """
+        self.reader = TrajectoryReader(file_path)
+        self.real_time = real_time
+        self.chunk_size = chunk_size
+        self.landmark_filter = landmark_filter
+
+        if self.reader.landmark_type == LandmarkType.WORLD_LANDMARKS:
+            print("Replaying world landmarks, the trackers expect normalized landmarks")
+
+        if not real_time:
+            # The dummy driver allows the samples to be loaded without playing them
+            os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+        pygame.mixer.init()
+        self.drum_trackers = DrumTrackers(
+            sleep_option=SleepOption.SLEEP if real_time else SleepOption.NO_SLEEP
+        )
+
+        # Only the landmarks read by the trackers are converted, processed and filtered
+        self.used_landmarks = self.drum_trackers.markers
+
+        # With both landmark types the trackers and the processor use the normalized landmarks
+        self.result_processor = (
+            ResultProcessor(
+                landmark_type=LandmarkType.LANDMARKS
+                if self.reader.landmark_type == LandmarkType.BOTH
+                else self.reader.landmark_type,
+                indices=self.used_landmarks,
+            )
+            if process_result
+            else None
+        )
+
+    def run(self: Self) -> ReplayReport:
+        """
+        Replay every frame of the trajectory file
+        :return: The throughput statistics of the replay
+        """
+        frames = len(self.reader)
+        if frames == 0:
+            return ReplayReport(0, 0.0, 0.0)
+
+        first_timestamp_ms = int(self.reader.times[0])
+        start = time.perf_counter()
+        for chunk_start in range(0, frames, self.chunk_size):
+            records = slice(chunk_start, min(chunk_start + self.chunk_size, frames))
+            timestamps = self.reader.times[records].tolist()
+            for landmarks, timestamp_ms in zip(
+                self.reader.landmarks(records), timestamps, strict=True
+            ):
+                if self.real_time:
+                    delay_s = (timestamp_ms - first_timestamp_ms) / 1000 - (
+                        time.perf_counter() - start
+                    )
+                    if delay_s > 0:
+                        time.sleep(delay_s)
+
+                self.replay_frame(landmarks, timestamp_ms)
+
+        elapsed_s = time.perf_counter() - start
+        self.reader.close()
+        duration_s = (int(self.reader.times[-1]) - first_timestamp_ms) / 1000
+        return ReplayReport(frames, elapsed_s, duration_s)
+
+    def replay_frame(self: Self, recorded: LandmarkArray, timestamp_ms: int) -> None:
+        """
+        Pass the landmarks of a frame to the trackers, like MediaPipePose.result_callback
+        :param recorded: The landmarks of the frame as recorded, of shape (2, 33, 5) for both landmark types
+        """
+        used = self.used_landmarks
+        if self.reader.landmark_type == LandmarkType.BOTH:
+            landmarks = array_to_landmarks(recorded[0, used], used)
+            world_landmarks = array_to_landmarks(recorded[1, used], used)
+        else:
+            # The recorded landmarks are of a single type, the processor reads the type it was created for
+            landmarks = world_landmarks = array_to_landmarks(recorded[used], used)
+
+        if self.result_processor is not None:
+            result = self.result_processor.process_result(
+                PoseLandmarkerResult(
+                    pose_landmarks=[landmarks], pose_world_landmarks=[world_landmarks]
+                ),
+                timestamp_ms,
+            )
+            landmarks = result.pose_landmarks[0]
+
+        if self.landmark_filter is not None:
+            landmarks = array_to_landmarks(
+                self.landmark_filter.filter(
+                    landmarks_to_array(landmarks, used), timestamp_ms
+                ),
+                used,
+            )
+
+        self.drum_trackers.drum.check_calibrations()
+        self.drum_trackers.update(landmarks, timestamp_ms)
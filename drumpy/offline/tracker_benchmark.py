@@ -0,0 +1,201 @@
+import time
+from statistics import mean
+from typing import Optional, Self
+
+import numpy as np
+
+from drumpy.drum.drum import Drum, SleepOption
+from drumpy.drum.sound import Sound
+from drumpy.offline.filter_benchmark import HITTING_MARKERS
+from drumpy.pose.landmark_type import LandmarkType
+from drumpy.pose.mediapipe_markers import MarkerEnum
+from drumpy.tracking.marker_tracker import MarkerTracker
+from drumpy.tracking.tracker_engine import Positions, TrackerEngine
+from drumpy.trajectory_reader import TrajectoryReader
+from drumpy.util import Position
+
+# The downward and upward trend of the trackers of the hitting markers, the hands and the feet
+TRACKER_TRENDS = [(-0.1, 0.01), (-0.1, 0.01), (-0.04, 0.003), (-0.04, 0.003)]
+
+
+class HitCounter(Drum):
+    """
+    A drum without sounds that counts the hits instead of playing them
+    """
+
+    def __init__(self) -> None:
+        super().__init__([], sleep_option=SleepOption.NO_SLEEP)
+        self.hits = 0
+
+    def find_and_play_sound(
+        self: Self,
+        position: Position,  # noqa: ARG002
+        marker: MarkerEnum,  # noqa: ARG002
+        velocity: float,  # noqa: ARG002
+        sounds: Optional[list[Sound]] = None,  # noqa: ARG002
+    ) -> None:
+        self.hits += 1
+
+
+class ListMarkerTracker:
+    """
+    The hit detection of MarkerTracker before the ring buffers, the baseline of the tracker benchmark:
+    the history is kept in lists trimmed with pop(0) and the trends are averaged with statistics.mean
+    """
+
+    def __init__(
+        self,
+        marker: MarkerEnum,
+        drum: Drum,
+        sounds: list[Sound],
+        memory: int = 6,
+        downward_trend: float = -0.1,
+        upward_trend: float = 0.01,
+    ) -> None:
+        self.marker = marker
+        self.sounds = sounds
+        self.velocities: list[float] = []
+        self.positions: list[Position] = []
+        self.timestamps_ms: list[float] = []
+        self.time_until_next_hit = 2.0
+        self.memory = memory
+        self.look_ahead = 2
+        self.downward_trend = downward_trend
+        self.upward_trend = upward_trend
+        self.velocity = 0.0
+        self.drum = drum
+
+    def update(self: Self, position: Position, timestamp_ms: float) -> None:
+        if self.time_until_next_hit > 0:
+            self.time_until_next_hit -= 1
+
+        self.positions.append(position)
+        if len(self.positions) > self.memory:
+            self.positions.pop(0)
+
+        self.timestamps_ms.append(timestamp_ms)
+        if len(self.timestamps_ms) > self.memory:
+            self.timestamps_ms.pop(0)
+
+        velocity = self.get_velocity()
+        self.velocities.append(velocity)
+        if len(self.velocities) > self.memory:
+            self.velocities.pop(0)
+
+        if self.is_hit():
+            self.time_until_next_hit = self.memory / 2
+            self.drum.find_and_play_sound(
+                self.positions[-self.look_ahead],
+                self.marker,
+                self.velocity,
+                self.sounds,
+            )
+
+    def get_velocity(self: Self) -> float:
+        if len(self.positions) < 2:  # noqa: PLR2004
+            return 0
+
+        time_delta = self.timestamps_ms[-1] - self.timestamps_ms[-2]
+        position_delta = float(self.positions[-1][2] - self.positions[-2][2])
+        return position_delta / time_delta * 1000
+
+    def is_hit(self: Self) -> bool:
+        if len(self.positions) < self.memory:
+            return False
+
+        avg_z_vel = mean(self.velocities[: -self.look_ahead])
+        self.velocity = avg_z_vel
+        avg_z_look_ahead = mean(self.velocities[-self.look_ahead :])
+
+        return (
+            avg_z_vel < self.downward_trend
+            and avg_z_look_ahead > self.upward_trend
+            and self.time_until_next_hit == 0
+        )
+
+
+class TrackerReport:
+    """
+    Cost of a hit detection over a recorded trajectory
+    """
+
+    def __init__(self, name: str, updates: int, elapsed_s: float, hits: int) -> None:
+        """
+        :param name: The name of the hit detection
+        :param updates: The number of tracker updates, frames times trackers
+        :param elapsed_s: The time spent in the hit detection, in seconds
+        :param hits: The number of hits detected
+        """
+        self.name = name
+        self.updates = updates
+        self.elapsed_s = elapsed_s
+        self.us_per_update = elapsed_s / updates * 1e6 if updates > 0 else 0.0
+        self.hits = hits
+
+    def __str__(self: Self) -> str:
+        return f"{self.name:>12}: {self.us_per_update:8.2f} us/update, {self.hits} hits"
+
+
+def hitting_positions(reader: TrajectoryReader) -> Positions:
+    """
+    The positions of the hitting markers in every frame of a trajectory file, with the axes of the trackers,
+    the normalized landmarks of a file with both types
+    :return: The positions, of shape (frames, markers, 3)
+    """
+    landmark_type = (
+        LandmarkType.LANDMARKS if reader.landmark_type == LandmarkType.BOTH else None
+    )
+    landmarks = np.array(reader.landmarks(slice(0, len(reader)), landmark_type))
+    x, y, z = np.moveaxis(landmarks[:, HITTING_MARKERS, :3].astype(np.float64), 2, 0)
+    return np.stack((z, y, -x), axis=2)
+
+
+def benchmark_tracker(
+    name: str,
+    tracker_type: type[MarkerTracker | ListMarkerTracker],
+    positions: Positions,
+    timestamps_ms: list[float],
+) -> TrackerReport:
+    """
+    Update a tracker per hitting marker with its position in every frame, one tracker at a time
+    :param tracker_type: The single marker tracker to measure
+    :param positions: The positions of the hitting markers, of shape (frames, markers, 3)
+    """
+    drum = HitCounter()
+    trackers = [
+        tracker_type(
+            marker,
+            drum,
+            [],
+            downward_trend=downward_trend,
+            upward_trend=upward_trend,
+        )
+        for marker, (downward_trend, upward_trend) in zip(
+            HITTING_MARKERS, TRACKER_TRENDS, strict=True
+        )
+    ]
+    start = time.perf_counter()
+    for frame, timestamp_ms in zip(positions, timestamps_ms, strict=True):
+        for tracker, position in zip(trackers, frame, strict=True):
+            tracker.update(position, timestamp_ms)
+    elapsed_s = time.perf_counter() - start
+    return TrackerReport(name, positions.shape[0] * len(trackers), elapsed_s, drum.hits)
+
+
+def benchmark_engine(positions: Positions, timestamps_ms: list[float]) -> TrackerReport:
+    """
+    Update the trackers of all hitting markers at once with a TrackerEngine
+    :param positions: The positions of the hitting markers, of shape (frames, markers, 3)
+    """
+    engine = TrackerEngine(
+        [downward_trend for downward_trend, _ in TRACKER_TRENDS],
+        [upward_trend for _, upward_trend in TRACKER_TRENDS],
+    )
+    hits = 0
+    start = time.perf_counter()
+    for frame, timestamp_ms in zip(positions, timestamps_ms, strict=True):
+        hits += len(engine.update(frame, timestamp_ms))
+    elapsed_s = time.perf_counter() - start
+    return TrackerReport(
+        "engine", positions.shape[0] * len(TRACKER_TRENDS), elapsed_s, hits
+    )
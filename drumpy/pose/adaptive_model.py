@@ -0,0 +1,119 @@
+from typing import Optional, Self
+
+from drumpy.pose.landmarker_model import LandmarkerModel
+
+# The models ordered from the cheapest to the most expensive
+MODELS_BY_COST = [LandmarkerModel.LITE, LandmarkerModel.FULL, LandmarkerModel.HEAVY]
+
+
+class AdaptiveModelSelector:
+    """
+    Selects the landmarker model at runtime to stay within a latency target.
+    The latency is smoothed with an exponential moving average. When it stays above the target
+    the selector degrades to a cheaper model, when it stays well below the target it upgrades
+    to a more expensive one. The latency has to stay on one side for a number of frames before
+    switching, and a model that was recently measured to be too slow is not upgraded to again,
+    so the selection does not flap between two models. The measurement expires after a cooldown,
+    the load of the machine can drop and make the model fast enough.
+    """
+
+    def __init__(
+        self,
+        latency_target_ms: float,
+        initial_model: LandmarkerModel = LandmarkerModel.FULL,
+        models: Optional[list[LandmarkerModel]] = None,
+        upgrade_margin: float = 0.6,
+        patience: int = 30,
+        smoothing: float = 0.1,
+        reprobe_after: int = 900,
+    ) -> None:
+        """
+        :param latency_target_ms: The latency to stay under, in milliseconds
+        :param initial_model: The model to start with
+        :param models: The models to choose from, ordered from cheapest to most expensive
+        :param upgrade_margin: Upgrade when the latency is below this fraction of the target
+        :param patience: The number of consecutive frames the latency has to be out of bounds before switching
+        :param smoothing: The weight of a new latency in the moving average
+        :param reprobe_after: The number of frames after which a model measured to be too slow can be tried again
+        """
+        self.latency_target_ms = latency_target_ms
+        self.models = models if models is not None else MODELS_BY_COST
+        assert initial_model in self.models, f"{initial_model} is not selectable"
+        self.index = self.models.index(initial_model)
+        self.upgrade_margin = upgrade_margin
+        self.patience = patience
+        self.smoothing = smoothing
+        self.reprobe_after = reprobe_after
+
+        self.frames = 0  # The number of frames registered so far
+        self.average_latency_ms: Optional[float] = None
+        self.frames_over = 0  # consecutive frames above the target
+        self.frames_under = 0  # consecutive frames below the upgrade margin
+
+        # The last measured average latency of every model that was switched away from,
+        # and the frame it was measured at
+        self.model_latencies_ms: dict[LandmarkerModel, tuple[float, int]] = {}
+
+    @property
+    def model(self: Self) -> LandmarkerModel:
+        return self.models[self.index]
+
+    def update(self: Self, latency_ms: float) -> LandmarkerModel:
+        """
+        Register the latency of a frame processed with the current model
+        :return: The model to use for the next frames
+        """
+        self.frames += 1
+        if self.average_latency_ms is None:
+            self.average_latency_ms = latency_ms
+        else:
+            self.average_latency_ms += self.smoothing * (
+                latency_ms - self.average_latency_ms
+            )
+
+        if self.average_latency_ms > self.latency_target_ms:
+            self.frames_over += 1
+            self.frames_under = 0
+        elif self.average_latency_ms < self.latency_target_ms * self.upgrade_margin:
+            self.frames_under += 1
+            self.frames_over = 0
+        else:
+            self.frames_over = 0
+            self.frames_under = 0
+
+        if self.frames_over >= self.patience and self.index > 0:
+            self.switch(self.index - 1)
+        elif (
+            self.frames_under >= self.patience
+            and self.index < len(self.models) - 1
+            and not self.too_slow(self.models[self.index + 1])
+        ):
+            self.switch(self.index + 1)
+
+        return self.model
+
+    def too_slow(self: Self, model: LandmarkerModel) -> bool:
+        """
+        Whether the model was measured to be too slow in the last reprobe_after frames
+        """
+        measurement = self.model_latencies_ms.get(model)
+        if measurement is None:
+            return False
+
+        latency_ms, frame = measurement
+        return (
+            latency_ms > self.latency_target_ms
+            and self.frames - frame < self.reprobe_after
+        )
+
+    def switch(self: Self, index: int) -> None:
+        assert self.average_latency_ms is not None
+        self.model_latencies_ms[self.model] = (self.average_latency_ms, self.frames)
+        print(
+            f"Switching model from {self.model.name} to {self.models[index].name}, "
+            f"latency: {self.average_latency_ms:.2f} ms, target: {self.latency_target_ms:.2f} ms"
+        )
+        self.index = index
+        self.average_latency_ms = None
+        self.frames_over = 0
+        self.frames_under = 0
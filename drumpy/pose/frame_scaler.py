@@ -0,0 +1,35 @@
+from typing import Self
+
+import cv2
+import numpy as np
+import numpy.typing as npt
+
+
+class FrameScaler:
+    """
+    Downscales frames to the working resolution of the landmarker before they are passed to mediapipe.
+    The landmarker resizes its input internally anyway, scaling beforehand shrinks the image that is
+    copied into mediapipe. Area interpolation is used as it does not alias when downscaling.
+    The display keeps using the full resolution frame.
+    """
+
+    def __init__(self, size: int = 512) -> None:
+        """
+        :param size: The width and height of the scaled frames, frames that are not larger are left untouched
+        """
+        self.size = size
+        # The scaled frame, reused for every frame
+        self.buffer: npt.NDArray[np.uint8] = np.empty((size, size, 3), dtype=np.uint8)
+
+    def scale(self: Self, frame: npt.NDArray[np.uint8]) -> npt.NDArray[np.uint8]:
+        """
+        Scale a square frame down to the working resolution
+        :return: The scaled frame, a buffer that is overwritten by the next call
+        """
+        if frame.shape[0] <= self.size:
+            return frame
+
+        cv2.resize(
+            frame, (self.size, self.size), dst=self.buffer, interpolation=cv2.INTER_AREA
+        )
+        return self.buffer
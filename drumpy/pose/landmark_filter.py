@@ -0,0 +1,207 @@
+import math
+from abc import ABC, abstractmethod
+from enum import Enum
+from typing import Optional, Self
+
+import numpy as np
+import numpy.typing as npt
+
+from drumpy.util import LandmarkArray
+
+# Per landmark and axis state of a filter, of shape (n, 3) for the n filtered landmarks
+FilterState = npt.NDArray[np.float64]
+
+
+class FilterType(Enum):
+    """
+    The filters that can be applied to the landmarks before they are tracked
+    """
+
+    NONE = "none"
+    ONE_EURO = "one-euro"
+    KALMAN = "kalman"
+
+    @staticmethod
+    def from_str(filter_type: str) -> "FilterType":
+        match filter_type.lower():
+            case "none":
+                return FilterType.NONE
+            case "one-euro":
+                return FilterType.ONE_EURO
+            case "kalman":
+                return FilterType.KALMAN
+            case _:
+                raise ValueError(f"Invalid filter: {filter_type}")
+
+
+class LandmarkFilter(ABC):
+    """
+    Smooths the x, y and z coordinates of the given landmarks of a pose at once.
+    Every coordinate is filtered independently, the visibility and presence are passed through.
+    """
+
+    def __init__(self) -> None:
+        self.timestamp_ms: Optional[float] = None
+
+    def filter(
+        self: Self, landmarks: LandmarkArray, timestamp_ms: float
+    ) -> LandmarkArray:
+        """
+        Filter the landmarks of a frame, the frames should be passed in order of their timestamps
+        :param landmarks: The landmarks as an array of shape (n, 5)
+        :return: A new array with the filtered landmarks
+        """
+        filtered = landmarks.copy()
+        positions = landmarks[:, :3].astype(np.float64)
+        if self.timestamp_ms is None or timestamp_ms <= self.timestamp_ms:
+            # The first frame, or a frame that is out of order, starts the filter over
+            self.start(positions)
+        else:
+            filtered[:, :3] = self.step(
+                positions, (timestamp_ms - self.timestamp_ms) / 1000
+            )
+
+        self.timestamp_ms = timestamp_ms
+        return filtered
+
+    def reset(self: Self) -> None:
+        """
+        Forget the previous frames, used when the pose is lost
+        """
+        self.timestamp_ms = None
+
+    @abstractmethod
+    def start(self: Self, positions: FilterState) -> None:
+        """
+        Initialize the state with the positions of the first frame, which are passed through unfiltered
+        """
+
+    @abstractmethod
+    def step(self: Self, positions: FilterState, time_delta_s: float) -> FilterState:
+        """
+        Filter the positions of the next frame
+        :param time_delta_s: The time since the previous frame, in seconds
+        """
+
+
+class OneEuroFilter(LandmarkFilter):
+    """
+    The One Euro filter: a low pass filter with a cutoff frequency that rises with the speed of the landmark.
+    Slow landmarks are smoothed strongly to remove jitter, fast landmarks barely, so a stroke is not delayed.
+    See https://gery.casiez.net/1euro/
+    """
+
+    def __init__(
+        self, min_cutoff: float = 1.0, beta: float = 50.0, d_cutoff: float = 1.0
+    ) -> None:
+        """
+        :param min_cutoff: The cutoff frequency of a landmark at rest, in Hz, lower removes more jitter
+        :param beta: The increase of the cutoff frequency per unit of speed, higher reduces the lag of fast moves
+        :param d_cutoff: The cutoff frequency of the speed estimate, in Hz
+        """
+        super().__init__()
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.positions: FilterState = np.zeros(0)
+        self.speeds: FilterState = np.zeros(0)
+
+    @staticmethod
+    def smoothing_factor(
+        cutoff: FilterState | float, time_delta_s: float
+    ) -> FilterState | float:
+        return 1 / (1 + 1 / (2 * math.pi * cutoff * time_delta_s))
+
+    def start(self: Self, positions: FilterState) -> None:
+        self.positions = positions
+        self.speeds = np.zeros_like(positions)
+
+    def step(self: Self, positions: FilterState, time_delta_s: float) -> FilterState:
+        speeds = (positions - self.positions) / time_delta_s
+        d_alpha = self.smoothing_factor(self.d_cutoff, time_delta_s)
+        self.speeds = self.speeds + d_alpha * (speeds - self.speeds)
+
+        cutoff = self.min_cutoff + self.beta * np.abs(self.speeds)
+        alpha = self.smoothing_factor(cutoff, time_delta_s)
+        self.positions = self.positions + alpha * (positions - self.positions)
+        return self.positions
+
+
+class KalmanFilter(LandmarkFilter):
+    """
+    A constant velocity Kalman filter for every coordinate, with the position and the velocity as state.
+    The 2x2 covariance matrices of all coordinates are kept as three arrays, so a frame is a few array operations.
+    The process noise is white noise acceleration, a larger process noise follows sudden moves more closely.
+    """
+
+    def __init__(
+        self, process_noise: float = 1.0, measurement_noise: float = 2.5e-5
+    ) -> None:
+        """
+        :param process_noise: The spectral density of the acceleration, in units^2 / s^3
+        :param measurement_noise: The variance of a detected coordinate, in units^2
+        """
+        super().__init__()
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        self.positions: FilterState = np.zeros(0)
+        self.velocities: FilterState = np.zeros(0)
+        # The covariance of the position, of the position and the velocity, and of the velocity
+        self.position_variance: FilterState = np.zeros(0)
+        self.covariance: FilterState = np.zeros(0)
+        self.velocity_variance: FilterState = np.zeros(0)
+
+    def start(self: Self, positions: FilterState) -> None:
+        self.positions = positions
+        self.velocities = np.zeros_like(positions)
+        self.position_variance = np.full_like(positions, self.measurement_noise)
+        self.covariance = np.zeros_like(positions)
+        # The velocity is unknown, any stroke speed is plausible
+        self.velocity_variance = np.full_like(positions, 100.0)
+
+    def step(self: Self, positions: FilterState, time_delta_s: float) -> FilterState:
+        # Predict
+        dt = time_delta_s
+        q = self.process_noise
+        predicted = self.positions + self.velocities * dt
+        position_variance = (
+            self.position_variance
+            + dt * (2 * self.covariance + dt * self.velocity_variance)
+            + q * dt**3 / 3
+        )
+        covariance = self.covariance + dt * self.velocity_variance + q * dt**2 / 2
+        velocity_variance = self.velocity_variance + q * dt
+
+        # Update with the detected positions
+        innovation_variance = position_variance + self.measurement_noise
+        position_gain = position_variance / innovation_variance
+        velocity_gain = covariance / innovation_variance
+        innovation = positions - predicted
+
+        self.positions = predicted + position_gain * innovation
+        self.velocities = self.velocities + velocity_gain * innovation
+        self.position_variance = (1 - position_gain) * position_variance
+        self.covariance = (1 - position_gain) * covariance
+        self.velocity_variance = velocity_variance - velocity_gain * covariance
+        return self.positions
+
+
+def create_filter(
+    filter_type: FilterType,
+    min_cutoff: float = 1.0,
+    beta: float = 50.0,
+    d_cutoff: float = 1.0,
+    process_noise: float = 1.0,
+    measurement_noise: float = 2.5e-5,
+) -> Optional[LandmarkFilter]:
+    """
+    Create a filter of the given type, the parameters of the other filters are ignored
+    :return: The filter, None for FilterType.NONE
+    """
+    match filter_type:
+        case FilterType.ONE_EURO:
+            return OneEuroFilter(min_cutoff, beta, d_cutoff)
+        case FilterType.KALMAN:
+            return KalmanFilter(process_noise, measurement_noise)
+        case FilterType.NONE:
+            return None
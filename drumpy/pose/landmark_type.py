@@ -17,7 +17,11 @@ class LandmarkType(Enum):
     The output contains the following world coordinates (WorldLandmarks):
         - x, y, and z: Real-world 3-dimensional coordinates in meters, with the midpoint of the hips as the origin.
         - visibility: The likelihood of the landmark being visible within the image.
+
+    BOTH is not a MediaPipe output, it logs the normalized and the world coordinates of a frame together,
+    as an array of shape (2, 33, 5) with the normalized landmarks first.
     """
 
     LANDMARKS = 0
     WORLD_LANDMARKS = 1
+    BOTH = 2
@@ -0,0 +1,102 @@
+from typing import Self
+
+import numpy as np
+import numpy.typing as npt
+
+from drumpy.util import LandmarkArray
+
+# The x, y, z positions of the compensated landmarks, of shape (landmarks, 3)
+Positions = npt.NDArray[np.float64]
+
+
+class LatencyCompensator:
+    """
+    Extrapolates the landmarks of a detection from the timestamp of their frame to the time they are tracked at.
+    A result arrives the inference latency after its frame was submitted,
+    the trackers see the landmarks where they are expected to be now instead of where they were in the frame.
+    The motion of every coordinate is a least squares fit of a line, or a parabola with the acceleration,
+    through the most recent detections, a single frame difference would amplify the jitter of the landmarks.
+    The extrapolation is capped in time and in distance, so a wrong estimate can not throw a landmark far off.
+    """
+
+    def __init__(
+        self,
+        max_horizon_ms: float = 50.0,
+        max_distance: float = 0.05,
+        window: int = 4,
+        acceleration: bool = False,  # noqa: FBT001, FBT002
+    ) -> None:
+        """
+        :param max_horizon_ms: The longest time the landmarks are extrapolated over, in ms
+        :param max_distance: The longest distance a landmark is moved, in the units of the landmarks
+        :param window: The number of detections the motion is fitted through, a larger window is smoother but lags
+        :param acceleration: Extrapolate with the acceleration as well as the velocity,
+        follows the turn at the bottom of a stroke sooner but is far more sensitive to jitter
+        """
+        self.max_horizon_ms = max_horizon_ms
+        self.max_distance = max_distance
+        self.degree = 2 if acceleration else 1
+        assert window > self.degree, (
+            "The window should be longer than the degree of the fit"
+        )
+        self.window = window
+
+        # The positions and timestamps of the most recent detections, from oldest to newest
+        self.positions: list[Positions] = []
+        self.timestamps_ms: list[float] = []
+
+    def reset(self: Self) -> None:
+        """
+        Forget the detections, used when the pose is lost
+        """
+        self.positions = []
+        self.timestamps_ms = []
+
+    def update(self: Self, landmarks: LandmarkArray, timestamp_ms: float) -> None:
+        """
+        Register a detection
+        :param landmarks: The landmarks as an array of shape (landmarks, 5)
+        :param timestamp_ms: The timestamp of the frame the landmarks were detected in
+        """
+        if len(self.timestamps_ms) > 0 and timestamp_ms <= self.timestamps_ms[-1]:
+            return
+
+        self.positions.append(landmarks[:, :3].astype(np.float64))
+        self.timestamps_ms.append(timestamp_ms)
+        if len(self.positions) > self.window:
+            self.positions.pop(0)
+            self.timestamps_ms.pop(0)
+
+    def extrapolate(
+        self: Self, landmarks: LandmarkArray, horizon_ms: float
+    ) -> LandmarkArray:
+        """
+        Move the landmarks ahead in time with the fitted motion
+        The visibility and presence are kept
+        :param landmarks: The landmarks as an array of shape (landmarks, 5), the latest detection or a prediction
+        :param horizon_ms: The time to extrapolate over, in ms, capped at max_horizon_ms
+        :return: A new array with the extrapolated landmarks,
+        a copy of the landmarks until the window is filled
+        """
+        extrapolated = landmarks.copy()
+        horizon_ms = min(max(horizon_ms, 0.0), self.max_horizon_ms)
+        if len(self.positions) < self.window or horizon_ms == 0:
+            return extrapolated
+
+        # Relative to the newest detection, so the coefficients are the derivatives at that detection
+        times = np.array(self.timestamps_ms) - self.timestamps_ms[-1]
+        design = np.vander(times, self.degree + 1, increasing=True)
+        history = np.stack(self.positions)
+        coefficients = np.linalg.lstsq(
+            design, history.reshape(self.window, -1), rcond=None
+        )[0].reshape(self.degree + 1, *history.shape[1:])
+
+        # The change of the fitted curve over the horizon, the constant term drops out
+        displacement = sum(
+            coefficients[power] * horizon_ms**power
+            for power in range(1, self.degree + 1)
+        )
+        distance = np.linalg.norm(displacement, axis=1, keepdims=True)
+        scale = np.minimum(1.0, self.max_distance / np.maximum(distance, 1e-12))
+        extrapolated[:, :3] += displacement * scale
+        return extrapolated
@@ -1,15 +1,35 @@
-from typing import Self, Optional
+import copy
+import threading
+import time
+from collections import deque
+from typing import Self, Optional, TypeVar
 
 import numpy as np
 import numpy.typing as npt
+from drumpy.pose.adaptive_model import AdaptiveModelSelector
+from drumpy.pose.frame_scaler import FrameScaler
+from drumpy.pose.landmark_filter import LandmarkFilter
 from drumpy.pose.landmark_type import LandmarkType
+from drumpy.pose.latency_compensator import LatencyCompensator
 from drumpy.pose.landmarker_model import LandmarkerModel
+from drumpy.pose.motion_model import VelocityModel
+from drumpy.pose.person_matcher import PersonMatcher
+from drumpy.pose.region_of_interest import Region, RegionOfInterest
+from drumpy.binary_trajectory_file import BinaryTrajectoryFile
+from drumpy.landmark_publisher import LandmarkPublisher
 from drumpy.tracking.drum_trackers import DrumTrackers
-from drumpy.trajectory_file import TrajectoryFile
+from drumpy.tracking.performer_trackers import PerformerTrackers
+from drumpy.trajectory_writer import open_trajectory_file
+from drumpy.util import (
+    LANDMARK_FIELDS,
+    NUM_LANDMARKS,
+    LandmarkArray,
+    array_to_landmarks,
+    landmarks_to_array,
+)
 from mediapipe import Image, ImageFormat
-from mediapipe.framework.formats import landmark_pb2
-from mediapipe.python import solutions
 from mediapipe.tasks.python import BaseOptions
+from mediapipe.tasks.python.components.containers.landmark import NormalizedLandmark
 from mediapipe.tasks.python.vision import (
     PoseLandmarkerOptions,
     PoseLandmarker,
@@ -18,38 +38,23 @@ from mediapipe.tasks.python.vision import (
 )
 from drumpy.pose.process_result import ResultProcessor
 
+T = TypeVar("T")
+
 
-def visualize_landmarks(
-    rgb_image: npt.NDArray[np.float64], detection_result: PoseLandmarkerResult
-) -> npt.NDArray[np.float64]:
+def pop_pending(pending: deque[tuple[int, T]], timestamp_ms: int) -> Optional[T]:
     """
-    Visualize the landmarks on the image given the landmarks and the image
+    Take the entry of a frame from the entries of the frames that are still being processed
+    The entries are appended in timestamp order on the thread that submits the frames and only taken
+    on the result thread, a deque is safe for one appending and one popping thread.
+    The entries of older frames are dropped, frames dropped in live stream mode never get a result
+    :param pending: The timestamp and the entry of every pending frame, ordered by timestamp
+    :return: The entry of the frame, None if there is none
     """
-    rgb_image = np.copy(rgb_image)  # Make a copy of the image
-    pose_landmarks_list = detection_result.pose_landmarks
-
-    # Loop through the detected poses to visualize.
-    for idx in range(len(pose_landmarks_list)):
-        pose_landmarks = pose_landmarks_list[idx]
-
-        # Draw the pose landmarks.
-        pose_landmarks_proto = landmark_pb2.NormalizedLandmarkList()
-        pose_landmarks_proto.landmark.extend(
-            [
-                landmark_pb2.NormalizedLandmark(
-                    x=landmark.x, y=landmark.y, z=landmark.z
-                )
-                for landmark in pose_landmarks
-            ]
-        )
-        solutions.drawing_utils.draw_landmarks(
-            rgb_image,
-            pose_landmarks_proto,
-            solutions.pose.POSE_CONNECTIONS,
-            solutions.drawing_styles.get_default_pose_landmarks_style(),
-        )
-
-    return rgb_image
+    while len(pending) > 0 and pending[0][0] < timestamp_ms:
+        pending.popleft()
+    if len(pending) > 0 and pending[0][0] == timestamp_ms:
+        return pending.popleft()[1]
+    return None
 
 
 class MediaPipePose:
@@ -57,7 +62,7 @@ class MediaPipePose:
     Class to handle the pose estimation using MediaPipe
     """
 
-    def __init__(
+    def __init__(  # noqa: PLR0913, PLR0917
         self: Self,
         running_mode: RunningMode,
         landmark_type: LandmarkType,
@@ -65,6 +70,17 @@ class MediaPipePose:
         model: LandmarkerModel = LandmarkerModel.FULL,
         delegate: BaseOptions.Delegate = BaseOptions.Delegate.GPU,
         log_file: Optional[str] = None,
+        visualize: bool = True,  # noqa: FBT001, FBT002
+        region_of_interest: Optional[RegionOfInterest] = None,
+        adaptive_model: Optional[AdaptiveModelSelector] = None,
+        inference_stride: int = 1,
+        frame_scaler: Optional[FrameScaler] = None,
+        write_behind: bool = True,  # noqa: FBT001, FBT002
+        publisher: Optional[LandmarkPublisher] = None,
+        process_result: bool = False,  # noqa: FBT001, FBT002
+        landmark_filter: Optional[LandmarkFilter] = None,
+        latency_compensator: Optional[LatencyCompensator] = None,
+        num_poses: int = 1,
     ) -> None:
         """
         Initialize the MediaPipePose class
@@ -73,76 +89,455 @@ class MediaPipePose:
         :param model: The model to use for the pose estimation
         :param log_file: The file to log the landmarks to, if None no logging will be done
         :param delegate: The delegate to use for the pose estimation, Either CPU or GPU
+        :param visualize: Whether to keep the landmarks to draw on the display, disable when nothing is displayed
+        :param region_of_interest: Only pass the region around the previous pose to the landmarker,
+        if None the full frame is always used
+        :param adaptive_model: Switch between models at runtime to stay within a latency target,
+        if None the given model is always used
+        :param inference_stride: Only pass every n-th frame to the landmarker, the landmarks of the frames
+        in between are extrapolated from the previous detections. Only supported in video mode: in live stream mode
+        the result of a frame arrives after the following frames are extrapolated, too late to be tracked
+        :param frame_scaler: Downscale the frames before passing them to the landmarker,
+        if None the frames are passed at their original resolution
+        :param write_behind: Write the landmarks to the log file on a background thread,
+        so a slow disk does not delay the result callback
+        :param publisher: Publish the landmarks of every tracked frame to live consumers, the world landmarks
+        of every detected frame, if None nothing is published
+        :param process_result: Correct implausible landmarks with the ResultProcessor before they are tracked and logged
+        :param landmark_filter: Smooth the normalized landmarks, which the drum trackers use, before they are tracked
+        and logged, the world landmarks are logged as detected, if None no landmarks are smoothed
+        :param latency_compensator: Extrapolate the tracked landmarks over the measured inference latency,
+        if None the landmarks are tracked as detected
+        :param num_poses: The maximum number of persons to detect, every person gets stable identity
+        and their own drum trackers, see performers. With more than one person the region of interest,
+        the inference stride, the result processor and the latency compensation are not supported,
+        the first detected pose is logged and the landmarks of every person are published with their identity
         """
+        assert inference_stride == 1 or running_mode == RunningMode.VIDEO, (
+            "The inference stride is only supported in video mode"
+        )
+        assert num_poses == 1 or (
+            region_of_interest is None
+            and inference_stride == 1
+            and not process_result
+            and latency_compensator is None
+        ), "Only the landmark filter is supported with more than one pose"
+        self.num_poses = num_poses
+
         self.frame_count = 0
-        self.model = model
+        self.delegate = delegate
+        self.adaptive_model = adaptive_model
+        self.model = model if adaptive_model is None else adaptive_model.model
 
-        self.options = PoseLandmarkerOptions(
-            base_options=BaseOptions(
-                model_asset_path=self.model.value,
-                delegate=delegate,
-            ),
-            running_mode=running_mode,
-            result_callback=self.result_callback
-            if running_mode == RunningMode.LIVE_STREAM
-            else None,
-        )
+        self.options = self.create_options(self.model, running_mode)
 
-        self.landmarker = PoseLandmarker.create_from_options(self.options)
+        # A landmarker for every model that can be selected
+        models = [self.model] if adaptive_model is None else adaptive_model.models
+        self.landmarkers = {
+            model: PoseLandmarker.create_from_options(
+                self.create_options(model, running_mode)
+            )
+            for model in models
+        }
+        self.landmarker = self.landmarkers[self.model]
         self.detection_result = None
         self.latest_timestamp: int = (
             0  # The timestamp of the latest frame that was processed
         )
         self.latency: int = 0  # The latency of the pose estimation, in milliseconds
-        self.visualisation: npt.NDArray[np.float32] | None = None
+        # The wall clock time from submitting a frame until its result, in milliseconds
+        self.inference_latency_ms: float = 0.0
+        # The wall clock time every frame that is still being processed was submitted at, ordered by timestamp
+        self.submit_times: deque[tuple[int, float]] = deque()
+        # The landmarks of every detected pose in the latest result, to draw on the display
+        self.visible_landmarks: list[LandmarkArray] = []
+        self.visualize = visualize
 
         self.landmark_type = landmark_type
 
         self.csv_writer = None
         if log_file is not None:
             self.log_file_path = log_file
-            self.csv_writer = TrajectoryFile(self.log_file_path)
+            self.csv_writer = open_trajectory_file(
+                self.log_file_path, landmark_type, write_behind
+            )
+        # Files the landmarks of the given type are written to as well, to fill the landmark cache
+        self.cache_writers: dict[LandmarkType, BinaryTrajectoryFile] = {}
 
         self.drum_trackers = drum_trackers
+        self.publisher = publisher
 
-        self.result_processor = ResultProcessor(landmark_type=self.landmark_type)
+        # With more than one pose, the drum trackers of every person by identity, drum_trackers is not used
+        self.performers: list[DrumTrackers] = []
+        # The hit detection of all performers in a single engine, created with the selection of the used landmarks
+        self.performer_trackers: Optional[PerformerTrackers] = None
+        self.person_matcher = PersonMatcher(num_poses) if num_poses > 1 else None
+        # With more than one pose, the filter of every identity, so a person is filtered over their own detections
+        self.performer_filters: list[LandmarkFilter] = (
+            [copy.deepcopy(landmark_filter) for _ in range(num_poses)]
+            if landmark_filter is not None and num_poses > 1
+            else []
+        )
+
+        self.process_result = process_result
+        self.landmark_filter = landmark_filter
+        # Created with the used landmarks on the first result, see select_used_landmarks
+        self.result_processor: Optional[ResultProcessor] = None
+        # The indices of the landmarks that are processed, filtered, extrapolated and tracked, fixed on the first result
+        self.used_landmarks: Optional[list[int]] = None
+
+        self.region_of_interest = region_of_interest
+        # The cropped region of every frame that is still being processed, ordered by timestamp
+        self.pending_regions: deque[tuple[int, Region]] = deque()
+
+        assert inference_stride >= 1, "The inference stride should be at least 1"
+        self.inference_stride = inference_stride
+        self.frame_index = 0  # The number of frames passed to process_image
+        self.motion_model = VelocityModel()
+        self.latency_compensator = latency_compensator
+        # The timestamp of the latest landmarks passed to the drum trackers
+        self.tracked_timestamp_ms: int = -1
+        # Held while the drum trackers are updated, in live stream mode detections arrive on the result thread
+        self.tracking_lock = threading.Lock()
+
+        self.frame_scaler = frame_scaler
+        # The size of the latest image passed to the landmarker, mediapipe copies it
+        self.image_nbytes = 0
+
+        self.running_mode = running_mode
+        # Added to the timestamps passed to the landmarkers, so the first frame comes after the warm-up frame
+        self.timestamp_offset_ms = 0
+        self.warming_up = False
+        self.warm_up_done = threading.Event()
+
+    def create_options(
+        self: Self, model: LandmarkerModel, running_mode: RunningMode
+    ) -> PoseLandmarkerOptions:
+        return PoseLandmarkerOptions(
+            base_options=BaseOptions(
+                model_asset_path=model.value,
+                delegate=self.delegate,
+            ),
+            running_mode=running_mode,
+            num_poses=self.num_poses,
+            result_callback=self.result_callback
+            if running_mode == RunningMode.LIVE_STREAM
+            else None,
+        )
 
     def result_callback(
-        self: Self, result: PoseLandmarkerResult, image: Image, timestamp_ms: int
+        self: Self,
+        result: PoseLandmarkerResult,
+        image: Image,  # noqa: ARG002
+        timestamp_ms: int,
     ) -> None:
         """
         Callback method to receive the result of the pose estimation
         :param result:
         :param image: Original image the landmarks were detected on
-        :param timestamp_ms: The timestamp of the frame
+        :param timestamp_ms: The timestamp of the frame, as passed to the landmarker
         :return:
         """
-        # result = self.result_processor.process_result(result, timestamp_ms)
+        if self.warming_up:
+            self.warm_up_done.set()
+            return
+
+        timestamp_ms -= self.timestamp_offset_ms
+        self.measure_latency(timestamp_ms)
+
+        if self.region_of_interest is not None:
+            self.map_region(result, timestamp_ms)
+
+        if self.used_landmarks is None:
+            self.select_used_landmarks()
+
+        if self.process_result:
+            result = self.result_processor.process_result(result, timestamp_ms)
+        if self.landmark_filter is not None and self.person_matcher is None:
+            self.filter_landmarks(result, timestamp_ms)
         self.detection_result = result
         self.latency = timestamp_ms - self.latest_timestamp
         self.latest_timestamp = timestamp_ms
         if self.drum_trackers is not None:
             self.drum_trackers.drum.check_calibrations()
+        for drum_trackers in self.performers:
+            drum_trackers.drum.check_calibrations()
+        with self.tracking_lock:
+            if self.person_matcher is not None:
+                self.track_performers(result, timestamp_ms)
+            else:
+                self.track_detection(result, timestamp_ms)
+
+        if self.visualize:
+            self.visible_landmarks = [
+                landmarks_to_array(pose_landmarks)
+                for pose_landmarks in result.pose_landmarks
+            ]
+
+        self.frame_count += 1
+        if self.csv_writer is not None or len(self.cache_writers) > 0:
+            self.write_landmarks(result, timestamp_ms)
+
+    def select_used_landmarks(self: Self) -> None:
+        """
+        Select the landmarks that are consumed after the pose estimation.
+        The log file, the landmark cache and the publisher consume all landmarks,
+        otherwise only the markers of the drum trackers are processed, filtered and extrapolated.
+        Selected once, on the first result, as the drum trackers and the cache writers are set after construction.
+        The selection is not revisited: the drum trackers, the performers and the writers should be set
+        before the first frame is detected, the filter, motion model and latency compensator keep state
+        in the shape of the selection.
+        """
+        trackers = self.performers[0] if self.performers else self.drum_trackers
         if (
-            result.pose_world_landmarks is not None
-            and len(result.pose_world_landmarks) > 0
-            and self.drum_trackers is not None
+            trackers is None
+            or self.csv_writer is not None
+            or len(self.cache_writers) > 0
+            or self.publisher is not None
         ):
-            self.drum_trackers.update(result.pose_landmarks[0], timestamp_ms)
+            self.used_landmarks = list(range(NUM_LANDMARKS))
+        else:
+            self.used_landmarks = trackers.markers
+        if len(self.performers) > 0:
+            self.performer_trackers = PerformerTrackers(
+                self.performers, self.used_landmarks
+            )
 
-        self.visualisation = visualize_landmarks(
-            image.numpy_view(), self.detection_result
+        # The landmarks are processed in the coordinates the trackers use when both are logged
+        self.result_processor = ResultProcessor(
+            landmark_type=LandmarkType.LANDMARKS
+            if self.landmark_type == LandmarkType.BOTH
+            else self.landmark_type,
+            indices=self.used_landmarks,
         )
 
-        self.frame_count += 1
-        if self.csv_writer is not None:
-            self.write_landmarks(result, timestamp_ms)
+    def filter_landmarks(
+        self: Self, result: PoseLandmarkerResult, timestamp_ms: int
+    ) -> None:
+        """
+        Filter the used normalized landmarks of the first pose in place, the filter starts over when the pose is lost
+        The world landmarks are not filtered, the filter parameters are tuned to normalized image coordinates
+        """
+        if result.pose_landmarks is None or len(result.pose_landmarks) == 0:
+            self.landmark_filter.reset()
+            return
+
+        landmarks = result.pose_landmarks[0]
+        filtered = self.landmark_filter.filter(
+            landmarks_to_array(landmarks, self.used_landmarks), timestamp_ms
+        )
+        for index, (x, y, z) in zip(
+            self.used_landmarks, filtered[:, :3].tolist(), strict=True
+        ):
+            landmark = landmarks[index]
+            landmark.x = x
+            landmark.y = y
+            landmark.z = z
+
+    def track_detection(
+        self: Self, result: PoseLandmarkerResult, timestamp_ms: int
+    ) -> None:
+        """
+        Pass the landmarks of the first pose to the drum trackers and the motion models, holding the tracking lock
+        """
+        if result.pose_world_landmarks is None or len(result.pose_world_landmarks) == 0:
+            self.motion_model.reset()
+            if self.latency_compensator is not None:
+                self.latency_compensator.reset()
+            return
+
+        # Extrapolated frames have no world landmarks, they are only published for detected frames
+        if (
+            self.publisher is not None
+            and self.publisher.publishes(LandmarkType.WORLD_LANDMARKS)
+            and timestamp_ms > self.tracked_timestamp_ms
+        ):
+            self.publisher.publish_landmarks(
+                landmarks_to_array(result.pose_world_landmarks[0]),
+                timestamp_ms,
+                LandmarkType.WORLD_LANDMARKS,
+            )
+        self.update_trackers(
+            self.compensate_latency(result.pose_landmarks[0], timestamp_ms),
+            timestamp_ms,
+        )
+        if self.inference_stride > 1:
+            self.motion_model.update(
+                landmarks_to_array(result.pose_landmarks[0], self.used_landmarks),
+                timestamp_ms,
+            )
+
+    def track_performers(
+        self: Self, result: PoseLandmarkerResult, timestamp_ms: int
+    ) -> None:
+        """
+        Pass the landmarks of every detected person to the publisher and the drum trackers of their identity,
+        holding the tracking lock
+        The used landmarks of all persons are converted in a single pass, every detected person is filtered
+        on their own, the filter of an identity given to a new person starts over.
+        The trackers of all persons are updated at once, see PerformerTrackers, the persons that are not detected
+        in this frame are masked and start over when they are detected again.
+        """
+        poses = result.pose_landmarks or []
+        identities = self.person_matcher.match(poses)
+        for identity in self.person_matcher.new_identities:
+            if len(self.performer_filters) > 0:
+                self.performer_filters[identity].reset()
+            if self.performer_trackers is not None:
+                self.performer_trackers.reset(identity)
+        if timestamp_ms <= self.tracked_timestamp_ms:
+            return
+
+        self.tracked_timestamp_ms = timestamp_ms
+        used = self.used_landmarks
+        detected = landmarks_to_array(
+            [pose[index] for pose in poses for index in used]
+        ).reshape(len(poses), len(used), LANDMARK_FIELDS)
+        for landmarks, identity in zip(detected, identities, strict=True):
+            if len(self.performer_filters) > 0:
+                landmarks[:] = self.performer_filters[identity].filter(
+                    landmarks, timestamp_ms
+                )
+
+        # Published before the trackers are updated, so the hits carry the timestamp of this frame
+        if self.publisher is not None:
+            for pose, (landmarks, identity) in enumerate(
+                zip(detected, identities, strict=True)
+            ):
+                if self.publisher.publishes(LandmarkType.WORLD_LANDMARKS):
+                    self.publisher.publish_landmarks(
+                        landmarks_to_array(result.pose_world_landmarks[pose]),
+                        timestamp_ms,
+                        LandmarkType.WORLD_LANDMARKS,
+                        identity,
+                    )
+                self.publisher.publish_landmarks(
+                    landmarks, timestamp_ms, LandmarkType.LANDMARKS, identity
+                )
+        if self.performer_trackers is not None:
+            self.performer_trackers.update(detected, identities, timestamp_ms)
+
+    def compensate_latency(
+        self: Self, landmarks: list[NormalizedLandmark], timestamp_ms: int
+    ) -> list[NormalizedLandmark]:
+        """
+        Extrapolate the used landmarks of a detection over the inference latency of its frame,
+        holding the tracking lock
+        :return: The extrapolated landmarks, the detected landmarks without a latency compensator
+        """
+        if self.latency_compensator is None:
+            return landmarks
+
+        detected = landmarks_to_array(landmarks, self.used_landmarks)
+        self.latency_compensator.update(detected, timestamp_ms)
+        return array_to_landmarks(
+            self.latency_compensator.extrapolate(detected, self.inference_latency_ms),
+            self.used_landmarks,
+        )
+
+    def warm_up(self: Self, size: int = 256, timeout_s: float = 10) -> None:
+        """
+        Run a blank frame through every landmarker before the first real frame,
+        so the first frames are not delayed by the lazy initialization of the inference graph
+        The result of the warm-up frame is ignored
+        :param size: The width and height of the blank frame
+        :param timeout_s: The maximum time to wait for the result of a landmarker in live stream mode
+        """
+        image = Image(
+            image_format=ImageFormat.SRGB,
+            data=np.zeros((size, size, 3), dtype=np.uint8),
+        )
+        self.warming_up = True
+        for landmarker in self.landmarkers.values():
+            match self.running_mode:
+                case RunningMode.LIVE_STREAM:
+                    self.warm_up_done.clear()
+                    landmarker.detect_async(image, 0)
+                    self.warm_up_done.wait(timeout_s)
+                case RunningMode.VIDEO:
+                    landmarker.detect_for_video(image, 0)
+                case _:
+                    pass
+        self.warming_up = False
+
+        # The landmarkers require increasing timestamps, the first real frame can have timestamp 0
+        self.timestamp_offset_ms = 1
+
+    def update_trackers(
+        self: Self, landmarks: list[NormalizedLandmark], timestamp_ms: int
+    ) -> None:
+        """
+        Pass landmarks to the publisher and the drum trackers, detected or extrapolated, holding the tracking lock
+        Landmarks that are not newer than the tracked landmarks are skipped, the trackers require increasing timestamps
+        """
+        if timestamp_ms <= self.tracked_timestamp_ms:
+            return
+
+        self.tracked_timestamp_ms = timestamp_ms
+        # Published before the trackers are updated, so the hits carry the timestamp of this frame
+        if self.publisher is not None:
+            self.publisher.publish_landmarks(
+                landmarks_to_array(landmarks), timestamp_ms
+            )
+        if self.drum_trackers is not None:
+            self.drum_trackers.update(landmarks, timestamp_ms)
+
+    def extrapolate(self: Self, timestamp_ms: int) -> None:
+        """
+        Track a frame that is skipped by the landmarker with extrapolated landmarks
+        """
+        if self.drum_trackers is not None:
+            self.drum_trackers.drum.check_calibrations()
+
+        with self.tracking_lock:
+            predicted = self.motion_model.predict(timestamp_ms)
+            if predicted is not None:
+                # Led by the same time as the detections, the trackers would see the landmarks move back otherwise
+                if self.latency_compensator is not None:
+                    predicted = self.latency_compensator.extrapolate(
+                        predicted, self.inference_latency_ms
+                    )
+                self.update_trackers(
+                    array_to_landmarks(predicted, self.used_landmarks), timestamp_ms
+                )
+
+    def measure_latency(self: Self, timestamp_ms: int) -> None:
+        """
+        Measure the inference latency of a frame and switch models if the latency target requires it
+        """
+        submitted = pop_pending(self.submit_times, timestamp_ms)
+        if submitted is None:
+            return
+
+        self.inference_latency_ms = (time.perf_counter() - submitted) * 1000
+        if self.adaptive_model is not None:
+            self.model = self.adaptive_model.update(self.inference_latency_ms)
+            self.landmarker = self.landmarkers[self.model]
+
+    def map_region(self: Self, result: PoseLandmarkerResult, timestamp_ms: int) -> None:
+        """
+        Map the landmarks detected in the region of interest back to the full frame
+        and derive the region of the next frame from them
+        """
+        region = pop_pending(self.pending_regions, timestamp_ms)
+        if region is None:
+            return
+
+        if not region.is_full_frame():
+            for pose_landmarks in result.pose_landmarks:
+                region.to_frame(pose_landmarks)
+
+        self.region_of_interest.update(
+            result.pose_landmarks[0]
+            if result.pose_landmarks is not None and len(result.pose_landmarks) > 0
+            else None
+        )
 
     def write_landmarks(
         self: Self, result: PoseLandmarkerResult, timestamp_ms: int
     ) -> None:
         """
-        Write the landmarks to a file
+        Write the landmarks to the log file and the cache writers
         :param result: The result of the pose estimation
         :param timestamp_ms: The timestamp of the frame
         :return:
@@ -150,28 +545,45 @@ class MediaPipePose:
         if result.pose_landmarks is None or len(result.pose_landmarks) == 0:
             return
 
-        pose_landmarks = None
-        match self.landmark_type:
-            case LandmarkType.LANDMARKS:
-                pose_landmarks = result.pose_landmarks[0]
-            case LandmarkType.WORLD_LANDMARKS:
-                pose_landmarks = result.pose_world_landmarks[0]
-
-        for i, landmark in enumerate(pose_landmarks):
-            self.csv_writer.write(
+        if self.csv_writer is not None:
+            self.csv_writer.write_frame(
                 self.frame_count,
                 timestamp_ms,
-                i,
-                landmark.x,
-                landmark.y,
-                landmark.z,
+                self.landmarks_of_type(result, self.landmark_type),
                 self.landmark_type,
-                landmark.visibility,
-                landmark.presence,
             )
 
+        for landmark_type, writer in self.cache_writers.items():
+            writer.write_frame(
+                self.frame_count,
+                timestamp_ms,
+                self.landmarks_of_type(result, landmark_type),
+                landmark_type,
+            )
+
+    @staticmethod
+    def landmarks_of_type(
+        result: PoseLandmarkerResult, landmark_type: LandmarkType
+    ) -> LandmarkArray:
+        """
+        The landmarks of the first pose in the result, normalized, in world coordinates or both
+        :return: An array of shape (33, 5), or (2, 33, 5) for both types, so a frame is written at once
+        """
+        match landmark_type:
+            case LandmarkType.LANDMARKS:
+                return landmarks_to_array(result.pose_landmarks[0])
+            case LandmarkType.WORLD_LANDMARKS:
+                return landmarks_to_array(result.pose_world_landmarks[0])
+            case LandmarkType.BOTH:
+                return np.stack(
+                    (
+                        landmarks_to_array(result.pose_landmarks[0]),
+                        landmarks_to_array(result.pose_world_landmarks[0]),
+                    )
+                )
+
     def process_image(
-        self: Self, image_array: npt.NDArray[np.float32], timestamp_ms: int
+        self: Self, image_array: npt.NDArray[np.uint8], timestamp_ms: int
     ) -> None:
         """
         Process the image
@@ -179,12 +591,32 @@ class MediaPipePose:
         :param image_array: The image to process
         :return: The landmarks
         """
+        self.frame_index += 1
+        if self.frame_index % self.inference_stride != 0:
+            self.image_nbytes = 0
+            self.extrapolate(timestamp_ms)
+            return
+
+        region = None
+        if self.region_of_interest is not None:
+            image_array, region = self.region_of_interest.crop(image_array)
+            self.pending_regions.append((timestamp_ms, region))
+
+        # A cropped region is already resized to the input size of the region of interest
+        if self.frame_scaler is not None and (region is None or region.is_full_frame()):
+            image_array = self.frame_scaler.scale(image_array)
+
+        self.image_nbytes = image_array.nbytes
         image = Image(image_format=ImageFormat.SRGB, data=image_array)
-        match self.options.running_mode:
+        self.submit_times.append((timestamp_ms, time.perf_counter()))
+        landmarker_timestamp_ms = timestamp_ms + self.timestamp_offset_ms
+        match self.running_mode:
             case RunningMode.LIVE_STREAM:
-                self.landmarker.detect_async(image, timestamp_ms)
+                self.landmarker.detect_async(image, landmarker_timestamp_ms)
             case RunningMode.VIDEO:
-                result = self.landmarker.detect_for_video(image, timestamp_ms)
-                self.result_callback(result, image, timestamp_ms)
+                result = self.landmarker.detect_for_video(
+                    image, landmarker_timestamp_ms
+                )
+                self.result_callback(result, image, landmarker_timestamp_ms)
             case _:
                 pass
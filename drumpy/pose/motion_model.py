@@ -0,0 +1,56 @@
+from typing import Optional, Self
+
+from drumpy.util import LandmarkArray
+
+
+class VelocityModel:
+    """
+    Constant velocity motion model over all landmarks of a pose.
+    The velocity of every landmark is estimated from the two most recent detections,
+    and is used to extrapolate the landmarks to frames that were not passed through the landmarker.
+    """
+
+    def __init__(self) -> None:
+        self.previous: Optional[LandmarkArray] = None
+        self.previous_timestamp_ms: float = 0
+        self.latest: Optional[LandmarkArray] = None
+        self.latest_timestamp_ms: float = 0
+
+    def reset(self: Self) -> None:
+        """
+        Forget the detections, used when the pose is lost
+        """
+        self.previous = None
+        self.latest = None
+
+    def update(self: Self, landmarks: LandmarkArray, timestamp_ms: float) -> None:
+        """
+        Register a detection
+        :param landmarks: The landmarks as an array of shape (33, 5)
+        :param timestamp_ms: The timestamp of the frame the landmarks were detected in
+        """
+        if self.latest is not None and timestamp_ms <= self.latest_timestamp_ms:
+            return
+
+        self.previous = self.latest
+        self.previous_timestamp_ms = self.latest_timestamp_ms
+        self.latest = landmarks
+        self.latest_timestamp_ms = timestamp_ms
+
+    def predict(self: Self, timestamp_ms: float) -> Optional[LandmarkArray]:
+        """
+        Extrapolate the landmarks to the given timestamp
+        The visibility and presence of the latest detection are kept
+        :return: The predicted landmarks, None if there is no detection yet
+        """
+        if self.latest is None:
+            return None
+
+        predicted = self.latest.copy()
+        if self.previous is None:
+            return predicted
+
+        time_delta = self.latest_timestamp_ms - self.previous_timestamp_ms
+        velocity = (self.latest[:, :3] - self.previous[:, :3]) / time_delta
+        predicted[:, :3] += velocity * (timestamp_ms - self.latest_timestamp_ms)
+        return predicted
@@ -0,0 +1,96 @@
+from itertools import permutations
+from typing import Self
+
+import numpy as np
+import numpy.typing as npt
+from mediapipe.tasks.python.components.containers.landmark import NormalizedLandmark  # type: ignore
+
+from drumpy.pose.mediapipe_markers import MarkerEnum
+
+# The landmarks the position of a person is measured by, the torso moves little while drumming
+TORSO = [
+    MarkerEnum.LEFT_SHOULDER,
+    MarkerEnum.RIGHT_SHOULDER,
+    MarkerEnum.LEFT_HIP,
+    MarkerEnum.RIGHT_HIP,
+]
+
+# Added to the cost of matching a pose to a known person that is too far away, more than any real distance
+FAR_PENALTY = 100.0
+
+
+class PersonMatcher:
+    """
+    Gives the poses of the results stable identities across frames.
+    The landmarker returns the poses in no particular order, every pose is matched to the identity
+    whose torso was closest, so a person keeps their drum trackers while others come and go.
+    The assignment with the smallest total distance is chosen from all assignments at once,
+    there are only a few persons in front of a camera.
+    """
+
+    def __init__(
+        self, num_persons: int, max_distance: float = 0.2, max_missing_frames: int = 30
+    ) -> None:
+        """
+        :param num_persons: The number of identities, the maximum number of poses in a result
+        :param max_distance: The largest distance the torso can move between frames, in normalized units,
+        a pose further from every known person is a new person
+        :param max_missing_frames: The number of frames an identity is kept for a person that is not detected,
+        after which the identity can be given to a new person
+        """
+        self.num_persons = num_persons
+        self.max_distance = max_distance
+        self.max_missing_frames = max_missing_frames
+
+        # The latest x, y position of the torso of every identity, NaN for a free identity
+        self.centers: npt.NDArray[np.float64] = np.full((num_persons, 2), np.nan)
+        # The number of frames every identity has not been detected in
+        self.missing_frames: npt.NDArray[np.int64] = np.zeros(
+            num_persons, dtype=np.int64
+        )
+        # Every ordered selection of identities, by the number of poses
+        self.assignments: list[npt.NDArray[np.int64]] = [
+            np.array(list(permutations(range(num_persons), count)), dtype=np.int64)
+            for count in range(num_persons + 1)
+        ]
+        # The identities that were free before the latest match and are given to a new person
+        self.new_identities: list[int] = []
+
+    def match(self: Self, poses: list[list[NormalizedLandmark]]) -> list[int]:
+        """
+        Match the poses of a result to identities, the identities of the persons that are not detected are kept
+        The identities that are given to a new person are listed in new_identities
+        :param poses: The landmarks of every pose in the result, at most num_persons
+        :return: The identity of every pose, in the order of the poses
+        """
+        assert len(poses) <= self.num_persons, "More poses than identities"
+        self.missing_frames += 1
+        if len(poses) == 0:
+            self.new_identities = []
+            self.forget_missing()
+            return []
+
+        centers = np.array(
+            [[(pose[i].x, pose[i].y) for i in TORSO] for pose in poses]
+        ).mean(axis=1)
+        distances = np.linalg.norm(centers[:, None] - self.centers[None], axis=2)
+        # A free identity costs as much as the furthest match, a known person further away is only matched
+        # when there is no free identity left
+        costs = np.where(np.isnan(distances), self.max_distance, distances)
+        costs[distances > self.max_distance] += FAR_PENALTY
+
+        assignments = self.assignments[len(poses)]
+        totals = costs[np.arange(len(poses)), assignments].sum(axis=1)
+        identities = assignments[np.argmin(totals)]
+
+        self.new_identities = identities[np.isnan(self.centers[identities, 0])].tolist()
+        self.centers[identities] = centers
+        self.missing_frames[identities] = 0
+        self.forget_missing()
+        return identities.tolist()
+
+    def forget_missing(self: Self) -> None:
+        """
+        Free the identities of the persons that have not been detected for too long
+        """
+        self.centers[self.missing_frames > self.max_missing_frames] = np.nan
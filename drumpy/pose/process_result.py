@@ -1,5 +1,7 @@
-import math
+from typing import Optional
 
+import numpy as np
+import numpy.typing as npt
 from mediapipe.tasks.python.components.containers.landmark import (
     NormalizedLandmark,
     Landmark,
@@ -7,6 +9,10 @@ from mediapipe.tasks.python.components.containers.landmark import (
 from mediapipe.tasks.python.vision import PoseLandmarkerResult
 
 from drumpy.pose.landmark_type import LandmarkType
+from drumpy.util import NUM_LANDMARKS
+
+# The x, y, z positions of all landmarks of a pose, or a history of them
+Positions = npt.NDArray[np.float64]
 
 
 class ResultProcessor:
@@ -15,10 +21,20 @@ class ResultProcessor:
     Tries to predict the position of the result based on the previous positions.
     The more plausible the positions are, the more likely the result is correct.
     Major deviations from the previous positions are considered outliers and will be corrected.
+    All landmarks of a frame are processed at once, on a ring buffer of the previous positions.
     """
 
-    def __init__(self, landmark_type: LandmarkType) -> None:
+    def __init__(
+        self, landmark_type: LandmarkType, indices: Optional[list[int]] = None
+    ) -> None:
+        """
+        :param landmark_type: The type of the landmarks the movement is measured in
+        :param indices: Only process the landmarks at these indices, if None all landmarks are processed
+        """
         self.landmark_type: LandmarkType = landmark_type
+        self.indices: list[int] = (
+            list(range(NUM_LANDMARKS)) if indices is None else indices
+        )
 
         self.memory: int = 2
         self.peak: float = (
@@ -30,37 +46,54 @@ class ResultProcessor:
         )
         # Higher values will make the mollifier function tighter
 
-        self.results: list[PoseLandmarkerResult] = []
+        # The processed positions of the previous results, the oldest at index head once the buffer is full
+        self.positions: Positions = np.zeros((self.memory, len(self.indices), 3))
+        # The world positions of the previous results, the movement is measured in them for world landmarks
+        self.world_positions: Positions = np.zeros((self.memory, len(self.indices), 3))
+        self.head: int = 0  # The index the next positions are written to
+        self.count: int = 0  # The number of results in the buffer
+
         self.timestamps_ms: list[float] = []  # timestamps of the results, in ms
         self.time_deltas_ms: list[float] = []  # time deltas between the results, in ms
         self.time_duration_ms: float = 0.0  # duration of the time deltas, in ms
 
-    def mollifier(self, x: float) -> float:
+    def mollifier(self, x: Positions) -> Positions:
         """
-        The mollifier function
+        The mollifier function, element wise
         """
-        if x <= 0:
-            return 0
-
-        return math.exp((-(math.log(x / self.peak) ** 2)) * self.tightness)
+        nonpositive = x <= 0
+        log = np.log(x / self.peak, where=~nonpositive, out=np.ones_like(x))
+        ratio = np.exp((-(log**2)) * self.tightness)
+        ratio[nonpositive] = 0.0
+        return ratio
 
     def process_result(
         self, result: PoseLandmarkerResult, timestamp_ms: float
     ) -> PoseLandmarkerResult:
         """
         Process the result of the pose estimation
+        The landmarks of the first pose are corrected in place
         """
         if result.pose_landmarks is None or len(result.pose_landmarks) == 0:
             return result
 
-        for i, landmark in enumerate(result.pose_landmarks[0]):
-            result.pose_landmarks[0][i] = self.process_landmark(
-                landmark, i, timestamp_ms
+        landmarks = result.pose_landmarks[0]
+        positions = self.to_positions(landmarks, self.indices)
+        if self.count >= 2:  # noqa: PLR2004
+            positions = self.process_positions(positions, timestamp_ms)
+            for index, (x, y, z) in zip(self.indices, positions.tolist(), strict=True):
+                landmark = landmarks[index]
+                landmark.x = x
+                landmark.y = y
+                landmark.z = z
+
+        self.positions[self.head] = positions
+        if self.landmark_type != LandmarkType.LANDMARKS:
+            self.world_positions[self.head] = self.to_positions(
+                result.pose_world_landmarks[0], self.indices
             )
-
-        self.results.append(result)
-        if len(self.results) > self.memory:
-            self.results.pop(0)
+        self.head = (self.head + 1) % self.memory
+        self.count = min(self.count + 1, self.memory)
 
         self.timestamps_ms.append(timestamp_ms)
         if len(self.timestamps_ms) > self.memory:
@@ -75,98 +108,34 @@ class ResultProcessor:
 
         return result
 
-    def average_difference(
-        self, diffs: list[NormalizedLandmark | Landmark]
-    ) -> tuple[float, float, float]:
-        """
-        Calculate the average difference between the current and previous positions
-        The average difference is the average movement of the landmark per millisecond, in x, y, z
-        """
-        x = sum(diff.x for diff in diffs) / self.time_duration_ms
-        y = sum(diff.y for diff in diffs) / self.time_duration_ms
-        z = sum(diff.z for diff in diffs) / self.time_duration_ms
-        return x, y, z
-
-    def predict_position(
-        self, avg_diff: tuple[float, float, float], index: int, timestamp_ms: float
-    ) -> tuple[float, float, float]:
+    def process_positions(self, positions: Positions, timestamp_ms: float) -> Positions:
         """
-        Predict the current position by adding the average difference to the previous position
-        This is the expected position of the landmark based on the previous positions
+        Predict the current positions by adding the average movement per millisecond to the previous positions,
+        and move the positions towards the prediction the more implausible their deviation from it is
         """
-
-        time_delta = timestamp_ms - self.timestamps_ms[-1]
-        x = self.results[-1].pose_landmarks[0][index].x + avg_diff[0] * time_delta
-        y = self.results[-1].pose_landmarks[0][index].y + avg_diff[1] * time_delta
-        z = self.results[-1].pose_landmarks[0][index].z + avg_diff[2] * time_delta
-
-        return x, y, z
-
-    def apply_mollifier(
-        self,
-        diff_landmark_predicted: NormalizedLandmark | Landmark,
-        landmark: NormalizedLandmark | Landmark,
-        predicted: NormalizedLandmark | Landmark,
-    ) -> NormalizedLandmark | Landmark:
-        """
-        If the difference with the previous position is below the minimum deviation, smooth it out
-        This is to prevent small jittering of the landmarks
-        Else apply clamp the difference to be within the maximum deviation
-        """
-        ratio_x = self.mollifier(abs(diff_landmark_predicted.x))
-        ratio_y = self.mollifier(abs(diff_landmark_predicted.y))
-        ratio_z = self.mollifier(abs(diff_landmark_predicted.z))
-        landmark.x = predicted.x * (1 - ratio_x) + landmark.x * ratio_x
-        landmark.y = predicted.y * (1 - ratio_y) + landmark.y * ratio_y
-        landmark.z = predicted.z * (1 - ratio_z) + landmark.z * ratio_z
-        return landmark
-
-    def process_landmark(
-        self, landmark: NormalizedLandmark | Landmark, index: int, timestamp_ms: float
-    ) -> NormalizedLandmark:
-        if len(self.results) < 2:  # noqa: PLR2004
-            return landmark
-
-        # Calculate the average difference between the current and previous positions
-        diffs = (
-            [
-                self.calculate_diff(
-                    self.results[i].pose_landmarks[0][index],  # current position
-                    self.results[i - 1].pose_landmarks[0][index],  # previous position
-                )
-                for i in range(1, len(self.results))
-            ]
+        # The previous positions from oldest to newest
+        order = [(self.head - self.count + i) % self.memory for i in range(self.count)]
+        history = (
+            self.positions
             if self.landmark_type == LandmarkType.LANDMARKS
-            else [
-                self.calculate_diff(
-                    self.results[i].pose_world_landmarks[0][index],  # current position
-                    self.results[i - 1].pose_world_landmarks[0][
-                        index
-                    ],  # previous position
-                )
-                for i in range(1, len(self.results))
-            ]
-        )
-
-        avg_diff = self.average_difference(diffs)
+            else self.world_positions
+        )[order]
+        avg_diff = np.diff(history, axis=0).sum(axis=0) / self.time_duration_ms
 
-        pos = self.predict_position(avg_diff, index, timestamp_ms)
-        predicted = Landmark(x=pos[0], y=pos[1], z=pos[2])
-
-        # Calculate the difference between the predicted and current position
-        diff_landmark_predicted = self.calculate_diff(landmark, predicted)
+        time_delta = timestamp_ms - self.timestamps_ms[-1]
+        predicted = self.positions[order[-1]] + avg_diff * time_delta
 
-        return self.apply_mollifier(diff_landmark_predicted, landmark, predicted)
+        ratio = self.mollifier(np.abs(positions - predicted))
+        return predicted * (1 - ratio) + positions * ratio
 
     @staticmethod
-    def calculate_diff(
-        current: NormalizedLandmark | Landmark, previous: NormalizedLandmark | Landmark
-    ) -> NormalizedLandmark:
-        """
-        Calculate the difference between the current and previous positions
-        """
-        diff = NormalizedLandmark()
-        diff.x = current.x - previous.x
-        diff.y = current.y - previous.y
-        diff.z = current.z - previous.z
-        return diff
+    def to_positions(
+        landmarks: list[NormalizedLandmark] | list[Landmark], indices: list[int]
+    ) -> Positions:
+        return np.array(
+            [
+                (landmark.x, landmark.y, landmark.z)
+                for landmark in (landmarks[index] for index in indices)
+            ],
+            dtype=np.float64,
+        ).reshape(-1, 3)
@@ -0,0 +1,132 @@
+from typing import Optional, Self
+
+import cv2
+import numpy as np
+import numpy.typing as npt
+from mediapipe.tasks.python.components.containers.landmark import NormalizedLandmark  # type: ignore
+
+# Landmarks below this visibility are not used to determine the region
+MIN_VISIBILITY = 0.5
+
+
+class Region:
+    """
+    A square region of a frame, in coordinates normalized to the frame size
+    """
+
+    def __init__(self, left: float, top: float, size: float) -> None:
+        self.left = left
+        self.top = top
+        self.size = size
+
+    def __str__(self: Self) -> str:
+        return f"Region(left={self.left:.3f}, top={self.top:.3f}, size={self.size:.3f})"
+
+    def is_full_frame(self: Self) -> bool:
+        return self.size >= 1
+
+    def to_frame(self: Self, landmarks: list[NormalizedLandmark]) -> None:
+        """
+        Map landmarks detected in this region back to the coordinates of the full frame, in place
+        The depth uses roughly the same scale as x and is scaled along
+        """
+        for landmark in landmarks:
+            landmark.x = self.left + landmark.x * self.size
+            landmark.y = self.top + landmark.y * self.size
+            landmark.z = landmark.z * self.size
+
+
+FULL_FRAME = Region(0, 0, 1)
+
+
+class RegionOfInterest:
+    """
+    Restricts the pose estimation to the region of the frame where the pose was found in the previous frame.
+    The region is the bounding box of the landmarks, padded and made square.
+    The cropped region is resized to a fixed size before it is passed to the landmarker.
+    When the pose is lost, the full frame is used until the pose is found again.
+    """
+
+    def __init__(
+        self, padding: float = 0.25, min_size: float = 0.3, input_size: int = 256
+    ) -> None:
+        """
+        :param padding: The padding around the bounding box of the landmarks, relative to its size
+        :param min_size: The minimum size of the region, relative to the frame
+        :param input_size: The width and height in pixels of the cropped region passed to the landmarker
+        """
+        self.padding = padding
+        self.min_size = min_size
+        self.input_size = input_size
+        self.region: Region = FULL_FRAME
+
+        # The resized crop, reused for every frame
+        self.buffer: npt.NDArray[np.uint8] = np.empty(
+            (input_size, input_size, 3), dtype=np.uint8
+        )
+
+    def crop(
+        self: Self, frame: npt.NDArray[np.uint8]
+    ) -> tuple[npt.NDArray[np.uint8], Region]:
+        """
+        Crop the current region from a square frame and resize it for the landmarker
+        :return: The image to pass to the landmarker and the region of the frame it covers
+        """
+        region = self.region
+        if region.is_full_frame():
+            return frame, region
+
+        frame_size = frame.shape[0]
+        size = max(1, round(region.size * frame_size))
+        left = min(round(region.left * frame_size), frame_size - size)
+        top = min(round(region.top * frame_size), frame_size - size)
+        cv2.resize(
+            frame[top : top + size, left : left + size],
+            (self.input_size, self.input_size),
+            dst=self.buffer,
+            # Area interpolation does not alias when downscaling, but is slow when upscaling
+            interpolation=cv2.INTER_AREA
+            if size > self.input_size
+            else cv2.INTER_LINEAR,
+        )
+        # Use the region that was actually cropped, after rounding to pixels
+        return self.buffer, Region(
+            left / frame_size, top / frame_size, size / frame_size
+        )
+
+    def update(self: Self, landmarks: Optional[list[NormalizedLandmark]]) -> None:
+        """
+        Derive the region of the next frame from the landmarks in full frame coordinates
+        :param landmarks: The landmarks of the pose, None if the pose was lost
+        """
+        if landmarks is None or len(landmarks) == 0:
+            self.region = FULL_FRAME
+            return
+
+        visible = [
+            landmark
+            for landmark in landmarks
+            if landmark.visibility is None or landmark.visibility >= MIN_VISIBILITY
+        ]
+        if len(visible) == 0:
+            visible = landmarks
+
+        xs = [landmark.x for landmark in visible]
+        ys = [landmark.y for landmark in visible]
+        left, right = min(xs), max(xs)
+        top, bottom = min(ys), max(ys)
+
+        size = max(right - left, bottom - top) * (1 + 2 * self.padding)
+        size = max(size, self.min_size)
+        if size >= 1:
+            self.region = FULL_FRAME
+            return
+
+        # Keep the square inside the frame by shifting it, rather than clipping it
+        center_x = (left + right) / 2
+        center_y = (top + bottom) / 2
+        self.region = Region(
+            min(max(center_x - size / 2, 0), 1 - size),
+            min(max(center_y - size / 2, 0), 1 - size),
+            size,
+        )
@@ -0,0 +1,48 @@
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Self
+
+
+class StartupTimer:
+    """
+    Measures the duration of the phases of the application startup.
+    Phases can run concurrently on different threads, so their durations can add up to more than the total.
+    """
+
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        # The duration of every finished phase in ms, in the order they finished
+        self.phases: dict[str, float] = {}
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def phase(self: Self, name: str) -> Iterator[None]:
+        """
+        Measure the duration of the code in the with block as a phase with the given name
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            with self.lock:
+                self.phases[name] = duration_ms
+
+    @property
+    def total_ms(self: Self) -> float:
+        """
+        The time since the timer was created, in ms
+        """
+        return (time.perf_counter() - self.start) * 1000
+
+    def __str__(self: Self) -> str:
+        with self.lock:
+            phases = list(self.phases.items())
+
+        width = max([len(name) for name, _ in phases] + [len("total")])
+        lines = ["Startup timing:"]
+        lines += [f"  {name:<{width}} {duration:8.1f} ms" for name, duration in phases]
+        lines.append(f"  {'total':<{width}} {self.total_ms:8.1f} ms")
+        return "\n".join(lines)
@@ -1,10 +1,18 @@
-from typing import Self
+from itertools import groupby
+from typing import Self, TypeAlias
+
+import numpy as np
 
 from mediapipe.tasks.python.components.containers.landmark import NormalizedLandmark  # pyright: ignore
 
-from drumpy.drum.drum import Drum
+from drumpy.drum.drum import Drum, SleepOption
 from drumpy.drum.sound import SnareDrum, HiHat, KickDrum, HiHatFoot, Cymbal
 from drumpy.tracking.marker_tracker_wrapper import MarkerTrackerWrapper, Foot, Hand
+from drumpy.tracking.tracker_engine import HitEvent, TrackerEngine
+from drumpy.util import Position, landmarks_to_positions
+
+# The trackers of a kind: the kind, the slice of the trackers and the slice of their markers
+TrackerGroup: TypeAlias = tuple[type[MarkerTrackerWrapper], slice, slice]
 
 
 class DrumTrackers:
@@ -13,25 +21,104 @@ class DrumTrackers:
     Objects of this class are used to update the positions of the trackers
     """
 
-    def __init__(self) -> None:
+    def __init__(self, sleep_option: SleepOption = SleepOption.SLEEP) -> None:
+        """
+        Initialize the drum and trackers
+        :param sleep_option: Whether to pause between calibrations, offline processing should not sleep
+        """
         snare_drum = SnareDrum()
         hi_hat = HiHat()
         kick_drum = KickDrum()
         _hi_hat_foot = HiHatFoot()
         cymbal = Cymbal()
 
-        self.drum = Drum([snare_drum, hi_hat, kick_drum, cymbal])
+        self.drum = Drum(
+            [snare_drum, hi_hat, kick_drum, cymbal], sleep_option=sleep_option
+        )
         self.drum.auto_calibrate()
 
         self.trackers: list[MarkerTrackerWrapper] = [
-            Hand.left_hand(self.drum, [snare_drum, hi_hat, cymbal]),
-            Hand.right_hand(self.drum, [snare_drum, hi_hat, cymbal]),
-            Foot.left_foot(self.drum, [kick_drum]),
-            Foot.right_foot(self.drum, [kick_drum]),
+            Hand.left_hand([snare_drum, hi_hat, cymbal]),
+            Hand.right_hand([snare_drum, hi_hat, cymbal]),
+            Foot.left_foot([kick_drum]),
+            Foot.right_foot([kick_drum]),
         ]
 
+        # The trackers of a kind are next to each other, so their positions are computed at once
+        kinds = list(dict.fromkeys(type(tracker) for tracker in self.trackers))
+        self.trackers.sort(key=lambda tracker: kinds.index(type(tracker)))
+        self.groups = self.group_trackers()
+        # The markers of all trackers, tracker by tracker, converted in a single array every update
+        self.tracker_markers = [
+            int(marker) for tracker in self.trackers for marker in tracker.markers
+        ]
+
+        # All trackers are updated at once by the engine
+        self.engine = TrackerEngine.from_configs(
+            [tracker.config for tracker in self.trackers]
+        )
+        # The latest tracked position of every tracker, of shape (trackers, 3)
+        self.positions = np.zeros((len(self.trackers), 3))
+
+    def group_trackers(self: Self) -> list[TrackerGroup]:
+        """
+        Group the trackers by kind, the trackers should be ordered by kind
+        :return: For every kind, the slice of its trackers and the slice of their markers in tracker_markers
+        """
+        groups: list[TrackerGroup] = []
+        first_tracker = first_marker = 0
+        for kind, trackers in groupby(self.trackers, key=type):
+            count = len(list(trackers))
+            markers = count * len(self.trackers[first_tracker].markers)
+            groups.append(
+                (
+                    kind,
+                    slice(first_tracker, first_tracker + count),
+                    slice(first_marker, first_marker + markers),
+                )
+            )
+            first_tracker += count
+            first_marker += markers
+        return groups
+
+    @property
+    def markers(self: Self) -> list[int]:
+        """
+        The indices of the landmarks read by the trackers, in ascending order
+        """
+        return sorted(
+            {marker for tracker in self.trackers for marker in tracker.markers}
+        )
+
+    def reset(self: Self) -> None:
+        """
+        Forget the tracked positions, used when the trackers are given to another person
+        """
+        self.engine.reset()
+        self.positions.fill(0)
+
     def update(
         self: Self, markers: list[NormalizedLandmark], timestamp_ms: float
-    ) -> None:
-        for tracker in self.trackers:
-            tracker.update(markers, timestamp_ms)
+    ) -> list[HitEvent]:
+        """
+        Update all trackers with the landmarks of a frame and play the sounds that are hit
+        :return: The hits detected in this frame
+        """
+        positions = landmarks_to_positions(markers, self.tracker_markers)
+        for kind, trackers, rows in self.groups:
+            self.positions[trackers] = kind.tracked_positions(
+                positions[rows].reshape(trackers.stop - trackers.start, -1, 3)
+            )
+
+        hits = self.engine.update(self.positions, timestamp_ms)
+        for hit in hits:
+            self.play_hit(hit.tracker, hit.position, hit.velocity)
+        return hits
+
+    def play_hit(self: Self, tracker: int, position: Position, velocity: float) -> None:
+        """
+        Play the sound hit by a tracker
+        :param tracker: The index of the tracker in trackers
+        """
+        config = self.trackers[tracker].config
+        self.drum.find_and_play_sound(position, config.marker, velocity, config.sounds)
@@ -1,6 +1,8 @@
-from statistics import mean
 from typing import Self
 
+import numpy as np
+import numpy.typing as npt
+
 from drumpy.drum.drum import Drum
 from drumpy.drum.sound import Sound
 from drumpy.util import Position
@@ -12,6 +14,8 @@ MAX_DISTANCE = 100
 class MarkerTracker:
     """
     A tracker keeps track of the markers on the body and determines when a hit is registered.
+    The reference implementation of the hit detection for a single marker: the drum trackers run the same
+    detection for all their markers at once with the TrackerEngine, which should detect the same hits.
     """
 
     def __init__(
@@ -37,13 +41,6 @@ class MarkerTracker:
         # the sounds that can be played by this marker
         self.sounds: list[Sound] = sounds
 
-        self.velocities: list[float] = []
-        self.positions: list[Position] = []
-        self.timestamps_ms: list[float] = []
-
-        # time until next hit can be registered
-        self.time_until_next_hit = 2
-
         self.memory = memory
 
         # how many positions to look ahead to determine if a hit is registered
@@ -51,6 +48,26 @@ class MarkerTracker:
         self.look_ahead = 2
         assert self.look_ahead < self.memory
 
+        # The latest positions, timestamps and z-axis velocities, in ring buffers of memory entries,
+        # the oldest entry is at head once the buffers are full
+        self.positions: npt.NDArray[np.float64] = np.zeros((memory, 3))
+        self.timestamps_ms: npt.NDArray[np.float64] = np.zeros(memory)
+        self.velocities: npt.NDArray[np.float64] = np.zeros(memory)
+        self.head = 0  # The index the next entry is written to
+        self.count = 0  # The number of entries in the buffers
+
+        # The z-axis position and the timestamp of the latest update
+        self.previous_z = 0.0
+        self.previous_timestamp_ms = 0.0
+
+        # The sums of the velocities before the look ahead and in the look ahead,
+        # maintained on every update so a hit is checked in constant time
+        self.trend_sum = 0.0
+        self.look_ahead_sum = 0.0
+
+        # time until next hit can be registered
+        self.time_until_next_hit = 2
+
         self.downward_trend = downward_trend
         self.upward_trend = upward_trend
 
@@ -63,58 +80,65 @@ class MarkerTracker:
         if self.time_until_next_hit > 0:
             self.time_until_next_hit -= 1
 
-        # add the new position to the list of positions
-        self.positions.append(position)
-        if len(self.positions) > self.memory:
-            self.positions.pop(0)
-
-        # add the new timestamp to the list of timestamps
-        self.timestamps_ms.append(timestamp_ms)
-        if len(self.timestamps_ms) > self.memory:
-            self.timestamps_ms.pop(0)
-
-        velocity = self.get_velocity()
-        self.velocities.append(velocity)
-        if len(self.velocities) > self.memory:
-            self.velocities.pop(0)
+        z = float(position[2])
+        velocity = self.get_velocity(z, timestamp_ms)
+
+        # The oldest velocity leaves the buffer, the oldest of the look ahead moves into the trend
+        head = self.head
+        if self.count == self.memory:
+            self.trend_sum -= self.velocities[head]
+        if self.count >= self.look_ahead:
+            moving = self.velocities[head - self.look_ahead]
+            self.look_ahead_sum -= moving
+            self.trend_sum += moving
+        self.look_ahead_sum += velocity
+
+        self.positions[head] = position
+        self.timestamps_ms[head] = timestamp_ms
+        self.velocities[head] = velocity
+        self.head = (head + 1) % self.memory
+        self.count = min(self.count + 1, self.memory)
+        self.previous_z = z
+        self.previous_timestamp_ms = timestamp_ms
+
+        if self.head == 0 and self.count == self.memory:
+            # The buffers are in order, recompute the sums so rounding errors do not build up
+            self.trend_sum = float(self.velocities[: -self.look_ahead].sum())
+            self.look_ahead_sum = float(self.velocities[-self.look_ahead :].sum())
 
         if self.is_hit():
             self.time_until_next_hit = self.memory / 2
             self.drum.find_and_play_sound(
-                self.positions[-self.look_ahead],
+                self.positions[self.head - self.look_ahead].copy(),
                 self.marker,
                 self.velocity,
                 self.sounds,
             )
 
-    def get_velocity(self: Self) -> float:
+    def get_velocity(self: Self, z: float, timestamp_ms: float) -> float:
         """
         Calculate the current velocity of the marker on the z-axis
-        By calculating the difference between the last two positions
-        Divided by the time difference between the last two timestamps
+        By calculating the difference between the new and the latest position
+        Divided by the time difference between their timestamps
         :return: The velocity of the marker on the z-axis per second
         """
-        if len(self.positions) < 2:  # noqa: PLR2004
+        if self.count == 0:
             return 0
 
-        time_delta = self.timestamps_ms[-1] - self.timestamps_ms[-2]  # in milliseconds
-        position_delta = float(self.positions[-1][2] - self.positions[-2][2])
-        return position_delta / time_delta * 1000
+        time_delta = timestamp_ms - self.previous_timestamp_ms  # in milliseconds
+        return (z - self.previous_z) / time_delta * 1000
 
     def is_hit(self: Self) -> bool:
         """
         A hit occurs when the z-axis has a downward trend followed by an upward trend
         :return:
         """
-        if len(self.positions) < self.memory:
-            return False
-
-        if len(self.velocities) < self.look_ahead:
+        if self.count < self.memory:
             return False
 
-        avg_z_vel = mean(self.velocities[: -self.look_ahead])
+        avg_z_vel = self.trend_sum / (self.memory - self.look_ahead)
         self.velocity = avg_z_vel
-        avg_z_look_ahead = mean(self.velocities[-self.look_ahead :])
+        avg_z_look_ahead = self.look_ahead_sum / self.look_ahead
 
         return (
             avg_z_vel < self.downward_trend
@@ -2,27 +2,39 @@ from abc import ABC, abstractmethod
 from typing import Self
 
 import numpy as np
-from mediapipe.tasks.python.components.containers.landmark import NormalizedLandmark  # pyright: ignore
+import numpy.typing as npt
 
-from drumpy.drum.drum import Drum
 from drumpy.drum.sound import Sound
 from drumpy.pose.mediapipe_markers import MarkerEnum
-from drumpy.tracking.marker_tracker import MarkerTracker
-from drumpy.util import landmark_to_position, Position
+from drumpy.tracking.tracker_engine import TrackerConfig
+
+# The positions of the markers or the tracked positions of many trackers
+Positions = npt.NDArray[np.float64]
 
 
 class MarkerTrackerWrapper(ABC):
     """
-    Wrapper for a `MarkerTracker` that allows for extra clarity.
+    Wrapper for a tracker that allows for extra clarity.
     Such as Hand and Foot trackers.
+    The wrapper computes the tracked position from its markers, the TrackerEngine detects the hits.
     """
 
+    config: TrackerConfig
+
+    @property
     @abstractmethod
-    def update(
-        self: Self, markers: list[NormalizedLandmark], timestamp_ms: float
-    ) -> None:
+    def markers(self: Self) -> list[MarkerEnum]:
+        """
+        The markers read by tracked_positions, the other markers are not needed by the tracker
+        """
+
+    @staticmethod
+    @abstractmethod
+    def tracked_positions(positions: Positions) -> Positions:
         """
-        Update the tracker with the new markers
+        The tracked positions of many trackers of this kind at once
+        :param positions: The positions of the markers of every tracker, of shape (trackers, markers, 3)
+        :return: The tracked positions, of shape (trackers, 3)
         """
 
 
@@ -32,32 +44,33 @@ class DrumStick(MarkerTrackerWrapper):
         wrist: MarkerEnum,
         pinky: MarkerEnum,
         index: MarkerEnum,
-        tracker: MarkerTracker,
+        config: TrackerConfig,
     ) -> None:
         self.wrist = wrist
         self.pinky = pinky
         self.index = index
 
-        self.tracker = tracker
+        self.config = config
 
-        self.position = np.array([0, 0, 0])
-
-    def update(
-        self: Self, markers: list[NormalizedLandmark], timestamp_ms: float
-    ) -> None:
-        wrist_pos = landmark_to_position(markers[self.wrist])
-        pinky_pos = landmark_to_position(markers[self.pinky])
-        index_pos = landmark_to_position(markers[self.index])
+    @property
+    def markers(self: Self) -> list[MarkerEnum]:
+        return [self.wrist, self.pinky, self.index]
 
+    @staticmethod
+    def tracked_positions(positions: Positions) -> Positions:
+        wrist_pos, pinky_pos, index_pos = (
+            positions[:, 0],
+            positions[:, 1],
+            positions[:, 2],
+        )
         direction = wrist_pos + (index_pos - pinky_pos) + (pinky_pos - wrist_pos)
-
         # increase the length of the direction vector by 50
-        self.position = wrist_pos + 50 * direction / np.linalg.norm(direction)
-
-        self.tracker.update(self.position, timestamp_ms)
+        return wrist_pos + 50 * direction / np.linalg.norm(
+            direction, axis=1, keepdims=True
+        )
 
     @staticmethod
-    def left_hand(drum: Drum, sounds: list[Sound]) -> MarkerTrackerWrapper:
+    def left_hand(sounds: list[Sound]) -> MarkerTrackerWrapper:
         wrist = MarkerEnum.LEFT_WRIST
         pinky = MarkerEnum.LEFT_PINKY
         index = MarkerEnum.LEFT_INDEX
@@ -66,11 +79,11 @@ class DrumStick(MarkerTrackerWrapper):
             wrist,
             pinky,
             index,
-            MarkerTracker(MarkerEnum.LEFT_DRUM_STICK, drum=drum, sounds=sounds),
+            TrackerConfig(MarkerEnum.LEFT_DRUM_STICK, sounds=sounds),
         )
 
     @staticmethod
-    def right_hand(drum: Drum, sounds: list[Sound]) -> MarkerTrackerWrapper:
+    def right_hand(sounds: list[Sound]) -> MarkerTrackerWrapper:
         wrist = MarkerEnum.RIGHT_WRIST
         pinky = MarkerEnum.RIGHT_PINKY
         index = MarkerEnum.RIGHT_INDEX
@@ -79,55 +92,54 @@ class DrumStick(MarkerTrackerWrapper):
             wrist,
             pinky,
             index,
-            MarkerTracker(MarkerEnum.RIGHT_DRUM_STICK, drum=drum, sounds=sounds),
+            TrackerConfig(MarkerEnum.RIGHT_DRUM_STICK, sounds=sounds),
         )
 
 
 class Foot(MarkerTrackerWrapper):
-    def __init__(self, toe_tip: MarkerEnum, drum: Drum, sounds: list[Sound]) -> None:
+    def __init__(self, toe_tip: MarkerEnum, sounds: list[Sound]) -> None:
         self.toe_tip = toe_tip
-        self.position: Position = np.array([0, 0, 0])
-        self.tracker = MarkerTracker(
+        self.config = TrackerConfig(
             MarkerEnum.LEFT_FOOT_INDEX,
-            drum=drum,
             sounds=sounds,
             downward_trend=-0.04,
             upward_trend=0.003,
         )
 
-    def update(
-        self: Self, markers: list[NormalizedLandmark], timestamp_ms: float
-    ) -> None:
-        self.position = landmark_to_position(markers[self.toe_tip])
+    @property
+    def markers(self: Self) -> list[MarkerEnum]:
+        return [self.toe_tip]
 
-        self.tracker.update(self.position, timestamp_ms)
+    @staticmethod
+    def tracked_positions(positions: Positions) -> Positions:
+        return positions[:, 0]
 
     @staticmethod
-    def left_foot(drum: Drum, sounds: list[Sound]) -> MarkerTrackerWrapper:
-        return Foot(MarkerEnum.LEFT_FOOT_INDEX, drum, sounds)
+    def left_foot(sounds: list[Sound]) -> MarkerTrackerWrapper:
+        return Foot(MarkerEnum.LEFT_FOOT_INDEX, sounds)
 
     @staticmethod
-    def right_foot(drum: Drum, sounds: list[Sound]) -> MarkerTrackerWrapper:
-        return Foot(MarkerEnum.RIGHT_FOOT_INDEX, drum, sounds)
+    def right_foot(sounds: list[Sound]) -> MarkerTrackerWrapper:
+        return Foot(MarkerEnum.RIGHT_FOOT_INDEX, sounds)
 
 
 class Hand(MarkerTrackerWrapper):
-    def __init__(self, wrist: MarkerEnum, drum: Drum, sounds: list[Sound]) -> None:
+    def __init__(self, wrist: MarkerEnum, sounds: list[Sound]) -> None:
         self.wrist = wrist
-        self.position: Position = np.array([0, 0, 0])
-        self.tracker = MarkerTracker(wrist, drum=drum, sounds=sounds)
+        self.config = TrackerConfig(wrist, sounds=sounds)
 
-    def update(
-        self: Self, markers: list[NormalizedLandmark], timestamp_ms: float
-    ) -> None:
-        self.position = landmark_to_position(markers[self.wrist])
+    @property
+    def markers(self: Self) -> list[MarkerEnum]:
+        return [self.wrist]
 
-        self.tracker.update(self.position, timestamp_ms)
+    @staticmethod
+    def tracked_positions(positions: Positions) -> Positions:
+        return positions[:, 0]
 
     @staticmethod
-    def left_hand(drum: Drum, sounds: list[Sound]) -> MarkerTrackerWrapper:
-        return Hand(MarkerEnum.LEFT_WRIST, drum, sounds)
+    def left_hand(sounds: list[Sound]) -> MarkerTrackerWrapper:
+        return Hand(MarkerEnum.LEFT_WRIST, sounds)
 
     @staticmethod
-    def right_hand(drum: Drum, sounds: list[Sound]) -> MarkerTrackerWrapper:
-        return Hand(MarkerEnum.RIGHT_WRIST, drum, sounds)
+    def right_hand(sounds: list[Sound]) -> MarkerTrackerWrapper:
+        return Hand(MarkerEnum.RIGHT_WRIST, sounds)
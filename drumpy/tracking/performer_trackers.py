@@ -0,0 +1,93 @@
+from typing import Self
+
+import numpy as np
+import numpy.typing as npt
+
+from drumpy.tracking.drum_trackers import DrumTrackers
+from drumpy.tracking.tracker_engine import HitEvent, TrackerEngine
+from drumpy.util import LandmarkArray
+
+
+class PerformerTrackers:
+    """
+    Runs the hit detection of the drum trackers of several persons in a single TrackerEngine.
+    The engine has a row for every tracker of every person, person by person in the order of their trackers,
+    so a frame is one engine update however many persons play. Every person plays their own drum.
+    The trackers of a person that is not detected keep their latest position and their hits are dropped,
+    they start over when the person is detected again.
+    """
+
+    def __init__(self, performers: list[DrumTrackers], indices: list[int]) -> None:
+        """
+        :param performers: The drum trackers of every person, by identity, with the same trackers in the same order
+        :param indices: The indices of the landmarks in the rows of the arrays passed to update
+        """
+        self.performers = performers
+        first = performers[0]
+        self.trackers = len(first.trackers)
+        self.groups = first.groups
+        # The rows of the markers of all trackers in the passed arrays, tracker by tracker
+        self.columns = [indices.index(marker) for marker in first.tracker_markers]
+
+        self.engine = TrackerEngine.from_configs(
+            [
+                tracker.config
+                for drum_trackers in performers
+                for tracker in drum_trackers.trackers
+            ]
+        )
+        # The latest tracked position of every tracker of every person, of shape (persons, trackers, 3)
+        self.positions = np.zeros((len(performers), self.trackers, 3))
+        # The persons detected in the latest update
+        self.detected: npt.NDArray[np.bool_] = np.zeros(len(performers), dtype=bool)
+
+    def rows(self: Self, performer: int) -> slice:
+        """
+        The rows of the trackers of a person in the engine
+        """
+        return slice(performer * self.trackers, (performer + 1) * self.trackers)
+
+    def reset(self: Self, performer: int) -> None:
+        """
+        Forget the tracked positions of a person, used when their identity is given to another person
+        """
+        self.engine.reset(self.rows(performer))
+        self.positions[performer] = 0
+
+    def update(
+        self: Self,
+        landmarks: LandmarkArray,
+        identities: list[int],
+        timestamp_ms: float,
+    ) -> list[HitEvent]:
+        """
+        Update the trackers of all persons with the landmarks of a frame and play the sounds that are hit
+        :param landmarks: The landmarks of the detected persons, of shape (persons, indices, 5)
+        :param identities: The identity of every detected person
+        :return: The hits detected in this frame, the tracker of a hit is its row in the engine
+        """
+        # The axes are switched around like landmarks_to_positions
+        x, y, z = np.moveaxis(landmarks[:, self.columns, :3].astype(np.float64), 2, 0)
+        markers = np.stack((z, y, -x), axis=2)
+        for kind, trackers, rows in self.groups:
+            count = trackers.stop - trackers.start
+            self.positions[identities, trackers] = kind.tracked_positions(
+                markers[:, rows].reshape(len(identities) * count, -1, 3)
+            ).reshape(len(identities), count, 3)
+
+        detected = np.zeros_like(self.detected)
+        detected[identities] = True
+        # A person detected again moved while they were not tracked
+        for performer in np.flatnonzero(detected & ~self.detected).tolist():
+            self.engine.reset(self.rows(performer))
+        self.detected = detected
+
+        hits = [
+            hit
+            for hit in self.engine.update(self.positions.reshape(-1, 3), timestamp_ms)
+            if detected[hit.tracker // self.trackers]
+        ]
+        for hit in hits:
+            performer, tracker = divmod(hit.tracker, self.trackers)
+            self.performers[performer].play_hit(tracker, hit.position, hit.velocity)
+        return hits
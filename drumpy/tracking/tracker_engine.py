@@ -0,0 +1,192 @@
+from typing import Optional, Self
+
+import numpy as np
+import numpy.typing as npt
+
+from drumpy.drum.sound import Sound
+from drumpy.pose.mediapipe_markers import MarkerEnum
+from drumpy.util import Position
+
+# The positions of many trackers, of shape (trackers, 3), or a history of them
+Positions = npt.NDArray[np.float64]
+
+
+class TrackerConfig:
+    """
+    The marker, the sounds and the hit thresholds of a tracker run by the TrackerEngine
+    """
+
+    def __init__(
+        self,
+        marker: MarkerEnum,
+        sounds: list[Sound],
+        downward_trend: float = -0.1,
+        upward_trend: float = 0.01,
+    ) -> None:
+        """
+        :param marker: The marker the hits are played for
+        :param sounds: The sounds that can be played by this tracker
+        :param downward_trend: The threshold for a downward trend on the z-axis, in meter / second
+        :param upward_trend: The threshold for an upward trend on the z-axis, in meter / second
+        """
+        self.marker = marker
+        self.sounds = sounds
+        self.downward_trend = downward_trend
+        self.upward_trend = upward_trend
+
+
+class HitEvent:
+    """
+    A hit detected by the TrackerEngine
+    """
+
+    def __init__(self, tracker: int, position: Position, velocity: float) -> None:
+        """
+        :param tracker: The index of the tracker that hit, in the order the engine was created with
+        :param position: The position of the hit, look_ahead updates before the hit was detected
+        :param velocity: The average z-axis velocity before the hit, per second
+        """
+        self.tracker = tracker
+        self.position = position
+        self.velocity = velocity
+
+
+class TrackerEngine:
+    """
+    Runs the hit detection of MarkerTracker for many trackers at once.
+    The positions and z-axis velocities of all trackers are kept in ring buffers of arrays,
+    so a frame costs a fixed number of array operations however many points are tracked.
+    A hit occurs when the z-axis has a downward trend followed by an upward trend, as in MarkerTracker.
+    The average velocities before and in the look ahead of all trackers are a single product
+    of the velocity buffer with the window weights of the current head of the ring,
+    only the trackers that hit are visited in Python.
+    """
+
+    def __init__(
+        self,
+        downward_trends: list[float],
+        upward_trends: list[float],
+        memory: int = 6,
+        look_ahead: int = 2,
+    ) -> None:
+        """
+        :param downward_trends: The threshold for a downward trend on the z-axis of every tracker, in meter / second
+        :param upward_trends: The threshold for an upward trend on the z-axis of every tracker, in meter / second
+        :param memory: How many positions to keep track of
+        :param look_ahead: How many positions to look ahead to determine if a hit is registered
+        """
+        assert look_ahead < memory
+        assert len(downward_trends) == len(upward_trends)
+        self.memory = memory
+        self.look_ahead = look_ahead
+        trackers = len(downward_trends)
+
+        # The latest positions and z-axis velocities of every tracker, in ring buffers of memory entries,
+        # the oldest entry is at head once the buffers are full. The velocities are per millisecond.
+        self.positions: Positions = np.zeros((memory, trackers, 3))
+        self.velocities: npt.NDArray[np.float64] = np.zeros((memory, trackers))
+        self.head = 0  # The index the next entry is written to
+        self.count = 0  # The number of entries in the buffers
+        self.updates = 0  # The number of updates so far
+        self.previous_timestamp_ms = 0.0
+
+        # For every head, the weights of the buffered velocities in the negated average velocity
+        # before the look ahead and in the average velocity of the look ahead, both per second
+        self.window_weights = np.zeros((memory, 2, memory))
+        for head in range(memory):
+            order = [(head + i) % memory for i in range(memory)]
+            self.window_weights[head, 0, order[:-look_ahead]] = -1000 / (
+                memory - look_ahead
+            )
+            self.window_weights[head, 1, order[-look_ahead:]] = 1000 / look_ahead
+        # A hit needs both weighted averages above their threshold
+        self.trend_thresholds = -np.array(downward_trends, dtype=np.float64)
+        self.look_ahead_thresholds = np.array(upward_trends, dtype=np.float64)
+
+        # The update from which the next hit of every tracker can be registered
+        self.next_hits = np.full(trackers, 2.0)
+        # The trackers that start over, their next update has no velocity
+        self.restarted = np.zeros(trackers, dtype=bool)
+        self.any_restarted = False
+
+    @staticmethod
+    def from_configs(
+        configs: list[TrackerConfig], memory: int = 6, look_ahead: int = 2
+    ) -> "TrackerEngine":
+        """
+        Create an engine with the thresholds of the given trackers
+        """
+        return TrackerEngine(
+            [config.downward_trend for config in configs],
+            [config.upward_trend for config in configs],
+            memory=memory,
+            look_ahead=look_ahead,
+        )
+
+    def reset(self: Self, trackers: Optional[slice] = None) -> None:
+        """
+        Forget the buffered positions of all trackers, as if no update happened yet
+        :param trackers: Only forget the positions of these trackers, the others are not affected.
+        Their next update has no velocity and they hit once the buffers hold memory updates since the reset
+        """
+        if trackers is None:
+            self.count = 0
+            self.next_hits.fill(self.updates + 2)
+            return
+
+        self.velocities[:, trackers] = 0
+        self.restarted[trackers] = True
+        self.any_restarted = True
+        self.next_hits[trackers] = self.updates + self.memory
+
+    def update(self: Self, positions: Positions, timestamp_ms: float) -> list[HitEvent]:
+        """
+        Update all trackers with their new positions
+        :param positions: The position of every tracker, of shape (trackers, 3)
+        :return: The hits detected in this update, in the order of the trackers
+        """
+        self.updates += 1
+        head = self.head
+        self.positions[head] = positions
+        velocities = self.velocities[head]
+        if self.count == 0:
+            velocities.fill(0)
+        else:
+            np.subtract(
+                self.positions[head, :, 2],
+                self.positions[head - 1, :, 2],
+                out=velocities,
+            )
+            velocities /= timestamp_ms - self.previous_timestamp_ms
+            if self.any_restarted:
+                velocities[self.restarted] = 0
+        if self.any_restarted:
+            self.restarted.fill(False)  # noqa: FBT003
+            self.any_restarted = False
+
+        self.head = (head + 1) % self.memory
+        self.count = min(self.count + 1, self.memory)
+        self.previous_timestamp_ms = timestamp_ms
+        if self.count < self.memory:
+            return []
+
+        trend, look_ahead = np.dot(self.window_weights[self.head], self.velocities)
+        hit = trend > self.trend_thresholds
+        hit &= look_ahead > self.look_ahead_thresholds
+        if np.count_nonzero(hit) == 0:
+            return []
+
+        # Only the trackers with a hit are checked for the time since their previous hit
+        hits = np.flatnonzero(hit)
+        hits = hits[self.next_hits[hits] <= self.updates]
+        if len(hits) == 0:
+            return []
+
+        self.next_hits[hits] = self.updates + self.memory / 2
+        hit_positions = self.positions[self.head - self.look_ahead]
+        return [
+            HitEvent(tracker, hit_positions[tracker].copy(), -velocity)
+            for tracker, velocity in zip(
+                hits.tolist(), trend[hits].tolist(), strict=True
+            )
+        ]
@@ -1,7 +1,10 @@
 import csv
-from typing import Optional, Self
+import math
+from collections.abc import Iterator
+from typing import Any, Optional, Self
 
 from drumpy.pose.landmark_type import LandmarkType
+from drumpy.util import LandmarkArray
 
 
 class TrajectoryFile:
@@ -54,6 +57,73 @@ class TrajectoryFile:
             }
         )
 
+    def write_frame(
+        self: Self,
+        frame: int,
+        time: int,
+        landmarks: LandmarkArray,
+        landmark_type: LandmarkType,
+    ) -> None:
+        """
+        Write all landmarks of a frame to the CSV file, one line per landmark
+        :param landmarks: The landmarks as an array of shape (33, 5), or (2, 33, 5) for both landmark types,
+        NaN values are written as empty fields
+        """
+        self.writer.writerows(self.rows(frame, time, landmarks, landmark_type))
+
+    def write_frames(
+        self: Self,
+        frames: list[tuple[int, int, LandmarkArray]],
+        landmark_type: LandmarkType,
+    ) -> None:
+        """
+        Write the landmarks of multiple frames to the CSV file at once
+        :param frames: The frame number, the timestamp and the landmarks of every frame
+        """
+        self.writer.writerows(
+            row
+            for frame, time, landmarks in frames
+            for row in self.rows(frame, time, landmarks, landmark_type)
+        )
+
+    @staticmethod
+    def rows(
+        frame: int,
+        time: int,
+        landmarks: LandmarkArray,
+        landmark_type: LandmarkType,
+    ) -> Iterator[dict[str, Any]]:
+        """
+        The lines of a frame, with both landmark types the 33 normalized landmarks come first,
+        followed by the 33 world landmarks
+        """
+        if landmark_type == LandmarkType.BOTH:
+            types = [
+                (LandmarkType.LANDMARKS, landmarks[0]),
+                (LandmarkType.WORLD_LANDMARKS, landmarks[1]),
+            ]
+        else:
+            types = [(landmark_type, landmarks)]
+
+        for row_type, type_landmarks in types:
+            for index, (x, y, z, visibility, presence) in enumerate(
+                type_landmarks.tolist()
+            ):
+                yield {
+                    "frame": frame,
+                    "time": time,
+                    "index": index,
+                    "x": x,
+                    "y": y,
+                    "z": z,
+                    "visibility": None if math.isnan(visibility) else visibility,
+                    "presence": None if math.isnan(presence) else presence,
+                    "landmark_type": row_type.value,
+                }
+
+    def flush(self: Self) -> None:
+        self.file.flush()
+
     def close(self: Self) -> None:
         self.file.flush()
         self.file.close()
@@ -0,0 +1,277 @@
+import io
+import mmap
+import os
+from typing import Optional, Self
+
+import numpy as np
+import numpy.typing as npt
+
+from drumpy.binary_trajectory_file import (
+    COMPRESSED_MAGIC,
+    HEADER_DTYPE,
+    MAGIC,
+    read_header,
+    record_dtype,
+)
+from drumpy.pose.landmark_type import LandmarkType
+from drumpy.util import LANDMARK_FIELDS, NUM_LANDMARKS, LandmarkArray
+
+# The index of a trajectory file is cached next to it, with this suffix appended to its path
+INDEX_SUFFIX = ".index.npz"
+
+# The columns of the CSV trajectory file that hold the values of a LandmarkArray
+CSV_LANDMARK_COLUMNS = (3, 4, 5, 6, 7)
+
+
+class TrajectoryReader:
+    """
+    Reads slices of a trajectory file written by TrajectoryFile or BinaryTrajectoryFile, without parsing the whole file.
+    The file is memory-mapped. An index from every frame to its frame number, timestamp and byte offset
+    is built on first use and cached on disk, so opening a large file again is instant.
+    The landmarks of a binary file are returned as views of the mapped records,
+    those of a CSV file are parsed from the byte range of the requested frames only.
+    Every frame should contain all 33 landmarks, as written by write_frame.
+    A file with both landmark types holds the normalized and the world landmarks of every frame,
+    landmarks returns either type or both of them.
+    """
+
+    def __init__(self, path: str, cache_index: bool = True) -> None:  # noqa: FBT001, FBT002
+        """
+        :param path: The path of the trajectory file, binary or CSV
+        :param cache_index: Store the index next to the file and reuse it while the file is unchanged
+        """
+        self.path = path
+        with open(path, "rb") as file:
+            magic = file.read(len(MAGIC))
+        if magic == COMPRESSED_MAGIC:
+            raise ValueError(
+                "Compressed trajectory files can not be memory-mapped, read them with read_records"
+            )
+        self.binary = magic == MAGIC
+
+        self.records: Optional[npt.NDArray[np.void]] = None
+        self.mmap: Optional[mmap.mmap] = None
+        if self.binary:
+            with open(path, "rb") as file:
+                self.landmark_type = read_header(file)
+            self.record_dtype = record_dtype(self.landmark_type)
+            # A file that is still being written can end in a partial record, it is left out
+            count = (
+                os.path.getsize(path) - HEADER_DTYPE.itemsize
+            ) // self.record_dtype.itemsize
+            self.records = (
+                np.memmap(
+                    path,
+                    dtype=self.record_dtype,
+                    mode="r",
+                    offset=HEADER_DTYPE.itemsize,
+                    shape=(count,),
+                )
+                if count > 0
+                else np.empty(0, dtype=self.record_dtype)
+            )
+        else:
+            # An empty file, like the log of a run that just started, can not be mapped and has no frames
+            if os.path.getsize(path) > 0:
+                with open(path, "rb") as file:
+                    self.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.landmark_type = self.read_csv_landmark_type()
+
+        index = self.load_index() if cache_index else None
+        if index is None:
+            index = self.build_index()
+            if cache_index:
+                self.save_index(*index)
+
+        # The frame number, timestamp and byte offset of every frame, in the order of the file
+        self.frames, self.times, self.offsets = index
+
+    def __len__(self: Self) -> int:
+        return len(self.frames)
+
+    def build_index(
+        self: Self,
+    ) -> tuple[npt.NDArray[np.int64], npt.NDArray[np.int64], npt.NDArray[np.int64]]:
+        """
+        Scan the file for the frame number, the timestamp and the byte offset of every frame
+        """
+        if self.records is not None:
+            offsets = HEADER_DTYPE.itemsize + self.record_dtype.itemsize * np.arange(
+                len(self.records), dtype=np.int64
+            )
+            return (
+                np.array(self.records["frame"], dtype=np.int64),
+                np.array(self.records["time"], dtype=np.int64),
+                offsets,
+            )
+
+        if self.mmap is None:
+            return (
+                np.empty(0, dtype=np.int64),
+                np.empty(0, dtype=np.int64),
+                np.empty(0, dtype=np.int64),
+            )
+
+        data = np.frombuffer(self.mmap, dtype=np.uint8)
+        line_ends = np.flatnonzero(data == ord("\n"))
+        # Skip the header line, every frame starts on a line that is a multiple of 33 lines further,
+        # or 66 lines with both landmark types
+        line_starts = line_ends[:-1] + 1
+        offsets = line_starts[:: self.lines_per_frame].astype(np.int64)
+
+        frames = np.empty(len(offsets), dtype=np.int64)
+        times = np.empty(len(offsets), dtype=np.int64)
+        for i, offset in enumerate(offsets.tolist()):
+            frame, time, _ = self.mmap[offset : offset + 64].split(b",", 2)
+            frames[i] = int(frame)
+            times[i] = int(time)
+        return frames, times, offsets
+
+    @property
+    def index_path(self: Self) -> str:
+        return self.path + INDEX_SUFFIX
+
+    def load_index(
+        self: Self,
+    ) -> Optional[
+        tuple[npt.NDArray[np.int64], npt.NDArray[np.int64], npt.NDArray[np.int64]]
+    ]:
+        """
+        Load the cached index, if it exists and the file did not change since it was built
+        """
+        try:
+            with np.load(self.index_path) as index:
+                stat = os.stat(self.path)
+                if (
+                    int(index["size"]) != stat.st_size
+                    or int(index["mtime_ns"]) != stat.st_mtime_ns
+                ):
+                    return None
+                return index["frames"], index["times"], index["offsets"]
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def save_index(
+        self: Self,
+        frames: npt.NDArray[np.int64],
+        times: npt.NDArray[np.int64],
+        offsets: npt.NDArray[np.int64],
+    ) -> None:
+        stat = os.stat(self.path)
+        try:
+            # np.savez appends .npz to paths without that extension, write through a file object
+            with open(self.index_path, "wb") as file:
+                np.savez(
+                    file,
+                    frames=frames,
+                    times=times,
+                    offsets=offsets,
+                    size=stat.st_size,
+                    mtime_ns=stat.st_mtime_ns,
+                )
+        except OSError as error:
+            print(f"Could not cache the trajectory index: {error}")
+
+    @property
+    def lines_per_frame(self: Self) -> int:
+        return NUM_LANDMARKS * (2 if self.landmark_type == LandmarkType.BOTH else 1)
+
+    def read_csv_landmark_type(self: Self) -> LandmarkType:
+        """
+        The type of the first line, a file with both types has world landmarks on the 34th line of a frame
+        """
+        if self.mmap is None:
+            return LandmarkType.LANDMARKS
+
+        # Skip the header line, the first frame fits well within the first 64 KiB
+        lines = self.mmap[: 64 * 1024].split(b"\n", NUM_LANDMARKS + 2)[1:-1]
+        if len(lines) == 0:
+            return LandmarkType.LANDMARKS
+
+        types = [LandmarkType(int(line.rsplit(b",", 1)[1])) for line in lines]
+        if (
+            types[0] == LandmarkType.LANDMARKS
+            and len(types) > NUM_LANDMARKS
+            and types[NUM_LANDMARKS] == LandmarkType.WORLD_LANDMARKS
+        ):
+            return LandmarkType.BOTH
+        return types[0]
+
+    def frame_slice(self: Self, first_frame: int, last_frame: int) -> slice:
+        """
+        The records of the frames with a frame number in the given range, both inclusive
+        Frames without a detected pose are not in the file, so the slice can contain fewer frames
+        """
+        return slice(
+            int(np.searchsorted(self.frames, first_frame, side="left")),
+            int(np.searchsorted(self.frames, last_frame, side="right")),
+        )
+
+    def time_slice(self: Self, start_ms: int, stop_ms: int) -> slice:
+        """
+        The records of the frames with a timestamp from start_ms up to but not including stop_ms
+        """
+        return slice(
+            int(np.searchsorted(self.times, start_ms, side="left")),
+            int(np.searchsorted(self.times, stop_ms, side="left")),
+        )
+
+    def landmarks(
+        self: Self, records: slice, landmark_type: Optional[LandmarkType] = None
+    ) -> LandmarkArray:
+        """
+        Get the landmarks of a range of records
+        :param records: The records to read, as returned by frame_slice or time_slice
+        :param landmark_type: The type to select from a file with both types, if None all landmarks are returned
+        :return: An array of shape (frames, 33, 5), or (frames, 2, 33, 5) for both types,
+        a read-only view of the file for binary files
+        """
+        start, stop, step = records.indices(len(self))
+        assert step == 1, "Only contiguous ranges of records can be read"
+        landmarks = self.read_landmarks(start, stop)
+        if landmark_type is None or landmark_type == self.landmark_type:
+            return landmarks
+
+        assert self.landmark_type == LandmarkType.BOTH, "Unexpected landmark type"
+        return landmarks[:, landmark_type.value]
+
+    def read_landmarks(self: Self, start: int, stop: int) -> LandmarkArray:
+        shape = (
+            (2, NUM_LANDMARKS, LANDMARK_FIELDS)
+            if self.landmark_type == LandmarkType.BOTH
+            else (NUM_LANDMARKS, LANDMARK_FIELDS)
+        )
+        if self.records is not None:
+            return self.records["landmarks"][start:stop]
+
+        if start >= stop:
+            return np.empty((0, *shape), dtype=np.float32)
+
+        assert self.mmap is not None
+        end = int(self.offsets[stop]) if stop < len(self) else len(self.mmap)
+        values = np.genfromtxt(
+            io.BytesIO(self.mmap[int(self.offsets[start]) : end]),
+            delimiter=",",
+            usecols=CSV_LANDMARK_COLUMNS,
+            dtype=np.float32,
+        )
+        return values.reshape(stop - start, *shape)
+
+    def landmark(
+        self: Self,
+        index: int,
+        records: slice,
+        landmark_type: Optional[LandmarkType] = None,
+    ) -> LandmarkArray:
+        """
+        Get a single landmark in a range of records
+        :param index: The index of the landmark, see MarkerEnum
+        :return: An array of shape (frames, 5), or (frames, 2, 5) for both types
+        """
+        return self.landmarks(records, landmark_type)[..., index, :]
+
+    def close(self: Self) -> None:
+        if self.mmap is not None:
+            self.mmap.close()
+        # The memory map of a binary file is closed once the views of it are released
+        self.records = None
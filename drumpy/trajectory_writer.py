@@ -0,0 +1,178 @@
+import queue
+import threading
+import time
+from itertools import groupby
+from pathlib import Path
+from typing import Optional, Self, TypeAlias
+
+from drumpy.binary_trajectory_file import (
+    BinaryTrajectoryFile,
+    CompressedTrajectoryFile,
+)
+from drumpy.pose.landmark_type import LandmarkType
+from drumpy.trajectory_file import TrajectoryFile
+from drumpy.util import LandmarkArray
+
+# Files with these extensions are written in the binary formats, all others as CSV
+BINARY_EXTENSION = ".trajectory"
+COMPRESSED_EXTENSION = ".ztrajectory"
+
+# A file that trajectory frames can be written to
+TrajectoryWriter: TypeAlias = (
+    TrajectoryFile | BinaryTrajectoryFile | CompressedTrajectoryFile
+)
+
+# A frame waiting to be written: the frame number, the timestamp, the landmarks and their type
+QueuedFrame: TypeAlias = tuple[int, int, LandmarkArray, LandmarkType]
+
+
+class BackgroundTrajectoryWriter:
+    """
+    Writes the frames of a trajectory file on a dedicated writer thread.
+    write_frame only queues the frame and never blocks, so a slow disk cannot delay the caller.
+    The writer thread collects the queued frames in batches and writes a batch at once,
+    when it is full or when its oldest frame has waited for the flush interval.
+    An error on the writer thread stops the writer, it is raised again by the next write_frame or close.
+    """
+
+    def __init__(
+        self,
+        trajectory_file: TrajectoryWriter,
+        batch_size: int = 256,
+        flush_interval_s: float = 1.0,
+    ) -> None:
+        """
+        :param trajectory_file: The file to write the frames to, only used by the writer thread
+        :param batch_size: The number of frames after which a batch is written
+        :param flush_interval_s: The maximum time a frame waits in a batch before it is written, in seconds
+        """
+        self.trajectory_file = trajectory_file
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+
+        # None is queued to stop the writer thread
+        self.queue: queue.Queue[Optional[QueuedFrame]] = queue.Queue()
+        self.max_queue_depth = 0
+        self.frames_written = 0
+        # The exception that stopped the writer thread, if any
+        self.error: Optional[Exception] = None
+
+        self.thread = threading.Thread(
+            target=self.run, name="trajectory-writer", daemon=True
+        )
+        self.thread.start()
+
+    @property
+    def queue_depth(self: Self) -> int:
+        """
+        The number of frames waiting to be written
+        """
+        return self.queue.qsize()
+
+    def write_frame(
+        self: Self,
+        frame: int,
+        time: int,
+        landmarks: LandmarkArray,
+        landmark_type: LandmarkType,
+    ) -> None:
+        """
+        Queue the landmarks of a frame to be written
+        :param landmarks: The landmarks as an array of shape (33, 5), should not be modified afterwards
+        :raises Exception: The exception that stopped the writer thread, no frames are queued after it
+        """
+        self.raise_error()
+        self.queue.put((frame, time, landmarks, landmark_type))
+        self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize())
+
+    def raise_error(self: Self) -> None:
+        """
+        Raise the exception that stopped the writer thread, if any
+        """
+        if self.error is not None:
+            raise self.error
+
+    def run(self: Self) -> None:
+        """
+        Runs on the writer thread, keeps the exception that stops the writer loop for the caller
+        """
+        try:
+            self.write_loop()
+        except Exception as error:
+            self.error = error
+
+    def write_loop(self: Self) -> None:
+        """
+        Writer loop, runs on the writer thread until the writer is closed
+        """
+        batch: list[QueuedFrame] = []
+        deadline = 0.0
+        while True:
+            try:
+                # Wait for the first frame of a batch, and at most until the deadline after that
+                timeout = max(0.0, deadline - time.monotonic()) if batch else None
+                frame = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                self.write_batch(batch)
+                batch = []
+                continue
+
+            if frame is None:
+                self.write_batch(batch)
+                return
+
+            if not batch:
+                deadline = time.monotonic() + self.flush_interval_s
+            batch.append(frame)
+            if len(batch) >= self.batch_size:
+                self.write_batch(batch)
+                batch = []
+
+    def write_batch(self: Self, batch: list[QueuedFrame]) -> None:
+        if not batch:
+            return
+
+        for landmark_type, frames in groupby(batch, key=lambda frame: frame[3]):
+            self.trajectory_file.write_frames(
+                [(frame, time, landmarks) for frame, time, landmarks, _ in frames],
+                landmark_type,
+            )
+        self.trajectory_file.flush()
+        self.frames_written += len(batch)
+
+    def close(self: Self) -> None:
+        """
+        Write all queued frames and close the file
+        :raises Exception: The exception that stopped the writer thread, the frames after it are not written
+        """
+        self.queue.put(None)
+        self.thread.join()
+        self.trajectory_file.close()
+        self.raise_error()
+        print(
+            f"Trajectory writer: {self.frames_written} frames written, "
+            f"max queue depth: {self.max_queue_depth}"
+        )
+
+
+def open_trajectory_file(
+    path: str,
+    landmark_type: LandmarkType,
+    write_behind: bool = False,  # noqa: FBT001, FBT002
+) -> TrajectoryWriter | BackgroundTrajectoryWriter:
+    """
+    Open a trajectory file for writing, the format is chosen by the extension of the path
+    :param write_behind: Write the frames on a background thread instead of the calling thread
+    """
+    suffix = Path(path).suffix
+    trajectory_file: TrajectoryWriter
+    if suffix == BINARY_EXTENSION:
+        trajectory_file = BinaryTrajectoryFile(path, landmark_type)
+    elif suffix == COMPRESSED_EXTENSION:
+        trajectory_file = CompressedTrajectoryFile(path, landmark_type)
+    else:
+        trajectory_file = TrajectoryFile(path)
+
+    if write_behind:
+        return BackgroundTrajectoryWriter(trajectory_file)
+    return trajectory_file
@@ -1,4 +1,5 @@
-from typing import TypeAlias
+import math
+from typing import Optional, TypeAlias
 
 import numpy as np
 import numpy.typing as npt
@@ -7,6 +8,13 @@ from mediapipe.tasks.python.components.containers.landmark import NormalizedLand
 # Type for a 3D position, x, y, z
 Position: TypeAlias = npt.NDArray[np.float64]
 
+# Type for all landmarks of a pose, one row per landmark: x, y, z, visibility, presence
+LandmarkArray: TypeAlias = npt.NDArray[np.float32]
+
+# The number of landmarks in a pose, and the number of values stored per landmark
+NUM_LANDMARKS = 33
+LANDMARK_FIELDS = 5
+
 
 def position_str(position: Position) -> str:
     """
@@ -32,6 +40,76 @@ def landmark_to_position(landmark: NormalizedLandmark) -> Position:
     return np.array([x, y, z])
 
 
+def landmarks_to_positions(
+    landmarks: list[NormalizedLandmark], indices: list[int]
+) -> npt.NDArray[np.float64]:
+    """
+    Convert the landmarks at the given indices to positions in a single array of shape (len(indices), 3)
+    The axes are switched around like landmark_to_position
+    """
+    return np.array(
+        [
+            (landmark.z, landmark.y, -landmark.x)
+            for landmark in (landmarks[index] for index in indices)
+        ],
+        dtype=np.float64,
+    ).reshape(-1, 3)
+
+
+def landmarks_to_array(
+    landmarks: list[NormalizedLandmark], indices: Optional[list[int]] = None
+) -> LandmarkArray:
+    """
+    Convert the landmarks of a pose to a numpy array of shape (33, 5)
+    Missing visibility or presence values are stored as NaN
+    :param indices: Only convert the landmarks at these indices, in this order, if None all landmarks are converted
+    """
+    return np.array(
+        [
+            (
+                landmark.x,
+                landmark.y,
+                landmark.z,
+                np.nan if landmark.visibility is None else landmark.visibility,
+                np.nan if landmark.presence is None else landmark.presence,
+            )
+            for landmark in (
+                landmarks if indices is None else [landmarks[i] for i in indices]
+            )
+        ],
+        dtype=np.float32,
+    ).reshape(-1, LANDMARK_FIELDS)
+
+
+def array_to_landmarks(
+    landmarks: LandmarkArray, indices: Optional[list[int]] = None
+) -> list[NormalizedLandmark]:
+    """
+    Convert an array of shape (33, 5) back to mediapipe landmarks
+    NaN visibility or presence values become None
+    :param indices: The indices of the landmarks in the rows of the array, the other landmarks are left empty,
+    every one a separate landmark without coordinates, if None the array holds all landmarks
+    """
+    converted = [
+        NormalizedLandmark(
+            x=x,
+            y=y,
+            z=z,
+            visibility=None if math.isnan(visibility) else visibility,
+            presence=None if math.isnan(presence) else presence,
+        )
+        for x, y, z, visibility, presence in landmarks.tolist()
+    ]
+    if indices is None:
+        return converted
+
+    pose = dict(zip(indices, converted, strict=True))
+    return [
+        pose[index] if index in pose else NormalizedLandmark()
+        for index in range(NUM_LANDMARKS)
+    ]
+
+
 def distance_no_depth(a: Position, b: Position) -> float:
     """
     Calculate the distance between two 3D positions without considering the depth, the x-axis
@@ -0,0 +1,68 @@
+from itertools import pairwise
+
+from drumpy.pose.adaptive_model import AdaptiveModelSelector
+from drumpy.pose.landmarker_model import LandmarkerModel
+
+# The latency of every model on a simulated machine, in ms
+LATENCIES_MS = {
+    LandmarkerModel.LITE: 8.0,
+    LandmarkerModel.FULL: 15.0,
+    LandmarkerModel.HEAVY: 45.0,
+}
+
+
+def run(selector: AdaptiveModelSelector, frames: int) -> list[LandmarkerModel]:
+    """
+    :return: The model selected after every frame
+    """
+    return [selector.update(LATENCIES_MS[selector.model]) for _ in range(frames)]
+
+
+def switches(models: list[LandmarkerModel]) -> int:
+    return sum(previous != model for previous, model in pairwise(models))
+
+
+def test_slow_model_is_degraded_after_the_patience() -> None:
+    selector = AdaptiveModelSelector(33, LandmarkerModel.HEAVY, patience=30)
+    models = run(selector, 30)
+    assert models[:29] == [LandmarkerModel.HEAVY] * 29
+    assert models[29] == LandmarkerModel.FULL
+
+
+def test_latency_around_the_target_does_not_switch() -> None:
+    selector = AdaptiveModelSelector(33, LandmarkerModel.FULL)
+    for frame in range(2000):
+        assert selector.update(30.0 if frame % 2 == 0 else 36.0) == (
+            LandmarkerModel.FULL
+        )
+
+
+def test_too_slow_model_is_not_retried_until_the_reprobe() -> None:
+    selector = AdaptiveModelSelector(
+        33, LandmarkerModel.FULL, patience=30, reprobe_after=900
+    )
+    # FULL is well below the target, HEAVY is over it
+    models = run(selector, 800)
+    assert switches(models) == 2  # noqa: PLR2004
+    assert models[-1] == LandmarkerModel.FULL
+    assert selector.too_slow(LandmarkerModel.HEAVY)
+
+    # Once the measurement expires the larger model is probed again, and degraded from again
+    models = run(selector, 400)
+    assert LandmarkerModel.HEAVY in models
+    assert models[-1] == LandmarkerModel.FULL
+    assert switches(models) == 2  # noqa: PLR2004
+
+
+def test_load_drop_makes_the_larger_model_fast_enough() -> None:
+    selector = AdaptiveModelSelector(
+        33, LandmarkerModel.FULL, patience=30, reprobe_after=900
+    )
+    run(selector, 200)
+    assert selector.model == LandmarkerModel.FULL
+
+    latencies_ms = {**LATENCIES_MS, LandmarkerModel.HEAVY: 25.0}
+    models = [selector.update(latencies_ms[selector.model]) for _ in range(1200)]
+    # After the reprobe the larger model stays, it is within the target
+    assert models[-1] == LandmarkerModel.HEAVY
+    assert switches(models) == 1
@@ -0,0 +1,27 @@
+from click.testing import CliRunner
+
+from drumpy.cli import cli
+
+
+def test_app_options_are_rejected_with_a_command() -> None:
+    result = CliRunner().invoke(
+        cli, ["--model", "lite", "--num-poses", "2", "convert", "in", "out"]
+    )
+    assert result.exit_code == 2  # noqa: PLR2004
+    assert "--model, --num-poses cannot be used with the convert command" in (
+        result.output
+    )
+
+
+def test_process_takes_the_poses_and_publishing_options() -> None:
+    result = CliRunner().invoke(cli, ["process", "--help"])
+    assert result.exit_code == 0
+    assert all(
+        option in result.output
+        for option in [
+            "--num-poses",
+            "--publish-udp",
+            "--publish-host",
+            "--publish-shm",
+        ]
+    )
@@ -0,0 +1,104 @@
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+from mediapipe.tasks.python import BaseOptions  # type: ignore
+
+from drumpy.offline.landmark_cache import PARTIAL_SUFFIX, STALE_PARTIAL_S, LandmarkCache
+from drumpy.offline.pipeline import HeadlessPipeline
+from drumpy.pose.landmark_type import LandmarkType
+from drumpy.pose.landmarker_model import LandmarkerModel
+from drumpy.util import LANDMARK_FIELDS, NUM_LANDMARKS
+
+
+def store_entry(cache: LandmarkCache, key: str, frames: int) -> Path:
+    writer = cache.open_entry(key, LandmarkType.LANDMARKS)
+    rng = np.random.default_rng(0)
+    for frame in range(frames):
+        writer.write_frame(
+            frame,
+            frame * 33,
+            rng.random((NUM_LANDMARKS, LANDMARK_FIELDS)).astype(np.float32),
+            LandmarkType.LANDMARKS,
+        )
+    writer.close()
+    cache.store(key)
+    return cache.entry_path(key)
+
+
+def test_entry_is_visible_once_stored(tmp_path: Path) -> None:
+    cache = LandmarkCache(tmp_path)
+    writer = cache.open_entry("key", LandmarkType.LANDMARKS)
+    assert cache.get("key") is None
+    writer.close()
+    cache.store("key")
+    assert cache.get("key") == cache.entry_path("key")
+    assert list(tmp_path.glob("*" + PARTIAL_SUFFIX)) == []
+
+
+def test_video_hash_is_remembered(tmp_path: Path) -> None:
+    cache = LandmarkCache(tmp_path / "cache")
+    video = tmp_path / "video.mp4"
+    video.write_bytes(b"frames")
+    video_hash = cache.video_hash(str(video))
+    assert video_hash == LandmarkCache.hash_file(str(video))
+    # The remembered hash is used while the size and modification time are unchanged
+    (tmp_path / "cache" / "hashes.json").write_text(
+        (tmp_path / "cache" / "hashes.json").read_text().replace(video_hash, "known")
+    )
+    assert cache.video_hash(str(video)) == "known"
+
+    video.write_bytes(b"other frames")
+    assert cache.video_hash(str(video)) == LandmarkCache.hash_file(str(video))
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path: Path) -> None:
+    entry_size = store_entry(LandmarkCache(tmp_path), "size", 10).stat().st_size
+    cache = LandmarkCache(tmp_path, max_size_bytes=3 * entry_size)
+    now = time.time()
+    for age, key in enumerate(["size", "first", "second"]):
+        path = store_entry(cache, key, 10)
+        os.utime(path, (now - 100 + age, now - 100 + age))
+
+    # Reading the oldest entry makes it the most recently used
+    assert cache.get("size") is not None
+    store_entry(cache, "third", 10)
+    assert cache.get("first") is None
+    assert all(cache.get(key) is not None for key in ["size", "second", "third"])
+
+
+def test_stale_partial_entries_are_removed(tmp_path: Path) -> None:
+    cache = LandmarkCache(tmp_path)
+    stale = cache.open_entry("stale", LandmarkType.LANDMARKS)
+    stale.close()
+    running = cache.open_entry("running", LandmarkType.LANDMARKS)
+    running.close()
+    stale_path = Path(str(cache.entry_path("stale")) + PARTIAL_SUFFIX)
+    modified = time.time() - STALE_PARTIAL_S - 1
+    os.utime(stale_path, (modified, modified))
+
+    cache.evict()
+    assert not stale_path.exists()
+    assert Path(str(cache.entry_path("running")) + PARTIAL_SUFFIX).exists()
+
+
+def test_drum_only_run_uses_the_cached_landmarks(tmp_path: Path) -> None:
+    cache = LandmarkCache(tmp_path / "cache")
+    # Only the content of the video is hashed, it is not decoded when the landmarks are cached
+    video = tmp_path / "video.mp4"
+    video.write_bytes(b"frames")
+    key = LandmarkCache.key(
+        cache.video_hash(str(video)),
+        LandmarkerModel.FULL,
+        BaseOptions.Delegate.CPU,
+        LandmarkType.LANDMARKS,
+    )
+    frames = 50
+    store_entry(cache, key, frames)
+
+    pipeline = HeadlessPipeline(str(video), cache=cache)
+    assert pipeline.cache_keys == {LandmarkType.LANDMARKS: key}
+    assert pipeline.fully_cached
+    assert pipeline.video_source is None
+    assert pipeline.run().frames == frames
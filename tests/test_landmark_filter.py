@@ -0,0 +1,98 @@
+from collections.abc import Callable
+
+import numpy as np
+import pytest
+
+from drumpy.pose.landmark_filter import KalmanFilter, LandmarkFilter, OneEuroFilter
+from drumpy.util import LandmarkArray
+
+FRAME_MS = 1000 / 30
+
+
+def landmarks_at(position: float) -> LandmarkArray:
+    """
+    Two landmarks at the same position, with a visibility and presence
+    """
+    landmarks = np.zeros((2, 5), dtype=np.float32)
+    landmarks[:, :3] = position
+    landmarks[:, 3:] = 0.9
+    return landmarks
+
+
+def filter_positions(
+    landmark_filter: LandmarkFilter, position: Callable[[float], float], frames: int
+) -> np.ndarray:
+    """
+    :return: The filtered x coordinate of the first landmark of every frame, at 30 fps
+    """
+    return np.array(
+        [
+            landmark_filter.filter(
+                landmarks_at(position(frame * FRAME_MS)), frame * FRAME_MS
+            )[0, 0]
+            for frame in range(frames)
+        ]
+    )
+
+
+def step(timestamp_ms: float) -> float:
+    # The step happens at frame 15
+    return 0.1 if timestamp_ms >= 500 else 0.0  # noqa: PLR2004
+
+
+def steady_motion(timestamp_ms: float) -> float:
+    return 0.5 * timestamp_ms / 1000
+
+
+def test_one_euro_follows_a_step_without_overshoot() -> None:
+    filtered = filter_positions(OneEuroFilter(), step, 60)
+    assert 0 < filtered[15] < 0.1  # noqa: PLR2004
+    assert np.all(np.diff(filtered) >= 0)
+    assert np.all(filtered <= 0.1 + 1e-6)
+    np.testing.assert_allclose(filtered[20:], 0.1, atol=1e-3)
+
+
+def test_kalman_settles_after_a_step() -> None:
+    filtered = filter_positions(KalmanFilter(), step, 60)
+    assert 0 < filtered[15] < 0.1  # noqa: PLR2004
+    # The constant velocity model overshoots briefly before it settles
+    assert np.max(filtered) < 0.12  # noqa: PLR2004
+    np.testing.assert_allclose(filtered[25:], 0.1, atol=1e-3)
+
+
+@pytest.mark.parametrize(
+    ("landmark_filter", "max_lag"),
+    [(OneEuroFilter(), 5e-3), (KalmanFilter(), 1e-5)],
+)
+def test_steady_motion_is_followed_with_a_constant_lag(
+    landmark_filter: LandmarkFilter, max_lag: float
+) -> None:
+    filtered = filter_positions(landmark_filter, steady_motion, 60)
+    expected = np.array([steady_motion(frame * FRAME_MS) for frame in range(60)])
+    lag = expected[30:] - filtered[30:]
+    assert np.all(lag >= -1e-6)  # noqa: PLR2004
+    assert np.all(lag <= max_lag)
+    assert np.ptp(lag) < 1e-5  # noqa: PLR2004
+
+
+@pytest.mark.parametrize("landmark_filter", [OneEuroFilter(), KalmanFilter()])
+def test_jitter_at_rest_is_reduced(landmark_filter: LandmarkFilter) -> None:
+    noise = np.random.default_rng(0).normal(0, 0.005, 200)
+    filtered = filter_positions(
+        landmark_filter,
+        lambda timestamp_ms: 0.5 + noise[round(timestamp_ms / FRAME_MS)],
+        200,
+    )
+    assert np.std(filtered[50:]) < np.std(noise[50:])
+
+
+def test_visibility_is_passed_through_and_an_old_frame_starts_over() -> None:
+    landmark_filter = OneEuroFilter()
+    landmark_filter.filter(landmarks_at(0.0), 100)
+    filtered = landmark_filter.filter(landmarks_at(0.1), 133)
+    np.testing.assert_array_equal(filtered[:, 3:], 0.9)
+    assert filtered[0, 0] < 0.1  # noqa: PLR2004
+    # A frame that is not newer than the previous one is passed through unfiltered
+    np.testing.assert_array_equal(
+        landmark_filter.filter(landmarks_at(0.2), 133), landmarks_at(0.2)
+    )
@@ -0,0 +1,123 @@
+import uuid
+from collections.abc import Iterator
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from drumpy.landmark_publisher import (
+    HIT,
+    MESSAGE_HEADER,
+    RING_HEADER,
+    SLOT_HEADER,
+    LandmarkPublisher,
+    MessageKind,
+    MessageSink,
+    SharedMemoryRing,
+    SharedMemoryRingReader,
+    decode_header,
+    decode_landmarks,
+)
+from drumpy.pose.landmark_type import LandmarkType
+from drumpy.pose.mediapipe_markers import MarkerEnum
+from drumpy.util import LANDMARK_FIELDS, NUM_LANDMARKS
+
+
+class ListSink(MessageSink):
+    def __init__(self) -> None:
+        self.messages: list[bytes] = []
+
+    def send(self, message: bytes) -> None:
+        self.messages.append(message)
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.fixture
+def ring() -> Iterator[SharedMemoryRing]:
+    ring = SharedMemoryRing(f"drumpy-test-{uuid.uuid4().hex[:8]}", slots=4)
+    yield ring
+    ring.close()
+
+
+def sequences(messages: list[bytes]) -> list[int]:
+    return [decode_header(message)[1] for message in messages]
+
+
+def test_reader_reads_the_new_messages(ring: SharedMemoryRing) -> None:
+    publisher = LandmarkPublisher(ring)
+    reader = SharedMemoryRingReader(ring.memory.name)
+    for _ in range(3):
+        publisher.publish_landmarks(np.zeros((NUM_LANDMARKS, LANDMARK_FIELDS)), 0)
+    assert sequences(reader.read()) == [1, 2, 3]
+    assert reader.read() == []
+
+    publisher.publish_landmarks(np.zeros((NUM_LANDMARKS, LANDMARK_FIELDS)), 0)
+    assert sequences(reader.read()) == [4]
+    assert reader.lost_messages == 0
+    reader.close()
+
+
+def test_overwritten_messages_are_lost(ring: SharedMemoryRing) -> None:
+    publisher = LandmarkPublisher(ring)
+    reader = SharedMemoryRingReader(ring.memory.name)
+    for _ in range(7):
+        publisher.publish_landmarks(np.zeros((NUM_LANDMARKS, LANDMARK_FIELDS)), 0)
+    # The ring keeps the latest 4 messages
+    assert sequences(reader.read()) == [4, 5, 6, 7]
+    assert reader.lost_messages == 3  # noqa: PLR2004
+    reader.close()
+
+
+def test_slot_written_while_read_is_discarded(ring: SharedMemoryRing) -> None:
+    publisher = LandmarkPublisher(ring)
+    reader = SharedMemoryRingReader(ring.memory.name)
+    for _ in range(3):
+        publisher.publish_landmarks(np.zeros((NUM_LANDMARKS, LANDMARK_FIELDS)), 0)
+    # The writer is overwriting the slot of message 2 with message 6, its counter is odd
+    offset = RING_HEADER.size + 2 * reader.slot_size
+    SLOT_HEADER.pack_into(ring.memory.buf, offset, 2 * 6 - 1)
+
+    assert sequences(reader.read()) == [1, 3]
+    assert reader.lost_messages == 1
+    reader.close()
+
+
+def test_landmarks_of_the_published_type_are_sent() -> None:
+    sink = ListSink()
+    publisher = LandmarkPublisher(sink, LandmarkType.WORLD_LANDMARKS)
+    landmarks = np.arange(NUM_LANDMARKS * LANDMARK_FIELDS, dtype=np.float32).reshape(
+        NUM_LANDMARKS, LANDMARK_FIELDS
+    )
+    publisher.publish_landmarks(landmarks, 100)
+    publisher.publish_landmarks(landmarks, 100, LandmarkType.WORLD_LANDMARKS, 1)
+    assert len(sink.messages) == 1
+
+    kind, sequence, timestamp_ms, landmark_type, performer = decode_header(
+        sink.messages[0]
+    )
+    assert (kind, sequence, timestamp_ms) == (MessageKind.LANDMARKS, 1, 100)
+    assert (landmark_type, performer) == (LandmarkType.WORLD_LANDMARKS, 1)
+    np.testing.assert_array_equal(decode_landmarks(sink.messages[0]), landmarks)
+
+
+def test_hit_carries_the_performer_and_the_timestamp() -> None:
+    sink = ListSink()
+    publisher = LandmarkPublisher(sink, LandmarkType.BOTH)
+    publisher.publish_landmarks(np.zeros((NUM_LANDMARKS, LANDMARK_FIELDS)), 200)
+    listener = publisher.hit_listener(2)
+    # Only the name of the sound is published
+    listener(
+        SimpleNamespace(name="snare"),  # type: ignore
+        MarkerEnum.LEFT_WRIST,
+        np.array([0.1, 0.2, 0.3]),
+        0.5,
+    )
+
+    kind, sequence, timestamp_ms, _, performer = decode_header(sink.messages[-1])
+    assert (kind, sequence, timestamp_ms, performer) == (MessageKind.HIT, 2, 200, 2)
+    marker, name, velocity, *_ = HIT.unpack_from(sink.messages[-1], MESSAGE_HEADER.size)
+    assert marker == MarkerEnum.LEFT_WRIST
+    assert name.rstrip(b"\0") == b"snare"
+    assert velocity == pytest.approx(0.5)
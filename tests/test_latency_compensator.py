@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+from drumpy.pose.latency_compensator import LatencyCompensator
+from drumpy.util import LandmarkArray
+
+
+def landmarks_at(positions: list[list[float]]) -> LandmarkArray:
+    """
+    Landmarks at the given x, y, z positions, with a visibility and presence
+    """
+    landmarks = np.full((len(positions), 5), 0.9, dtype=np.float32)
+    landmarks[:, :3] = positions
+    return landmarks
+
+
+def feed(
+    compensator: LatencyCompensator, positions: list[list[list[float]]]
+) -> LandmarkArray:
+    """
+    Register a detection every 33 ms
+    :return: The latest detection
+    """
+    for frame, frame_positions in enumerate(positions):
+        compensator.update(landmarks_at(frame_positions), 33 * frame)
+    return landmarks_at(positions[-1])
+
+
+def test_steady_motion_is_extrapolated() -> None:
+    compensator = LatencyCompensator(max_horizon_ms=100, max_distance=1)
+    # 0.001 per ms along x, 0.0005 per ms back along y
+    latest = feed(
+        compensator,
+        [[[0.001 * 33 * i, -0.0005 * 33 * i, 0.2]] for i in range(4)],
+    )
+    extrapolated = compensator.extrapolate(latest, 40)
+    np.testing.assert_allclose(
+        extrapolated[0, :3], latest[0, :3] + [0.04, -0.02, 0], atol=1e-6
+    )
+    np.testing.assert_array_equal(extrapolated[:, 3:], 0.9)
+
+
+def test_velocity_is_a_least_squares_fit() -> None:
+    rng = np.random.default_rng(0)
+    times = np.arange(4) * 33.0
+    xs = 0.5 + 0.001 * times + rng.normal(0, 0.002, 4)
+    compensator = LatencyCompensator(max_horizon_ms=100, max_distance=1)
+    latest = feed(compensator, [[[x, 0.5, 0.0]] for x in xs])
+
+    slope = np.polyfit(times, xs, 1)[0]
+    extrapolated = compensator.extrapolate(latest, 30)
+    assert extrapolated[0, 0] - latest[0, 0] == pytest.approx(30 * slope, rel=1e-4)
+    # Not the difference of the last two detections, which amplifies the jitter
+    assert slope != pytest.approx((xs[-1] - xs[-2]) / 33, rel=1e-2)
+
+
+def decelerating(timestamp_ms: float) -> float:
+    return 0.2 + 0.001 * timestamp_ms - 2e-6 * timestamp_ms**2
+
+
+def test_acceleration_is_fitted_with_a_parabola() -> None:
+    compensator = LatencyCompensator(
+        max_horizon_ms=100, max_distance=1, window=5, acceleration=True
+    )
+    latest = feed(compensator, [[[decelerating(33 * i), 0, 0]] for i in range(5)])
+    extrapolated = compensator.extrapolate(latest, 20)
+    assert extrapolated[0, 0] == pytest.approx(decelerating(33 * 4 + 20), abs=1e-6)
+
+
+def test_nothing_is_extrapolated_until_the_window_is_filled() -> None:
+    compensator = LatencyCompensator()
+    latest = feed(compensator, [[[0.01 * i, 0, 0]] for i in range(3)])
+    np.testing.assert_array_equal(compensator.extrapolate(latest, 30), latest)
+
+
+def test_extrapolation_time_is_capped() -> None:
+    compensator = LatencyCompensator(max_horizon_ms=50, max_distance=1)
+    latest = feed(compensator, [[[0.001 * 33 * i, 0, 0]] for i in range(4)])
+    np.testing.assert_allclose(
+        compensator.extrapolate(latest, 200), compensator.extrapolate(latest, 50)
+    )
+    np.testing.assert_array_equal(compensator.extrapolate(latest, -10), latest)
+
+
+def test_extrapolation_distance_is_capped() -> None:
+    compensator = LatencyCompensator(max_horizon_ms=50, max_distance=0.05)
+    # A fast landmark moving 0.003 per ms diagonally, and a slow one
+    latest = feed(
+        compensator,
+        [
+            [[0.003 * 33 * i, 0.003 * 33 * i, 0], [0.0001 * 33 * i, 0, 0]]
+            for i in range(4)
+        ],
+    )
+    moved = compensator.extrapolate(latest, 50)[:, :3] - latest[:, :3]
+    # The fast landmark is moved the capped distance in the direction of its motion
+    assert np.linalg.norm(moved[0]) == pytest.approx(0.05, rel=1e-5)
+    np.testing.assert_allclose(moved[0, 0], moved[0, 1], rtol=1e-5)
+    # The slow landmark is not affected by the cap of the fast one
+    assert moved[1, 0] == pytest.approx(0.005, rel=1e-4)
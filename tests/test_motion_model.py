@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+from mediapipe.tasks.python.vision import RunningMode  # type: ignore
+
+from drumpy.pose.landmark_type import LandmarkType
+from drumpy.pose.mediapipe_pose import MediaPipePose
+from drumpy.pose.motion_model import VelocityModel
+from drumpy.util import LandmarkArray
+
+
+def moving_landmarks(timestamp_ms: float) -> LandmarkArray:
+    """
+    Four landmarks moving at constant, different velocities, with a visibility and presence
+    """
+    landmarks = np.zeros((4, 5))
+    landmarks[:, :3] = np.arange(12).reshape(4, 3) * 0.001 * timestamp_ms
+    landmarks[:, 3:] = 0.9
+    return landmarks
+
+
+def test_nothing_is_predicted_before_a_detection() -> None:
+    model = VelocityModel()
+    assert model.predict(100) is None
+
+
+def test_a_single_detection_is_held() -> None:
+    model = VelocityModel()
+    model.update(moving_landmarks(100), 100)
+    np.testing.assert_array_equal(model.predict(150), moving_landmarks(100))
+
+
+def test_constant_velocity_is_extrapolated() -> None:
+    model = VelocityModel()
+    model.update(moving_landmarks(100), 100)
+    model.update(moving_landmarks(133), 133)
+    for timestamp_ms in [150, 166, 200]:
+        np.testing.assert_allclose(
+            model.predict(timestamp_ms), moving_landmarks(timestamp_ms), atol=1e-12
+        )
+
+
+def test_late_detection_is_ignored() -> None:
+    model = VelocityModel()
+    model.update(moving_landmarks(100), 100)
+    model.update(moving_landmarks(133), 133)
+    model.update(moving_landmarks(50) + 1, 120)
+    np.testing.assert_allclose(model.predict(166), moving_landmarks(166), atol=1e-12)
+
+
+def test_reset_forgets_the_detections() -> None:
+    model = VelocityModel()
+    model.update(moving_landmarks(100), 100)
+    model.reset()
+    assert model.predict(133) is None
+    # The first detection after a reset is not compared with the forgotten ones
+    model.update(moving_landmarks(50), 50)
+    np.testing.assert_array_equal(model.predict(66), moving_landmarks(50))
+
+
+def test_inference_stride_requires_video_mode() -> None:
+    # Rejected before the landmarker models are loaded
+    with pytest.raises(AssertionError, match="video mode"):
+        MediaPipePose(
+            running_mode=RunningMode.LIVE_STREAM,  # type: ignore
+            landmark_type=LandmarkType.LANDMARKS,
+            inference_stride=2,
+        )
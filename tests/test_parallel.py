@@ -0,0 +1,59 @@
+from typing import Self
+
+import numpy as np
+
+from drumpy.app.frame_buffer import Frame
+from drumpy.offline.parallel import seek_before
+
+
+class SnappingSource:
+    """
+    A video of 30 fps whose seeks land on the next key frame, every 10th frame
+    """
+
+    def __init__(self, frames: int) -> None:
+        self.frames = frames
+        self.position = 0
+        self.timestamp_ms = 0
+        self.decoded = 0
+
+    def get_fps(self: Self) -> float:
+        return 30.0
+
+    def seek(self: Self, frame_index: int) -> int:
+        self.position = min(-(-frame_index // 10) * 10, self.frames)
+        return self.position
+
+    def get_frame(self: Self) -> Frame | None:
+        if self.position >= self.frames:
+            return None
+        self.decoded += 1
+        self.timestamp_ms = round(self.position * 1000 / 30)
+        self.position += 1
+        return np.zeros((2, 2, 3), dtype=np.uint8)
+
+    def get_timestamp_ms(self: Self) -> int:
+        return self.timestamp_ms
+
+
+def test_seek_lands_at_or_before_the_timestamp() -> None:
+    for timestamp_ms in [0, 500, 1000, 1234, 3300]:
+        source = SnappingSource(100)
+        frame = seek_before(source, timestamp_ms)  # type: ignore
+        assert frame is not None
+        assert source.get_timestamp_ms() <= timestamp_ms
+
+
+def test_seek_past_a_key_frame_does_not_decode() -> None:
+    source = SnappingSource(100)
+    seek_before(source, 1234)  # type: ignore
+    # Frame 37 snaps to frame 40 after the timestamp, only the frame of the retried seek snapping to 10 is decoded
+    assert source.decoded == 1
+    assert source.get_timestamp_ms() == round(10 * 1000 / 30)
+
+
+def test_seek_past_the_end_is_retried() -> None:
+    source = SnappingSource(45)
+    frame = seek_before(source, 1490)  # type: ignore
+    assert frame is not None
+    assert source.get_timestamp_ms() <= 1490  # noqa: PLR2004
@@ -0,0 +1,54 @@
+import numpy as np
+from mediapipe.tasks.python.components.containers.landmark import NormalizedLandmark
+
+from drumpy.pose.person_matcher import PersonMatcher
+from drumpy.util import NUM_LANDMARKS
+
+
+def make_pose(x: float, y: float = 0.5) -> list[NormalizedLandmark]:
+    return [NormalizedLandmark(x=x, y=y, z=0.0) for _ in range(NUM_LANDMARKS)]
+
+
+def test_identities_follow_the_persons() -> None:
+    rng = np.random.default_rng(0)
+    matcher = PersonMatcher(3)
+    centers = [0.2, 0.5, 0.8]
+    identities = matcher.match([make_pose(x) for x in centers])
+    assert sorted(identities) == [0, 1, 2]
+    assert sorted(matcher.new_identities) == [0, 1, 2]
+    by_center = dict(zip(centers, identities, strict=True))
+
+    for _ in range(100):
+        # The persons move a little and the landmarker returns them in any order
+        centers = [x + rng.normal(0, 0.005) for x in centers]
+        order = rng.permutation(3).tolist()
+        identities = matcher.match([make_pose(centers[i]) for i in order])
+        assert matcher.new_identities == []
+        assert identities == [by_center[[0.2, 0.5, 0.8][i]] for i in order]
+
+
+def test_missing_person_keeps_identity() -> None:
+    matcher = PersonMatcher(2, max_missing_frames=30)
+    left, right = matcher.match([make_pose(0.2), make_pose(0.8)])
+    for _ in range(30):
+        assert matcher.match([make_pose(0.2)]) == [left]
+    assert matcher.match([make_pose(0.8), make_pose(0.2)]) == [right, left]
+    assert matcher.new_identities == []
+
+
+def test_identity_is_freed_for_a_new_person() -> None:
+    matcher = PersonMatcher(2, max_missing_frames=30)
+    left, right = matcher.match([make_pose(0.2), make_pose(0.8)])
+    for _ in range(31):
+        matcher.match([make_pose(0.2)])
+    # A new person far from where the previous one was last seen
+    assert matcher.match([make_pose(0.2), make_pose(0.5)]) == [left, right]
+    assert matcher.new_identities == [right]
+
+
+def test_far_pose_takes_a_free_identity() -> None:
+    matcher = PersonMatcher(2)
+    (first,) = matcher.match([make_pose(0.2)])
+    (second,) = matcher.match([make_pose(0.8)])
+    assert second != first
+    assert matcher.new_identities == [second]
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+from mediapipe.tasks.python.components.containers.landmark import NormalizedLandmark
+
+from drumpy.pose.region_of_interest import FULL_FRAME, Region, RegionOfInterest
+
+
+def make_landmarks(
+    points: list[tuple[float, float]], visibility: float = 0.9
+) -> list[NormalizedLandmark]:
+    return [
+        NormalizedLandmark(x=x, y=y, z=0.1, visibility=visibility) for x, y in points
+    ]
+
+
+def test_region_maps_to_the_full_frame() -> None:
+    landmarks = make_landmarks([(0.0, 0.0), (0.5, 0.25), (1.0, 1.0)])
+    Region(0.2, 0.4, 0.5).to_frame(landmarks)
+    assert [(landmark.x, landmark.y) for landmark in landmarks] == [
+        pytest.approx((0.2, 0.4)),
+        pytest.approx((0.45, 0.525)),
+        pytest.approx((0.7, 0.9)),
+    ]
+    assert landmarks[0].z == pytest.approx(0.05)
+
+
+def test_point_in_the_crop_maps_back_to_its_position_in_the_frame() -> None:
+    frame = np.zeros((400, 400, 3), dtype=np.uint8)
+    # A bright block at x 0.6, y 0.35 of the frame
+    frame[136:144, 236:244] = 255
+    roi = RegionOfInterest(input_size=256)
+    roi.update(make_landmarks([(0.5, 0.3), (0.7, 0.5)]))
+    assert not roi.region.is_full_frame()
+
+    image, region = roi.crop(frame)
+    assert image.shape == (256, 256, 3)
+    rows, columns = np.nonzero(image[..., 0] > 127)  # noqa: PLR2004
+    (landmark,) = make_landmarks(
+        [((columns.mean() + 0.5) / 256, (rows.mean() + 0.5) / 256)]
+    )
+    region.to_frame([landmark])
+    assert landmark.x == pytest.approx(0.6, abs=1 / 400)
+    assert landmark.y == pytest.approx(0.35, abs=1 / 400)
+
+
+def test_lost_pose_falls_back_to_the_full_frame() -> None:
+    frame = np.zeros((400, 400, 3), dtype=np.uint8)
+    roi = RegionOfInterest()
+    roi.update(make_landmarks([(0.5, 0.3), (0.7, 0.5)]))
+    assert not roi.region.is_full_frame()
+
+    for lost in [None, []]:
+        roi.update(lost)
+        assert roi.region is FULL_FRAME
+        image, region = roi.crop(frame)
+        assert image is frame
+        assert region.is_full_frame()
+
+
+def test_region_is_square_padded_and_inside_the_frame() -> None:
+    roi = RegionOfInterest(padding=0.25, min_size=0.3)
+    # The invisible landmark does not widen the region
+    roi.update(
+        make_landmarks([(0.8, 0.1), (0.95, 0.5)])
+        + make_landmarks([(0.1, 0.9)], visibility=0.1)
+    )
+    region = roi.region
+    assert region.size == pytest.approx(0.6)
+    # Shifted to stay inside the frame rather than clipped
+    assert region.left == pytest.approx(0.4)
+    assert region.top == pytest.approx(0.0)
+
+    # A pose that needs more than the frame uses the full frame
+    roi.update(make_landmarks([(0.1, 0.1), (0.9, 0.9)]))
+    assert roi.region is FULL_FRAME
@@ -0,0 +1,85 @@
+import numpy as np
+import numpy.typing as npt
+import pytest
+from mediapipe.tasks.python.components.containers.landmark import (
+    Landmark,
+    NormalizedLandmark,
+)
+from mediapipe.tasks.python.vision import PoseLandmarkerResult
+from previous_process_result import ResultProcessor as PreviousResultProcessor
+
+from drumpy.pose.landmark_type import LandmarkType
+from drumpy.pose.process_result import ResultProcessor
+from drumpy.util import NUM_LANDMARKS
+
+Frame = tuple[npt.NDArray[np.float64], npt.NDArray[np.float64], int]
+
+
+def make_frames(count: int) -> list[Frame]:
+    """
+    Drifting positions with jitter and occasional outliers, at irregular intervals
+    """
+    rng = np.random.default_rng(0)
+    base = rng.random((NUM_LANDMARKS, 3))
+    world_base = rng.normal(0, 0.3, (NUM_LANDMARKS, 3))
+    frames: list[Frame] = []
+    timestamp_ms = 0
+    for i in range(count):
+        timestamp_ms += int(rng.integers(10, 40))
+        outliers = 1 + 5 * (rng.random((NUM_LANDMARKS, 1)) < 0.1)  # noqa: PLR2004
+        positions = (
+            base + rng.normal(0, 0.01, (NUM_LANDMARKS, 3)) * outliers + i * 0.001
+        )
+        world = world_base + rng.normal(0, 0.01, (NUM_LANDMARKS, 3))
+        frames.append((positions, world, timestamp_ms))
+    return frames
+
+
+def make_result(frame: Frame) -> PoseLandmarkerResult:
+    positions, world, _ = frame
+    return PoseLandmarkerResult(
+        pose_landmarks=[
+            [
+                NormalizedLandmark(x=x, y=y, z=z, visibility=0.9, presence=0.9)
+                for x, y, z in positions.tolist()
+            ]
+        ],
+        pose_world_landmarks=[[Landmark(x=x, y=y, z=z) for x, y, z in world.tolist()]],
+    )
+
+
+def positions(result: PoseLandmarkerResult) -> npt.NDArray[np.float64]:
+    return np.array([(lm.x, lm.y, lm.z) for lm in result.pose_landmarks[0]])
+
+
+@pytest.mark.parametrize(
+    "landmark_type", [LandmarkType.LANDMARKS, LandmarkType.WORLD_LANDMARKS]
+)
+def test_matches_previous_implementation(landmark_type: LandmarkType) -> None:
+    previous = PreviousResultProcessor(landmark_type)
+    processor = ResultProcessor(landmark_type)
+    for i, frame in enumerate(make_frames(500)):
+        if i % 100 == 50:  # noqa: PLR2004
+            # A frame without a detected pose
+            empty = PoseLandmarkerResult(pose_landmarks=[], pose_world_landmarks=[])
+            previous.process_result(empty, frame[2])
+            processor.process_result(empty, frame[2])
+            continue
+
+        expected = previous.process_result(make_result(frame), frame[2])
+        processed = processor.process_result(make_result(frame), frame[2])
+        np.testing.assert_allclose(
+            positions(processed), positions(expected), rtol=0, atol=1e-12
+        )
+
+
+def test_indices_match_all_landmarks() -> None:
+    indices = [15, 16, 31, 32]
+    processor = ResultProcessor(LandmarkType.LANDMARKS)
+    subset_processor = ResultProcessor(LandmarkType.LANDMARKS, indices=indices)
+    for frame in make_frames(200):
+        processed = processor.process_result(make_result(frame), frame[2])
+        subset = subset_processor.process_result(make_result(frame), frame[2])
+        np.testing.assert_array_equal(
+            positions(subset)[indices], positions(processed)[indices]
+        )
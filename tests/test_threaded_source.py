@@ -0,0 +1,84 @@
+from typing import Self
+
+import numpy as np
+
+from drumpy.app.frame_buffer import Frame, FramePool
+from drumpy.app.threaded_source import (
+    BufferPolicy,
+    FrameRingBuffer,
+    ThreadedVideoSource,
+)
+from drumpy.app.video_source import VideoSource
+
+
+class CountingSource(VideoSource):
+    """
+    A source of frames filled with their frame number, it stops after the given number of frames
+    """
+
+    def __init__(self, frames: int) -> None:
+        super().__init__()
+        self.frame_pool = FramePool((4, 4, 3))
+        self.frames = frames
+        self.captured = 0
+
+    def get_fps(self: Self) -> float:
+        return 30.0
+
+    def capture_frame(self: Self) -> Frame | None:
+        frame = self.frame_pool.acquire()
+        frame.fill(self.captured)
+        self.captured += 1
+        self.stopped = self.captured == self.frames
+        return frame
+
+    def release(self: Self) -> None:
+        pass
+
+    def get_size(self: Self) -> tuple[int, int]:
+        return 4, 4
+
+    def get_timestamp_ms(self: Self) -> int:
+        return self.captured * 33
+
+
+def frame(number: int) -> tuple[Frame, int]:
+    return np.full((4, 4, 3), number, dtype=np.uint8), number * 33
+
+
+def test_drop_oldest_consumes_the_newest_frame() -> None:
+    buffer = FrameRingBuffer(3, BufferPolicy.DROP_OLDEST)
+    for number in range(5):
+        buffer.put(frame(number))
+    assert buffer.dropped_frames == 2  # noqa: PLR2004
+
+    newest, skipped = buffer.get_newest()
+    assert newest is not None and newest[1] == frame(4)[1]
+    assert [timestamp_ms for _, timestamp_ms in skipped] == [66, 99]
+    assert buffer.dropped_frames == 4  # noqa: PLR2004
+    assert len(buffer) == 0
+    assert buffer.get_newest() == (None, [])
+
+
+def test_block_consumes_every_frame_in_order() -> None:
+    buffer = FrameRingBuffer(3, BufferPolicy.BLOCK)
+    for number in range(3):
+        buffer.put(frame(number))
+    consumed = [buffer.get(block=False) for _ in range(4)]
+    assert [timed[1] for timed in consumed if timed is not None] == [0, 33, 66]
+    assert consumed[-1] is None
+    assert buffer.dropped_frames == 0
+
+
+def test_skipped_frames_return_to_the_pool() -> None:
+    source = CountingSource(10)
+    threaded = ThreadedVideoSource(source, BufferPolicy.DROP_OLDEST, capacity=2)
+    threaded.thread.join(timeout=5)
+
+    image = threaded.get_frame()
+    assert image is not None and image[0, 0, 0] == source.frames - 1
+    assert threaded.get_timestamp_ms() == source.frames * 33
+    # Only the consumed frame is still in use, every skipped or dropped frame was handed back
+    assert len(source.frame_pool.free) == len(source.frame_pool) - 1
+    assert threaded.get_frame() is None
+    threaded.release()
@@ -0,0 +1,232 @@
+import os
+from typing import Optional, Self
+
+import numpy as np
+import numpy.typing as npt
+import pygame
+import pytest
+
+from drumpy.drum.drum import SleepOption
+from drumpy.drum.sound import Sound
+from drumpy.offline.tracker_benchmark import (
+    TRACKER_TRENDS,
+    HitCounter,
+    ListMarkerTracker,
+)
+from drumpy.pose.mediapipe_markers import MarkerEnum
+from drumpy.tracking.drum_trackers import DrumTrackers
+from drumpy.tracking.marker_tracker import MarkerTracker
+from drumpy.tracking.performer_trackers import PerformerTrackers
+from drumpy.tracking.tracker_engine import TrackerEngine
+from drumpy.util import LANDMARK_FIELDS, NUM_LANDMARKS, Position, array_to_landmarks
+
+
+def make_strokes(
+    frames: int, trackers: int
+) -> tuple[npt.NDArray[np.float64], list[float]]:
+    """
+    Positions moving up and down at different speeds, with jitter, at irregular intervals
+    :return: The positions of shape (frames, trackers, 3) and the timestamps
+    """
+    rng = np.random.default_rng(0)
+    timestamps_ms = np.cumsum(rng.integers(25, 40, frames)).astype(np.float64)
+    periods_ms = rng.uniform(300, 900, trackers)
+    positions = rng.normal(0, 0.002, (frames, trackers, 3))
+    positions[..., 2] += 0.2 * np.abs(
+        np.sin(np.pi * timestamps_ms[:, None] / periods_ms[None])
+    )
+    return positions, timestamps_ms.tolist()
+
+
+class RecordingDrum(HitCounter):
+    """
+    Records the hits of the trackers instead of playing them
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.recorded: list[tuple[int, MarkerEnum, list[float], float]] = []
+        self.updates = 0
+
+    def find_and_play_sound(
+        self: Self,
+        position: Position,
+        marker: MarkerEnum,
+        velocity: float,
+        sounds: Optional[list[Sound]] = None,
+    ) -> None:
+        super().find_and_play_sound(position, marker, velocity, sounds)
+        self.recorded.append((self.updates, marker, position.tolist(), velocity))
+
+
+def run_trackers(
+    tracker_type: type[MarkerTracker | ListMarkerTracker],
+    positions: npt.NDArray[np.float64],
+    timestamps_ms: list[float],
+) -> list[tuple[int, MarkerEnum, list[float], float]]:
+    drum = RecordingDrum()
+    markers = list(MarkerEnum)[: positions.shape[1]]
+    trackers = [
+        tracker_type(
+            marker,
+            drum,
+            [],
+            downward_trend=TRACKER_TRENDS[i % len(TRACKER_TRENDS)][0],
+            upward_trend=TRACKER_TRENDS[i % len(TRACKER_TRENDS)][1],
+        )
+        for i, marker in enumerate(markers)
+    ]
+    for frame, timestamp_ms in zip(positions, timestamps_ms, strict=True):
+        drum.updates += 1
+        for tracker, position in zip(trackers, frame, strict=True):
+            tracker.update(position, timestamp_ms)
+    return drum.recorded
+
+
+def test_marker_tracker_matches_list_tracker() -> None:
+    positions, timestamps_ms = make_strokes(2000, 4)
+    expected = run_trackers(ListMarkerTracker, positions, timestamps_ms)
+    hits = run_trackers(MarkerTracker, positions, timestamps_ms)
+    assert len(expected) > 50  # noqa: PLR2004
+    assert [hit[:3] for hit in hits] == [hit[:3] for hit in expected]
+    np.testing.assert_allclose(
+        [hit[3] for hit in hits], [hit[3] for hit in expected], rtol=1e-9
+    )
+
+
+@pytest.mark.parametrize("trackers", [1, 4, 25])
+def test_engine_matches_marker_tracker(trackers: int) -> None:
+    positions, timestamps_ms = make_strokes(2000, trackers)
+    expected = run_trackers(MarkerTracker, positions, timestamps_ms)
+    markers = list(MarkerEnum)[:trackers]
+
+    engine = TrackerEngine(
+        [TRACKER_TRENDS[i % len(TRACKER_TRENDS)][0] for i in range(trackers)],
+        [TRACKER_TRENDS[i % len(TRACKER_TRENDS)][1] for i in range(trackers)],
+    )
+    hits: list[tuple[int, MarkerEnum, list[float], float]] = []
+    for update, (frame, timestamp_ms) in enumerate(
+        zip(positions, timestamps_ms, strict=True), start=1
+    ):
+        hits.extend(
+            (update, markers[hit.tracker], hit.position.tolist(), hit.velocity)
+            for hit in engine.update(frame, timestamp_ms)
+        )
+
+    assert len(expected) > 0
+    assert [hit[:3] for hit in hits] == [hit[:3] for hit in expected]
+    np.testing.assert_allclose(
+        [hit[3] for hit in hits], [hit[3] for hit in expected], rtol=1e-9
+    )
+
+
+def test_engine_reset_forgets_positions() -> None:
+    positions, timestamps_ms = make_strokes(400, 4)
+    downward_trends = [downward_trend for downward_trend, _ in TRACKER_TRENDS]
+    upward_trends = [upward_trend for _, upward_trend in TRACKER_TRENDS]
+    engine = TrackerEngine(downward_trends, upward_trends)
+    for frame, timestamp_ms in zip(positions[:200], timestamps_ms[:200], strict=True):
+        engine.update(frame, timestamp_ms)
+    engine.reset()
+
+    fresh = TrackerEngine(downward_trends, upward_trends)
+    hits = fresh_hits = 0
+    for frame, timestamp_ms in zip(positions[200:], timestamps_ms[200:], strict=True):
+        trackers = [hit.tracker for hit in engine.update(frame, timestamp_ms)]
+        fresh_trackers = [hit.tracker for hit in fresh.update(frame, timestamp_ms)]
+        assert trackers == fresh_trackers
+        hits += len(trackers)
+        fresh_hits += len(fresh_trackers)
+    assert hits > 0
+
+
+def test_engine_reset_of_some_trackers() -> None:
+    positions, timestamps_ms = make_strokes(400, 4)
+    downward_trends = [downward_trend for downward_trend, _ in TRACKER_TRENDS]
+    upward_trends = [upward_trend for _, upward_trend in TRACKER_TRENDS]
+    # The first four trackers are never reset, the last four start over like a fresh engine
+    engine = TrackerEngine(downward_trends * 2, upward_trends * 2)
+    kept = TrackerEngine(downward_trends, upward_trends)
+    for frame, timestamp_ms in zip(positions[:200], timestamps_ms[:200], strict=True):
+        engine.update(np.concatenate([frame, frame]), timestamp_ms)
+        kept.update(frame, timestamp_ms)
+    engine.reset(slice(4, 8))
+
+    fresh = TrackerEngine(downward_trends, upward_trends)
+    hits = 0
+    for frame, timestamp_ms in zip(positions[200:], timestamps_ms[200:], strict=True):
+        trackers = [
+            hit.tracker
+            for hit in engine.update(np.concatenate([frame, frame]), timestamp_ms)
+        ]
+        kept_trackers = [hit.tracker for hit in kept.update(frame, timestamp_ms)]
+        fresh_trackers = [hit.tracker + 4 for hit in fresh.update(frame, timestamp_ms)]
+        assert trackers == kept_trackers + fresh_trackers
+        hits += len(fresh_trackers)
+    assert hits > 0
+
+
+def make_poses(
+    frames: int, persons: int
+) -> tuple[npt.NDArray[np.float32], list[float]]:
+    """
+    Persons moving their whole body back and forth at different speeds, with jitter
+    :return: The landmarks of shape (frames, persons, 33, 5) and the timestamps
+    """
+    rng = np.random.default_rng(1)
+    timestamps_ms = np.cumsum(rng.integers(25, 40, frames)).astype(np.float64)
+    periods_ms = rng.uniform(300, 900, persons)
+    landmarks = rng.normal(
+        0.5, 0.002, (frames, persons, NUM_LANDMARKS, LANDMARK_FIELDS)
+    )
+    landmarks[..., 0] += (
+        0.2
+        * np.abs(np.sin(np.pi * timestamps_ms[:, None] / periods_ms[None]))[..., None]
+    )
+    return landmarks.astype(np.float32), timestamps_ms.tolist()
+
+
+def recording_drum_trackers() -> DrumTrackers:
+    # The sounds are loaded without an audio device, the hits are recorded instead of played
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    pygame.mixer.init()
+    drum_trackers = DrumTrackers(sleep_option=SleepOption.NO_SLEEP)
+    drum_trackers.drum = RecordingDrum()  # type: ignore
+    return drum_trackers
+
+
+def test_performer_trackers_match_drum_trackers() -> None:
+    landmarks, timestamps_ms = make_poses(600, 2)
+    # The second person is missing from frames 200 to 249
+    missing = range(200, 250)
+    separate = [recording_drum_trackers() for _ in range(2)]
+    batched = [recording_drum_trackers() for _ in range(2)]
+    performer_trackers = PerformerTrackers(batched, list(range(NUM_LANDMARKS)))
+
+    for frame, (poses, timestamp_ms) in enumerate(
+        zip(landmarks, timestamps_ms, strict=True)
+    ):
+        identities = [0] if frame in missing else [0, 1]
+        for drum_trackers in separate + batched:
+            drum_trackers.drum.updates += 1  # type: ignore
+        if frame == missing.stop:
+            separate[1].reset()
+        for identity in identities:
+            separate[identity].update(array_to_landmarks(poses[identity]), timestamp_ms)
+        performer_trackers.update(poses[identities], identities, timestamp_ms)
+
+    for expected, drum_trackers in zip(separate, batched, strict=True):
+        expected_hits = expected.drum.recorded  # type: ignore
+        hits = drum_trackers.drum.recorded  # type: ignore
+        assert len(expected_hits) > 0
+        assert [hit[:2] for hit in hits] == [hit[:2] for hit in expected_hits]
+        np.testing.assert_allclose(
+            [hit[2] + [hit[3]] for hit in hits],
+            [hit[2] + [hit[3]] for hit in expected_hits],
+            rtol=1e-9,
+        )
+    # The hits of the missing person are dropped
+    assert all(
+        hit[0] - 1 not in missing
+        for hit in batched[1].drum.recorded  # type: ignore
+    )
@@ -0,0 +1,184 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from drumpy.binary_trajectory_file import (
+    BinaryTrajectoryFile,
+    QUANTIZATION_STEP,
+    CompressedTrajectoryFile,
+    TrajectoryRecords,
+    convert_to_csv,
+    read_records,
+)
+from drumpy.pose.landmark_type import LandmarkType
+from drumpy.trajectory_reader import TrajectoryReader
+from drumpy.trajectory_writer import BackgroundTrajectoryWriter, open_trajectory_file
+from drumpy.util import LANDMARK_FIELDS, NUM_LANDMARKS, LandmarkArray
+
+
+def make_frames(
+    landmark_type: LandmarkType, count: int
+) -> list[tuple[int, int, LandmarkArray]]:
+    """
+    Frames of slowly moving landmarks, with gaps in the frame numbers and some missing visibility values
+    """
+    rng = np.random.default_rng(0)
+    shape = (
+        (2, NUM_LANDMARKS, LANDMARK_FIELDS)
+        if landmark_type == LandmarkType.BOTH
+        else (NUM_LANDMARKS, LANDMARK_FIELDS)
+    )
+    landmarks = rng.random(shape).astype(np.float32)
+    frames: list[tuple[int, int, LandmarkArray]] = []
+    for i in range(count):
+        landmarks = landmarks + rng.normal(0, 0.01, shape).astype(np.float32)
+        frame = landmarks.copy()
+        frame[..., i % NUM_LANDMARKS, 3] = np.nan
+        frames.append((2 * i, 33 * i, frame))
+    return frames
+
+
+def read_all(path: Path) -> tuple[LandmarkType, TrajectoryRecords]:
+    chunks = list(read_records(str(path), chunk_size=7))
+    assert len({landmark_type for landmark_type, _ in chunks}) == 1
+    return chunks[0][0], np.concatenate([records for _, records in chunks])
+
+
+def assert_frames_equal(
+    records: TrajectoryRecords,
+    frames: list[tuple[int, int, LandmarkArray]],
+    tolerance: float = 0.0,
+) -> None:
+    assert records["frame"].tolist() == [frame for frame, _, _ in frames]
+    assert records["time"].tolist() == [time for _, time, _ in frames]
+    np.testing.assert_allclose(
+        records["landmarks"],
+        np.array([landmarks for _, _, landmarks in frames]),
+        rtol=0,
+        atol=tolerance,
+    )
+
+
+@pytest.mark.parametrize("landmark_type", [LandmarkType.LANDMARKS, LandmarkType.BOTH])
+@pytest.mark.parametrize("write_behind", [False, True])
+def test_binary_round_trip(
+    tmp_path: Path,
+    landmark_type: LandmarkType,
+    write_behind: bool,  # noqa: FBT001
+) -> None:
+    path = tmp_path / "run.trajectory"
+    frames = make_frames(landmark_type, 50)
+    writer = open_trajectory_file(str(path), landmark_type, write_behind)
+    for frame, time, landmarks in frames:
+        writer.write_frame(frame, time, landmarks, landmark_type)
+    writer.close()
+
+    read_type, records = read_all(path)
+    assert read_type == landmark_type
+    assert_frames_equal(records, frames)
+
+
+@pytest.mark.parametrize("landmark_type", [LandmarkType.LANDMARKS, LandmarkType.BOTH])
+def test_compressed_round_trip(tmp_path: Path, landmark_type: LandmarkType) -> None:
+    path = tmp_path / "run.ztrajectory"
+    frames = make_frames(landmark_type, 50)
+    writer = CompressedTrajectoryFile(str(path), landmark_type, chunk_frames=16)
+    writer.write_frames(frames, landmark_type)
+    writer.close()
+
+    read_type, records = read_all(path)
+    assert read_type == landmark_type
+    assert writer.clipped_values == 0
+    assert_frames_equal(records, frames, tolerance=QUANTIZATION_STEP / 2)
+
+
+def test_compressed_clips_out_of_range_values(tmp_path: Path) -> None:
+    path = tmp_path / "run.ztrajectory"
+    frames = make_frames(LandmarkType.WORLD_LANDMARKS, 3)
+    # Beyond the +-32768 range of the quantized values
+    frames[1][2][0, :3] = [1e6, -1e6, 40000]
+    writer = CompressedTrajectoryFile(str(path), LandmarkType.WORLD_LANDMARKS)
+    writer.write_frames(frames, LandmarkType.WORLD_LANDMARKS)
+    writer.close()
+
+    _, records = read_all(path)
+    assert writer.clipped_values == len(frames[1][2][0, :3])
+    np.testing.assert_allclose(
+        records["landmarks"][1, 0, :3], [32768, -32768, 32768], rtol=1e-6
+    )
+    assert_frames_equal(records[[0, 2]], [frames[0], frames[2]], QUANTIZATION_STEP / 2)
+
+
+@pytest.mark.parametrize("landmark_type", [LandmarkType.LANDMARKS, LandmarkType.BOTH])
+def test_csv_conversion_round_trip(tmp_path: Path, landmark_type: LandmarkType) -> None:
+    binary_path = tmp_path / "run.trajectory"
+    csv_path = tmp_path / "run.csv"
+    frames = make_frames(landmark_type, 20)
+    writer = open_trajectory_file(str(binary_path), landmark_type)
+    writer.write_frames(frames, landmark_type)
+    writer.close()
+
+    assert convert_to_csv(str(binary_path), str(csv_path)) == len(frames)
+    reader = TrajectoryReader(str(csv_path), cache_index=False)
+    assert reader.landmark_type == landmark_type
+    assert reader.frames.tolist() == [frame for frame, _, _ in frames]
+    np.testing.assert_allclose(
+        reader.landmarks(slice(0, len(reader))),
+        np.array([landmarks for _, _, landmarks in frames]),
+        rtol=1e-6,
+    )
+    reader.close()
+
+
+class FailingFile:
+    """
+    A trajectory file whose disk is full
+    """
+
+    def __init__(self) -> None:
+        self.closed = False
+
+    def write_frames(self, *_: object) -> None:
+        raise OSError("No space left on device")
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def test_writer_error_is_raised_on_the_next_call() -> None:
+    trajectory_file = FailingFile()
+    writer = BackgroundTrajectoryWriter(trajectory_file, batch_size=1)  # type: ignore
+    landmarks = np.zeros((NUM_LANDMARKS, LANDMARK_FIELDS), dtype=np.float32)
+    writer.write_frame(0, 0, landmarks, LandmarkType.LANDMARKS)
+    writer.thread.join(timeout=5)
+    assert not writer.thread.is_alive()
+
+    with pytest.raises(OSError, match="No space left"):
+        writer.write_frame(1, 33, landmarks, LandmarkType.LANDMARKS)
+    assert writer.queue_depth == 0
+    with pytest.raises(OSError, match="No space left"):
+        writer.close()
+    assert trajectory_file.closed
+
+
+def test_pending_frames_are_written_on_close(tmp_path: Path) -> None:
+    path = tmp_path / "landmarks.trajectory"
+    frames = make_frames(LandmarkType.LANDMARKS, 50)
+    # Neither a full batch nor the flush interval writes the frames before the writer is closed
+    writer = BackgroundTrajectoryWriter(
+        BinaryTrajectoryFile(str(path), LandmarkType.LANDMARKS),
+        batch_size=1000,
+        flush_interval_s=60,
+    )
+    for frame, time, landmarks in frames:
+        writer.write_frame(frame, time, landmarks, LandmarkType.LANDMARKS)
+    assert writer.frames_written == 0
+
+    writer.close()
+    assert writer.frames_written == len(frames)
+    _, records = read_all(path)
+    assert_frames_equal(records, frames)
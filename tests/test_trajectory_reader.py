@@ -0,0 +1,115 @@
+from collections.abc import Iterator
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from drumpy.pose.landmark_type import LandmarkType
+from drumpy.trajectory_reader import INDEX_SUFFIX, TrajectoryReader
+from drumpy.trajectory_writer import open_trajectory_file
+from drumpy.util import LANDMARK_FIELDS, NUM_LANDMARKS, LandmarkArray
+
+# Frames 0 to 29 at 10 ms apart, the frames 10 to 14 have no detected pose and are not written
+FRAMES = [frame for frame in range(30) if not 10 <= frame < 15]  # noqa: PLR2004
+
+
+def frame_landmarks(frame: int, landmark_type: LandmarkType) -> LandmarkArray:
+    """
+    Landmarks that encode their frame, landmark index and field, so any slice can be checked
+    """
+    values = (
+        frame * 1000
+        + np.arange(NUM_LANDMARKS)[:, None] * 10
+        + np.arange(LANDMARK_FIELDS)[None]
+    ).astype(np.float32)
+    if landmark_type == LandmarkType.BOTH:
+        return np.stack((values, -values))
+    return values
+
+
+def write_file(path: Path, landmark_type: LandmarkType) -> None:
+    writer = open_trajectory_file(str(path), landmark_type)
+    for frame in FRAMES:
+        writer.write_frame(
+            frame, frame * 10, frame_landmarks(frame, landmark_type), landmark_type
+        )
+    writer.close()
+
+
+@pytest.fixture(params=["run.trajectory", "run.csv"])
+def reader(
+    request: pytest.FixtureRequest, tmp_path: Path
+) -> Iterator[TrajectoryReader]:
+    path = tmp_path / request.param
+    write_file(path, LandmarkType.LANDMARKS)
+    reader = TrajectoryReader(str(path))
+    yield reader
+    reader.close()
+
+
+def test_frame_slice(reader: TrajectoryReader) -> None:
+    assert len(reader) == len(FRAMES)
+    records = reader.frame_slice(8, 16)
+    assert reader.frames[records].tolist() == [8, 9, 15, 16]
+    np.testing.assert_array_equal(
+        reader.landmarks(records),
+        [frame_landmarks(frame, LandmarkType.LANDMARKS) for frame in [8, 9, 15, 16]],
+    )
+
+
+def test_time_slice_excludes_stop(reader: TrajectoryReader) -> None:
+    records = reader.time_slice(50, 170)
+    assert reader.frames[records].tolist() == [5, 6, 7, 8, 9, 15, 16]
+    assert reader.times[reader.time_slice(100, 150)].tolist() == []
+
+
+def test_landmark(reader: TrajectoryReader) -> None:
+    left_wrist = reader.landmark(15, reader.frame_slice(20, 22))
+    np.testing.assert_array_equal(
+        left_wrist,
+        [frame_landmarks(frame, LandmarkType.LANDMARKS)[15] for frame in [20, 21, 22]],
+    )
+
+
+@pytest.mark.parametrize("name", ["run.trajectory", "run.csv"])
+def test_both_landmark_types(tmp_path: Path, name: str) -> None:
+    path = tmp_path / name
+    write_file(path, LandmarkType.BOTH)
+    reader = TrajectoryReader(str(path), cache_index=False)
+    assert reader.landmark_type == LandmarkType.BOTH
+
+    records = reader.frame_slice(3, 4)
+    both = reader.landmarks(records)
+    assert both.shape == (2, 2, NUM_LANDMARKS, LANDMARK_FIELDS)
+    world = reader.landmarks(records, LandmarkType.WORLD_LANDMARKS)
+    np.testing.assert_array_equal(
+        world, [frame_landmarks(frame, LandmarkType.BOTH)[1] for frame in [3, 4]]
+    )
+    np.testing.assert_array_equal(
+        reader.landmark(0, records, LandmarkType.LANDMARKS),
+        [frame_landmarks(frame, LandmarkType.BOTH)[0, 0] for frame in [3, 4]],
+    )
+    reader.close()
+
+
+def test_cached_index(tmp_path: Path) -> None:
+    path = tmp_path / "run.csv"
+    write_file(path, LandmarkType.LANDMARKS)
+    first = TrajectoryReader(str(path))
+    assert Path(str(path) + INDEX_SUFFIX).exists()
+    second = TrajectoryReader(str(path))
+    np.testing.assert_array_equal(first.offsets, second.offsets)
+    np.testing.assert_array_equal(
+        first.landmarks(slice(3, 9)), second.landmarks(slice(3, 9))
+    )
+    first.close()
+    second.close()
+
+
+def test_empty_csv(tmp_path: Path) -> None:
+    path = tmp_path / "empty.csv"
+    path.touch()
+    reader = TrajectoryReader(str(path), cache_index=False)
+    assert len(reader) == 0
+    assert reader.landmarks(slice(0, 0)).shape == (0, NUM_LANDMARKS, LANDMARK_FIELDS)
+    reader.close()